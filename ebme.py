@@ -12,6 +12,7 @@ from PySide6.QtWidgets import QApplication
 
 import resources_rc
 import src.main.main as main
+import src.coilsnake.io_profile as io_profile
 import src.misc.debug as debug
 import src.misc.icons as icons
 
@@ -30,6 +31,11 @@ if __name__ == "__main__":
                         default=None)
     parser.add_argument("--no-autoload", action="store_true", help="Don't automatically load the most recent project even if the setting is enabled.")
     parser.add_argument("--system-output", action="store_true", help="Use system output instead of the debug window")
+    parser.add_argument("--profile-io",
+                        help="Write how long each part of the last project load and save took to this JSON file",
+                        type=str,
+                        metavar="FILE",
+                        default=None)
     
     args = parser.parse_args()
     
@@ -42,6 +48,8 @@ if __name__ == "__main__":
         
     if args.debug:
         logging.basicConfig(level=args.debug)
+        
+    io_profile.REPORT_PATH = args.profile_io
 
     app = QApplication(sys.argv)
     
@@ -23,11 +23,13 @@ class ActionChangeMapChangeEvent(QUndoCommand):
         self.event.flag = self.flag
         self.event.changes = self.changes
         self.event.comment = self.comment
+        self.event.invalidateTileIndex()
         
     def undo(self):
         self.event.flag = self._flag
         self.event.changes = self._changes
         self.event.comment = self._comment
+        self.event.invalidateTileIndex()
     
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -134,10 +136,12 @@ class ActionChangeTileChange(QUndoCommand):
     def redo(self):
         self.change.before = self.before
         self.change.after = self.after
+        self.event.invalidateTileIndex()
     
     def undo(self):
         self.change.before = self._before
         self.change.after = self._after
+        self.event.invalidateTileIndex()
     
     def mergeWith(self, other: QUndoCommand):
         return False
@@ -156,6 +160,7 @@ class ActionAddTileChange(QUndoCommand):
         
     def redo(self):
         self.event.changes.insert(self.index, self.change)
+        self.event.invalidateTileIndex()
     
     def undo(self):
         ActionRemoveTileChange.redo(self)
@@ -178,6 +183,7 @@ class ActionRemoveTileChange(QUndoCommand):
         
     def redo(self):
         self.event.changes.remove(self.change)
+        self.event.invalidateTileIndex()
     
     def undo(self):
         ActionAddTileChange.redo(self)
@@ -8,7 +8,6 @@ from src.coilsnake.fts_interpreter import (FullTileset, Minitile, Palette,
                                            PaletteGroup, Subpalette, Tile)
 from src.coilsnake.project_data import ProjectData
 from src.objects.palette_settings import PaletteSettings
-from src.objects.sector import Sector
 from src.objects.tile import MapTile, MapTileGraphic
 
 
@@ -77,10 +76,10 @@ class ActionChangeArrangement(QUndoCommand):
         
         
     def redo(self):
-        self.tile.metadata[self.index] = self.metadata
+        self.tile.setMetadata(self.index, self.metadata)
         
     def undo(self):
-        self.tile.metadata[self.index] = self._metadata
+        self.tile.setMetadata(self.index, self._metadata)
     
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -150,10 +149,10 @@ class ActionChangeSubpaletteColour(QUndoCommand):
             self.setObsolete(True)
         
     def redo(self):
-        self.subpalette.subpaletteRGBA[self.index] = (*self.colour, self.alpha)
+        self.subpalette.setColour(self.index, (*self.colour, self.alpha))
         
     def undo(self):
-        self.subpalette.subpaletteRGBA[self.index] = self._colour
+        self.subpalette.setColour(self.index, self._colour)
     
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -339,16 +338,14 @@ class ActionRemovePalette(QUndoCommand):
         # it works, okay?!
         self.commands: list[QUndoCommand] = []
         
-        for i in self.projectData.sectors.flat:
-            i: Sector
-            if i.palettegroup == self.palette.groupID and i.palette == self.palette.paletteID:
-                self.commands.append(ActionChangeSectorAttributes(
-                    i, i.tileset, i.palettegroup,
-                    self.projectData.getTileset(i.tileset).getPaletteGroup(
-                    i.palettegroup).palettes[0].paletteID,
-                    i.item, i.music, i.setting, i.teleport,
-                    i.townmap, i.townmaparrow, i.townmapimage,
-                    i.townmapx, i.townmapy, i.userdata))
+        for i in self.projectData.sectorsWhere(palettegroup=self.palette.groupID, palette=self.palette.paletteID):
+            self.commands.append(ActionChangeSectorAttributes(
+                i, i.tileset, i.palettegroup,
+                self.projectData.getTileset(i.tileset).getPaletteGroup(
+                i.palettegroup).palettes[0].paletteID,
+                i.item, i.music, i.setting, i.teleport,
+                i.townmap, i.townmaparrow, i.townmapimage,
+                i.townmapx, i.townmapy, i.userdata))
                 
         # change things using palettes past this ID to use ID -1
         # (don't actually apply the change here, only create actions)
@@ -357,14 +354,12 @@ class ActionRemovePalette(QUndoCommand):
             self.test = i
             if i.paletteID > palette.paletteID:
                 # for sectors
-                for j in self.projectData.sectors.flat:
-                    j: Sector
-                    if j.palette == i.paletteID and j.palettegroup == i.groupID:
-                        self.commands.append(ActionChangeSectorAttributes(
-                            j, j.tileset, j.palettegroup, j.palette-1, # <-- the important bit
-                            j.item, j.music, j.setting, j.teleport,
-                            j.townmap, j.townmaparrow, j.townmapimage,
-                            j.townmapx, j.townmapy, i.userdata))
+                for j in self.projectData.sectorsWhere(palettegroup=i.groupID, palette=i.paletteID):
+                    self.commands.append(ActionChangeSectorAttributes(
+                        j, j.tileset, j.palettegroup, j.palette-1, # <-- the important bit
+                        j.item, j.music, j.setting, j.teleport,
+                        j.townmap, j.townmaparrow, j.townmapimage,
+                        j.townmapx, j.townmapy, i.userdata))
                         
                 
         # for palette settings
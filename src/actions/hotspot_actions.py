@@ -6,13 +6,15 @@ import src.misc.common as common
 from src.misc.coords import EBCoords
 
 if TYPE_CHECKING:
+    from src.coilsnake.project_data import ProjectData
     from src.objects.hotspot import Hotspot
 
 class ActionChangeHotspotLocation(QUndoCommand):
-    def __init__(self, hotspot: "Hotspot", start: EBCoords, end: EBCoords):
+    def __init__(self, projectData: "ProjectData", hotspot: "Hotspot", start: EBCoords, end: EBCoords):
         super().__init__()
         self.setText("Change hotspot location")
         
+        self.projectData = projectData
         self.hotspot = hotspot
         self.start = start
         self.end = end
@@ -25,10 +27,12 @@ class ActionChangeHotspotLocation(QUndoCommand):
     def redo(self):
         self.hotspot.start = self.start
         self.hotspot.end = self.end
+        self.projectData.hotspotGrid.update(self.hotspot)
         
     def undo(self):
         self.hotspot.start = self._start
         self.hotspot.end = self._end
+        self.projectData.hotspotGrid.update(self.hotspot)
         
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
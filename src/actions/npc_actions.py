@@ -14,12 +14,13 @@ if TYPE_CHECKING:
 
 
 class ActionMoveNPCInstance(QUndoCommand):
-    def __init__(self, instance: "NPCInstance", coords: EBCoords, parent=None):
+    def __init__(self, projectData: "ProjectData", instance: "NPCInstance", coords: EBCoords, parent=None):
         super().__init__(parent)
         self.setText("Move NPC")
 
         coords.restrictToMap()
 
+        self.projectData = projectData
         self.instance = instance
         self.coords = coords
 
@@ -29,9 +30,11 @@ class ActionMoveNPCInstance(QUndoCommand):
 
     def redo(self):
         self.instance.coords = self.coords
+        self.projectData.npcInstanceGrid.update(self.instance)
 
     def undo(self):
         self.instance.coords = self._coords
+        self.projectData.npcInstanceGrid.update(self.instance)
 
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -51,20 +54,21 @@ class ActionMoveNPCInstance(QUndoCommand):
             return common.ACTIONINDEX.NPCMOVE
 
 class ActionChangeNPCInstance(QUndoCommand):
-    def __init__(self, instance: "NPCInstance", npc: int):
+    def __init__(self, projectData: "ProjectData", instance: "NPCInstance", npc: int):
         super().__init__()
         self.setText("Change NPC instance")
 
+        self.projectData = projectData
         self.instance = instance
         self.npc = npc
 
         self._npc = instance.npcID
     
     def redo(self):
-        self.instance.npcID = self.npc
+        self.projectData.setNPCInstanceNPC(self.instance, self.npc)
 
     def undo(self):
-        self.instance.npcID = self._npc
+        self.projectData.setNPCInstanceNPC(self.instance, self._npc)
 
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -89,12 +93,9 @@ class ActionDeleteNPCInstance(QUndoCommand):
         self.scene = scene
 
     def redo(self):
-        item = self.scene.placedNPCsByUUID[self.instance.uuid]
-        if item:
-            self.scene.removeItem(item) # this specific function is slow, is there a better way? probably not
-            self.scene.placedNPCsByUUID.pop(self.instance.uuid)
-            self.scene.placedNPCsByID[self.instance.npcID].remove(item)
-            self.scene.projectData.npcinstances.remove(self.instance)
+        if self.instance.uuid in self.scene.placedNPCs:
+            self.scene.placedNPCs.unregister(self.instance.uuid) # removing items from the scene is slow, is there a better way? probably not
+            self.scene.projectData.removeNPCInstance(self.instance)
         
     def undo(self):
         ActionAddNPCInstance.redo(self)
@@ -114,31 +115,15 @@ class ActionAddNPCInstance(QUndoCommand):
         self.scene = scene
 
     def redo(self):
-        from src.objects.npc import \
-            MapEditorNPC  # i dont like it either but it's necessary
-        npc = self.scene.projectData.getNPC(self.instance.npcID)
-        spr = self.scene.projectData.getSprite(npc.sprite)
-        inst = MapEditorNPC(self.instance.coords, self.instance.npcID, self.instance.uuid, spr)
-        inst.setFacing(common.DIRECTION8[npc.direction])
-
-        # TODO this would be better as a set instead of a list
-        if not self.instance in self.scene.projectData.npcinstances:
-            self.scene.projectData.npcinstances.append(self.instance)
-        
-        else:
+        if not self.scene.projectData.addNPCInstance(self.instance):
             logging.warning(f"Can't add an instance multiple times! (UUID: {self.instance.uuid}, NPC ID: {self.instance.npcID})")
             self.setObsolete(True)
             return
-            
-        if not self.instance.npcID in self.scene.placedNPCsByID:
-            self.scene.placedNPCsByID[self.instance.npcID] = [inst,]
-        else:
-            self.scene.placedNPCsByID[self.instance.npcID].append(inst)
 
-        if not self.instance.uuid in self.scene.placedNPCsByUUID:
-            self.scene.placedNPCsByUUID[self.instance.uuid] = inst
+        if not self.instance.uuid in self.scene.placedNPCs:
+            # always create the item, even off-screen, so it can be selected
+            inst = self.scene.placedNPCs.register(self.instance, True)
             inst.setSelected(True)
-            self.scene.addItem(inst)
         else:
             logging.warning(f"Can't add an instance multiple times! (ID: {self.instance.uuid}, NPC ID: {self.instance.npcID})")
             self.setObsolete(True)
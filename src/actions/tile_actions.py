@@ -1,3 +1,4 @@
+import numpy
 from PySide6.QtGui import QUndoCommand
 
 import src.misc.common as common
@@ -28,49 +29,127 @@ class ActionPlaceTile(QUndoCommand):
         return common.ACTIONINDEX.TILEPLACE
 
 
-class ActionSwapTiles(QUndoCommand):
-    def __init__(self, projectData: ProjectData, before: int, after: int, tileset: int):
+class ActionPermuteTiles(QUndoCommand):
+    def __init__(self, projectData: ProjectData, permutation: list[int]|numpy.ndarray, tileset: int):
+        """Reorder the tiles of a tileset, and update everything that refers to them (the map and map changes).
+
+        Args:
+            projectData (ProjectData): project data
+            permutation (list[int] | numpy.ndarray): new tile ID, indexed by old tile ID. Must contain every tile ID exactly once.
+            tileset (int): the tileset to reorder
+        """
         super().__init__()
-        self.setText("Swap tiles")
+        self.setText("Rearrange tiles")
         
         self.projectData = projectData
-        self.before = before
-        self.after = after
         self.tileset = tileset
         
-    def redo(self):
+        self.permutation = numpy.asarray(permutation, dtype=numpy.uint16)
+        assert numpy.array_equal(numpy.sort(self.permutation), numpy.arange(common.MAXTILES)), \
+            "Tile permutation must contain every tile ID exactly once."
+        self._permutation = numpy.argsort(self.permutation).astype(numpy.uint16)
+        
+        if numpy.array_equal(self.permutation, numpy.arange(common.MAXTILES)):
+            self.setObsolete(True)
+    
+    def _apply(self, permutation: numpy.ndarray):
         # Replace tiles on the map
-        for i in self.projectData.tiles.flat:
-            i: MapTile
-            if i.tileset == self.tileset:
-                if i.tile == self.before:
-                    i.tile = self.after
-                elif i.tile == self.after:
-                    i.tile = self.before
+        mask = self.projectData.tilesetMask(self.tileset)
+        tileIDs = self.projectData.tileIDs
+        tileIDs[mask] = permutation[tileIDs[mask]]
         # Replace map changes
-        for event in self.projectData.mapChanges[self.tileset].events:
-            for change in event.changes:
-                # the "before" and "after" fields of this and the changes are totally unrelated despite the name
-                if change.before == self.before:
-                    change.before = self.after
-                elif change.before == self.after:
-                    change.before = self.before
-
-                if change.after == self.before:
-                    change.after = self.after
-                elif change.after == self.after:
-                    change.after = self.before
+        self.projectData.mapChanges[self.tileset].remapTiles(permutation)
         # Reorder tiles in the tileset
-        tileset = self.projectData.getTileset(self.tileset)
-        tileset.swapTiles(self.before, self.after)
-        # Clear the cache
-        self.projectData.clobberTileGraphicsCache(self.tileset)
+        self.projectData.getTileset(self.tileset).permuteTiles(permutation)
+        # Move the cache along with it
+        self.projectData.permuteTileGraphicsCache(self.tileset, permutation)
+        
+    def redo(self):
+        self._apply(self.permutation)
     
     def undo(self):
-        self.redo()
+        self._apply(self._permutation)
     
     def mergeWith(self, other: QUndoCommand):
         return False
 
+    def id(self):
+        return common.ACTIONINDEX.TILEPERMUTE
+
+
+class ActionSwapTiles(ActionPermuteTiles):
+    def __init__(self, projectData: ProjectData, before: int, after: int, tileset: int):
+        # the "before" and "after" fields of this and map changes are totally unrelated despite the name
+        permutation = numpy.arange(common.MAXTILES, dtype=numpy.uint16)
+        permutation[before], permutation[after] = after, before
+        super().__init__(projectData, permutation, tileset)
+        self.setText("Swap tiles")
+        
+        self.before = before
+        self.after = after
+
     def id(self):
         return common.ACTIONINDEX.TILESWAP
+
+
+class ActionRemapTiles(QUndoCommand):
+    def __init__(self, projectData: ProjectData, table: list[int]|numpy.ndarray, permutation: list[int]|numpy.ndarray|None, tileset: int):
+        """Remap references to the tiles of a tileset (the map and map changes) and optionally reorder the tileset, all at once.
+        Unlike ActionPermuteTiles, several tiles can be remapped to the same tile, which is how duplicates are merged.
+
+        Args:
+            projectData (ProjectData): project data
+            table (list[int] | numpy.ndarray): new tile ID for references, indexed by old tile ID
+            permutation (list[int] | numpy.ndarray | None): new position of each tile's data in the tileset, indexed by old tile ID. None to leave the tileset's order alone.
+            tileset (int): the tileset to remap
+        """
+        super().__init__()
+        self.setText("Remap tiles")
+        
+        self.projectData = projectData
+        self.tileset = tileset
+        
+        self.table = numpy.asarray(table, dtype=numpy.uint16)
+        assert self.table.shape == (common.MAXTILES,) and self.table.max() < common.MAXTILES, \
+            "Tile remap table must have a valid tile ID for every tile."
+        if permutation is not None:
+            permutation = numpy.asarray(permutation, dtype=numpy.uint16)
+            assert numpy.array_equal(numpy.sort(permutation), numpy.arange(common.MAXTILES)), \
+                "Tile permutation must contain every tile ID exactly once."
+        self.permutation = permutation
+        
+        # unlike permutations, merges can't be inverted, so keep what we replace
+        self._mask = self.projectData.tilesetMask(self.tileset)
+        self._tileIDs = self.projectData.tileIDs[self._mask]
+        self._tiles = list(self.projectData.getTileset(self.tileset).tiles)
+        self._changes = [(change, change.before, change.after)
+                         for event in self.projectData.mapChanges[self.tileset].events
+                         for change in event.changes]
+        
+        if numpy.array_equal(self.table, numpy.arange(common.MAXTILES)) and \
+           (permutation is None or numpy.array_equal(permutation, numpy.arange(common.MAXTILES))):
+            self.setObsolete(True)
+        
+    def redo(self):
+        tileIDs = self.projectData.tileIDs
+        tileIDs[self._mask] = self.table[self._tileIDs]
+        self.projectData.mapChanges[self.tileset].remapTiles(self.table)
+        if self.permutation is not None:
+            self.projectData.getTileset(self.tileset).permuteTiles(self.permutation)
+        self.projectData.clobberTileGraphicsCache(self.tileset)
+    
+    def undo(self):
+        self.projectData.tileIDs[self._mask] = self._tileIDs
+        for change, before, after in self._changes:
+            change.before = before
+            change.after = after
+        for event in self.projectData.mapChanges[self.tileset].events:
+            event.invalidateTileIndex()
+        self.projectData.getTileset(self.tileset).tiles[:] = self._tiles
+        self.projectData.clobberTileGraphicsCache(self.tileset)
+    
+    def mergeWith(self, other: QUndoCommand):
+        return False
+
+    def id(self):
+        return common.ACTIONINDEX.TILEREMAP
@@ -7,15 +7,17 @@ import src.misc.common as common
 from src.misc.coords import EBCoords
 
 if TYPE_CHECKING:
+    from src.coilsnake.project_data import ProjectData
     from src.mapeditor.map.map_scene import MapEditorScene
     from src.objects.trigger import Trigger
 
 
 class ActionMoveTrigger(QUndoCommand):
-    def __init__(self, trigger: "Trigger", coords: EBCoords):
+    def __init__(self, projectData: "ProjectData", trigger: "Trigger", coords: EBCoords):
         super().__init__()
         self.setText("Move trigger")
 
+        self.projectData = projectData
         self.trigger = trigger
         self.coords = coords
 
@@ -24,9 +26,11 @@ class ActionMoveTrigger(QUndoCommand):
         
     def redo(self):
         self.trigger.coords = self.coords
+        self.projectData.triggerGrid.update(self.trigger)
         
     def undo(self):
         self.trigger.coords = self._coords
+        self.projectData.triggerGrid.update(self.trigger)
         
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -91,11 +95,9 @@ class ActionDeleteTrigger(QUndoCommand):
         self.scene = scene
         
     def redo(self):
-        item = self.scene.placedTriggersByUUID[self.trigger.uuid]
-        if item:
-            self.scene.removeItem(item)
-            self.scene.placedTriggersByUUID.pop(self.trigger.uuid)
-            self.scene.projectData.triggers.remove(self.trigger)
+        if self.trigger.uuid in self.scene.placedTriggers:
+            self.scene.placedTriggers.unregister(self.trigger.uuid)
+            self.scene.projectData.removeTrigger(self.trigger)
             
     def undo(self):
         ActionAddTrigger.redo(self)
@@ -115,41 +117,15 @@ class ActionAddTrigger(QUndoCommand):
         self.scene = scene
     
     def redo(self):
-        import src.objects.trigger as trigger
-        placement = trigger.MapEditorTrigger(self.trigger.coords, self.trigger.uuid)
-        match type(self.trigger.typeData):
-            case trigger.TriggerDoor:
-                placement.setPixmap(self.scene.imgTriggerDoor)
-            case trigger.TriggerEscalator:
-                placement.setPixmap(self.scene.imgTriggerEscalator)
-            case trigger.TriggerLadder:
-                placement.setPixmap(self.scene.imgTriggerLadder)
-            case trigger.TriggerObject:
-                placement.setPixmap(self.scene.imgTriggerObject)
-            case trigger.TriggerPerson:
-                placement.setPixmap(self.scene.imgTriggerPerson)
-            case trigger.TriggerRope:
-                placement.setPixmap(self.scene.imgTriggerRope)
-            case trigger.TriggerStairway:
-                placement.setPixmap(self.scene.imgTriggerStairway)
-            case trigger.TriggerSwitch:
-                placement.setPixmap(self.scene.imgTriggerSwitch)
-            case _: # should never happen
-                logging.warning(f"Unknown trigger type {self.trigger.typeData}")
-                placement.setPixmap(self.scene.imgTriggerDoor)
-                
-        if not self.trigger in self.scene.projectData.triggers:
-            self.scene.projectData.triggers.append(self.trigger)
-            
-        else:
+        if not self.scene.projectData.addTrigger(self.trigger):
             logging.warning(f"Can't add a trigger multiple times! (UUID: {self.trigger.uuid})")
             self.setObsolete(True)
             return
         
-        if not self.trigger.uuid in self.scene.placedTriggersByUUID:
-            self.scene.placedTriggersByUUID[self.trigger.uuid] = placement
+        if not self.trigger.uuid in self.scene.placedTriggers:
+            # always create the item, even off-screen, so it can be selected
+            placement = self.scene.placedTriggers.register(self.trigger, True)
             placement.setSelected(True)
-            self.scene.addItem(placement)
         else:
             logging.warning(f"Can't add a trigger multiple times! (UUID: {self.trigger.uuid})")
             self.setObsolete(True)
@@ -6,13 +6,15 @@ import src.misc.common as common
 from src.misc.coords import EBCoords
 
 if TYPE_CHECKING:
+    from src.coilsnake.project_data import ProjectData
     from src.objects.warp import Teleport, Warp
 
 class ActionMoveWarp(QUndoCommand):
-    def __init__(self, warp: "Warp", coords: EBCoords):
+    def __init__(self, projectData: "ProjectData", warp: "Warp", coords: EBCoords):
         super().__init__()
         self.setText("Move warp")
 
+        self.grid = projectData.warpGrid
         self.warp = warp
         self.coords = coords
 
@@ -21,9 +23,11 @@ class ActionMoveWarp(QUndoCommand):
         
     def redo(self):
         self.warp.dest = self.coords
+        self.grid.update(self.warp)
         
     def undo(self):
         self.warp.dest = self._coords
+        self.grid.update(self.warp)
         
     def mergeWith(self, other: QUndoCommand):
         # wrong action type
@@ -89,10 +93,11 @@ class ActionUpdateWarp(QUndoCommand):
     
     
 class ActionMoveTeleport(ActionMoveWarp):
-    def __init__(self, teleport: "Teleport", coords: EBCoords):
-        super().__init__(teleport, coords)
+    def __init__(self, projectData: "ProjectData", teleport: "Teleport", coords: EBCoords):
+        super().__init__(projectData, teleport, coords)
         self.setText("Move teleport")
         
+        self.grid = projectData.teleportGrid
         self.teleport = self.warp
         
     def mergeWith(self, other: QUndoCommand):
@@ -21,8 +21,8 @@ from src.coilsnake.datamodules.tilesets import TilesetModule
 from src.coilsnake.datamodules.triggers import TriggerModule
 from src.coilsnake.datamodules.warps import WarpModule
 
-# The order IS important. Modules are loaded in the order of this list.
-# If a module depends on the data loaded by another, place it after the dependency.
+# Modules are loaded in parallel, each as soon as the modules in its DEPENDS are loaded.
+# If a module uses the data loaded by another, add it to DEPENDS. Modules are saved in the order of this list.
 MODULES = (ProjectSnakeModule,
            TilesetModule, PaletteSettingsModule, SectorModule, TileModule, 
            TileGraphicsModule, SpriteModule, PlayerGFXModule, SpriteFXModule, NPCModule, NPCInstanceModule, 
@@ -1,27 +1,31 @@
-from PIL import Image, ImageQt
+import os
 
 from src.coilsnake.datamodules.data_module import DataModule
 from src.coilsnake.project_data import ProjectData
 from src.misc.exceptions import SubResourceNotFoundError
-from src.objects.sprite import BattleSprite
+from src.objects.sprite import BATTLE_SPRITES, BattleSprite
 
 
 class BattleSpriteModule(DataModule):
     NAME = "battle sprites"
+    DATA = "battleSprites"
     
     def load(data: ProjectData):
+        BATTLE_SPRITES.clear()
         battleSprites = {}
         for key in data.projectSnake["resources"]["eb.EnemyModule"].keys():
             path = data.getResourcePath("eb.EnemyModule", key)
             if str(key).split("/")[0] == "BattleSprites": # cursed but i dont know how else
-                try:
-                    sprImg = ImageQt.ImageQt(Image.open(path).convert("RGBA"))
-                except FileNotFoundError:
+                # the image is only decoded when it's first shown
+                if not os.path.isfile(path):
                     raise SubResourceNotFoundError(f"Couldn't find battle sprite at {path}")
                 id = int(str(key).split("/")[1]) # also cursed
-                battleSprites[id] = BattleSprite(id, sprImg)
+                battleSprites[id] = BattleSprite(id, path)
 
         data.battleSprites = battleSprites
     
+    def restored(data: ProjectData):
+        BATTLE_SPRITES.clear()
+    
     def save(data: ProjectData):
         return # this data is not saved
\ No newline at end of file
@@ -13,10 +13,22 @@ class DataModule:
     """
     NAME = ""
     """Display name of the module. Should be written in plural and lowercase."""
+    DEPENDS: tuple[type["DataModule"], ...] = ()
+    """Modules whose data this one uses when loading. Project.snake is always loaded first, so it doesn't need to be listed."""
+    DATA = ""
+    """The ProjectData attribute this module fills, if any. Used to count loaded objects when profiling."""
+    EXTRA_DATA: tuple[str, ...] = ()
+    """Other ProjectData attributes this module fills. Kept in snapshots along with DATA."""
+    SNAPSHOT = True
+    """Whether this module's DATA can be restored from a project snapshot (see ProjectSnapshot) instead of being loaded."""
     
     def load(projectData: ProjectData):
         raise NotImplementedError("Base data module has nothing to load!")
     
+    def restored(projectData: ProjectData):
+        """Called after this module's data is restored from a snapshot. Rebuild anything made from it here."""
+        return
+    
     def save(projectData: ProjectData):
         raise NotImplementedError("Base data module has nothing to save!")
     
@@ -5,6 +5,7 @@ from src.objects.enemy import EnemyGroup
 
 class EnemyGroupModule(YMLResourceDataModule):
     NAME = "enemy groups"
+    DATA = "enemyGroups"
     MODULE = "eb.EnemyModule"
     RESOURCE = "enemy_groups"
     
@@ -5,6 +5,7 @@ from src.objects.enemy import EnemyMapGroup
 
 class EnemyMapGroupModule(YMLResourceDataModule):
     NAME = "enemy map groups"
+    DATA = "enemyMapGroups"
     MODULE = "eb.MapEnemyModule"
     RESOURCE = "map_enemy_groups"
     FLOW_STYLE = None
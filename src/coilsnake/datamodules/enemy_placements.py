@@ -8,6 +8,7 @@ from src.coilsnake.project_data import ProjectData
 
 class EnemyPlacementsModule(YMLResourceDataModule):
     NAME = "enemy placements"
+    DATA = "enemyPlacements"
     MODULE = "eb.MapEnemyModule"
     RESOURCE = "map_enemy_placement"
     FLOW_STYLE = False
@@ -4,6 +4,7 @@ from src.coilsnake.project_data import ProjectData
 
 class EnemySpriteModule(YMLResourceDataModule):
     NAME = "enemy sprites"
+    DATA = "enemySprites"
     MODULE = "eb.EnemyModule"
     RESOURCE = "enemy_configuration_table"
     
@@ -6,6 +6,7 @@ from src.objects.hotspot import Hotspot
 
 class HotspotModule(YMLResourceDataModule):
     NAME = "hotspots"
+    DATA = "hotspots"
     MODULE = "eb.MiscTablesModule"
     RESOURCE = "map_hotspots"
     FLOW_STYLE = None
@@ -36,6 +37,11 @@ class HotspotModule(YMLResourceDataModule):
                 hotspots.append(Hotspot(id, start, end, comment=comment))
 
         data.hotspots = hotspots
+        data.hotspotGrid.rebuild(hotspots)
+    
+    
+    def restored(data: ProjectData):
+        data.hotspotGrid.rebuild(data.hotspots)
     
     
     def _resourceSave(data: ProjectData):
@@ -5,6 +5,7 @@ from src.objects.changes import MapChange, MapChangeEvent, TileChange
 
 class MapChangesModule(YMLResourceDataModule):
     NAME = "map changes"
+    DATA = "mapChanges"
     MODULE = "eb.MapEventModule"
     RESOURCE = "map_changes"
     FLOW_STYLE = None
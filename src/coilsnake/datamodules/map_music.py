@@ -5,6 +5,7 @@ from src.objects.music import MapMusicEntry, MapMusicHierarchy
 
 class MapMusicModule(YMLResourceDataModule):
     NAME = "map music"
+    DATA = "mapMusic"
     MODULE = "eb.MapMusicModule"
     RESOURCE = "map_music"
     FLOW_STYLE = None
@@ -1,4 +1,5 @@
 from src.coilsnake.datamodules.data_module import YMLResourceDataModule
+from src.coilsnake.datamodules.npcs import NPCModule
 from src.coilsnake.project_data import ProjectData
 from src.misc.coords import EBCoords
 from src.objects.npc import NPCInstance
@@ -6,6 +7,8 @@ from src.objects.npc import NPCInstance
 
 class NPCInstanceModule(YMLResourceDataModule):
     NAME = "NPC instances"
+    DEPENDS = (NPCModule,)
+    DATA = "npcinstances"
     MODULE = "eb.MapSpriteModule"
     RESOURCE = "map_sprites"
     FLOW_STYLE = None
@@ -1,10 +1,13 @@
 from src.coilsnake.datamodules.data_module import YMLResourceDataModule
+from src.coilsnake.datamodules.sprites import SpriteModule
 from src.coilsnake.project_data import ProjectData
 from src.objects.npc import NPC
 
 
 class NPCModule(YMLResourceDataModule):
     NAME = "NPCs"
+    DEPENDS = (SpriteModule,)
+    DATA = "npcs"
     MODULE = ("eb.MiscTablesModule", "eb.ExpandedTablesModule")
     RESOURCE = "npc_config_table"
     FLOW_STYLE = False
@@ -7,6 +7,7 @@ from src.objects.palette_settings import PaletteSettings
 
 class PaletteSettingsModule(YMLResourceDataModule):
     NAME = "palette settings"
+    DATA = "paletteSettings"
     MODULE = "eb.TilesetModule"
     RESOURCE = "map_palette_settings"
     FLOW_STYLE = False
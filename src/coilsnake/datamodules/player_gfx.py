@@ -5,6 +5,7 @@ from src.coilsnake.project_data import ProjectData
 
 class PlayerGFXModule(YMLResourceDataModule):
     NAME = "player character graphics"
+    DATA = "playerSprites"
     MODULE = "eb.MiscTablesModule"
     RESOURCE = "playable_char_gfx_table"
     
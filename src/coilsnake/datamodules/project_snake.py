@@ -9,6 +9,7 @@ from src.coilsnake.resource_manager import openTextResource
 
 class ProjectSnakeModule(DataModule):
     NAME = "Project.snake"
+    DATA = "projectSnake"
     
     def load(data: ProjectData):
         try:
@@ -1,50 +1,72 @@
 import numpy
 
 from src.coilsnake.datamodules.data_module import YMLResourceDataModule
-from src.objects.sector import Sector
+from src.coilsnake.datamodules.tilesets import TilesetModule
+from src.objects.sector import Sector, SectorStore
 from src.coilsnake.project_data import ProjectData
 
 
 class SectorModule(YMLResourceDataModule):
     NAME = "sectors"
+    DEPENDS = (TilesetModule,)
+    DATA = "sectors"
+    EXTRA_DATA = ("sectorStore",)
     MODULE = "eb.MapModule"
     RESOURCE = "map_sectors"
     FLOW_STYLE = False
     
+    # Key: attribute, Value: field in map_sectors.yml
+    FIELDS = {
+        "item": "Item",
+        "music": "Music",
+        "palette": "Palette",
+        "palettegroup": "Tileset", # the "Tileset" field is actually a palette group
+        "setting": "Setting",
+        "teleport": "Teleport",
+        "townmap": "Town Map",
+        "townmaparrow": "Town Map Arrow",
+        "townmapimage": "Town Map Image",
+        "townmapx": "Town Map X",
+        "townmapy": "Town Map Y"
+    }
+    
     def _resourceLoad(data: ProjectData, map_sectors):
-        sectorList = []
-
-        for id, sector in map_sectors.items():
-            # the "Tileset" field is actually a palette group
-            tileset = data.getTilesetFromPaletteGroup(sector["Tileset"])
-
-            sectorList.append(Sector(id, sector["Item"], sector["Music"], sector["Palette"], sector["Tileset"], tileset.id,
-                                        sector["Setting"], sector["Teleport"], sector["Town Map"], sector["Town Map Arrow"],
-                                        sector["Town Map Image"], sector["Town Map X"], sector["Town Map Y"]))
-
-        sectorList = [sectorList[i:i+32] for i in range(0,len(sectorList),32)]
-
-        sectorArray = numpy.array(sectorList, dtype=numpy.object_)
+        ids = numpy.fromiter(map_sectors.keys(), dtype=numpy.int32, count=len(map_sectors))
+        entries = list(map_sectors.values())
         
-        data.sectors = sectorArray
+        store = SectorStore(len(ids))
+        for attribute, field in SectorModule.FIELDS.items():
+            store.columns[attribute][ids] = [i[field] for i in entries]
+        
+        # only look up each palette group's tileset once
+        groups, inverse = numpy.unique(store.columns["palettegroup"], return_inverse=True)
+        tilesets = numpy.array([data.getTilesetFromPaletteGroup(int(i)).id for i in groups], dtype=numpy.int32)
+        store.columns["tileset"][:] = tilesets[inverse.ravel()]
+        
+        sectorArray = numpy.empty(len(ids), dtype=numpy.object_)
+        sectorArray[:] = [Sector.fromStore(store, i) for i in range(len(ids))]
+        
+        data.sectorStore = store
+        data.sectors = sectorArray.reshape(-1, 32)
     
     
     def _resourceSave(data: ProjectData):
+        columns = {field: data.sectorStore.columns[attribute].tolist() for attribute, field in SectorModule.FIELDS.items()}
+        
         sector_yml = {}
-        for column in data.sectors:
-            for s in column:
-                sector_yml[s.id] = {
-                    "Item": s.item,
-                    "Palette": s.palette,
-                    "Town Map X": s.townmapx,
-                    "Town Map Y": s.townmapy,
-                    "Town Map Arrow": s.townmaparrow,
-                    "Music": s.music,
-                    "Setting": s.setting,
-                    "Town Map Image": s.townmapimage,
-                    "Town Map": s.townmap,
-                    "Teleport": s.teleport,
-                    "Tileset": s.palettegroup,
-                }
+        for id in range(len(data.sectorStore)):
+            sector_yml[id] = {
+                "Item": columns["Item"][id],
+                "Palette": columns["Palette"][id],
+                "Town Map X": columns["Town Map X"][id],
+                "Town Map Y": columns["Town Map Y"][id],
+                "Town Map Arrow": columns["Town Map Arrow"][id],
+                "Music": columns["Music"][id],
+                "Setting": columns["Setting"][id],
+                "Town Map Image": columns["Town Map Image"][id],
+                "Town Map": columns["Town Map"][id],
+                "Teleport": columns["Teleport"][id],
+                "Tileset": columns["Tileset"][id],
+            }
         
-        return sector_yml
\ No newline at end of file
+        return sector_yml
@@ -2,21 +2,21 @@ import logging
 import os
 import re
 
-from PIL import Image
-
 from src.coilsnake.datamodules.data_module import YMLResourceDataModule
 from src.coilsnake.project_data import ProjectData
 from src.misc.exceptions import (CoilsnakeResourceNotFoundError,
                                  SubResourceNotFoundError)
-from src.objects.sprite import Sprite
+from src.objects.sprite import SPRITE_SHEETS, Sprite
 
 
 class SpriteModule(YMLResourceDataModule):
     NAME = "sprites"
+    DATA = "sprites"
     MODULE = "eb.SpriteGroupModule"
     RESOURCE = "sprite_groups"
     
     def _resourceLoad(data: ProjectData, sprite_groups):        
+        SPRITE_SHEETS.clear()
         spritesList = []
         for id, spr in sprite_groups.items():
             try:
@@ -34,19 +34,22 @@ class SpriteModule(YMLResourceDataModule):
             # TODO the "2" sizes apparently are coded to ignore collision. Just map collision..?
             # May be relevant.
             size = (int(size[0]), int(size[1]))
-            try:
-                sprImg = Image.open(sprPath).convert("RGBA")
-            except FileNotFoundError as e:
-                raise SubResourceNotFoundError(f"Couldn't find sprite at {sprPath}") from e
+            # the image is only decoded when it's first drawn
+            if not os.path.isfile(sprPath):
+                raise SubResourceNotFoundError(f"Couldn't find sprite at {sprPath}")
             
             spritesList.append(Sprite(id, size, spr["Length"],
                                       (spr["East/West Collision Width"], spr["East/West Collision Height"]),
                                       (spr["North/South Collision Width"], spr["North/South Collision Height"]),
                                       spr["Swim Flags"],
-                                      sprImg))
+                                      sprPath))
             
         data.sprites = spritesList
     
     
+    def restored(data: ProjectData):
+        SPRITE_SHEETS.clear()
+    
+    
     def save(data: ProjectData):
         return # this data is not saved
\ No newline at end of file
@@ -6,6 +6,7 @@ from src.objects.warp import Teleport
 
 class TeleportModule(YMLResourceDataModule):
     NAME = "teleports"
+    DATA = "teleports"
     MODULE = "eb.MiscTablesModule"
     RESOURCE = "psi_teleport_dest_table"
     FLOW_STYLE = None
@@ -16,6 +17,11 @@ class TeleportModule(YMLResourceDataModule):
             teleports.append(Teleport(id, EBCoords.fromWarp(tp["X"], tp["Y"]), tp["Event Flag"], tp["Name"]))
             
         data.teleports = teleports
+        data.teleportGrid.rebuild(teleports)
+    
+    
+    def restored(data: ProjectData):
+        data.teleportGrid.rebuild(data.teleports)
     
     
     def _resourceSave(data: ProjectData):
@@ -1,11 +1,14 @@
 import src.misc.common as common
 from src.coilsnake.datamodules.data_module import DataModule
+from src.coilsnake.datamodules.tilesets import TilesetModule
 from src.coilsnake.project_data import ProjectData
 from src.objects.tile import MapTileGraphic
 
 
 class TileGraphicsModule(DataModule):
     NAME = "tile graphics"
+    DEPENDS = (TilesetModule,)
+    DATA = "tilegfx"
     
     def load(data: ProjectData):
         tilegfx = {}
@@ -4,6 +4,7 @@ import numpy
 
 import src.misc.common as common
 from src.coilsnake.datamodules.data_module import ProjectResourceDataModule
+from src.coilsnake.datamodules.sectors import SectorModule
 from src.coilsnake.project_data import ProjectData
 from src.misc.coords import EBCoords
 from src.objects.tile import MapTile
@@ -11,6 +12,9 @@ from src.objects.tile import MapTile
 
 class TileModule(ProjectResourceDataModule):
     NAME = "tiles"
+    DEPENDS = (SectorModule,)
+    DATA = "tiles"
+    EXTRA_DATA = ("tileIDs",)
     MODULE = "eb.MapModule"
     RESOURCE = "map_tiles"
     
@@ -22,39 +26,30 @@ class TileModule(ProjectResourceDataModule):
         if map_tiles[-1] == ['']:
             del map_tiles[-1] # last newline causes issues, so we do this
 
-        map_tiles = numpy.array(map_tiles)
+        tileIDs = numpy.array([[int(i, 16) for i in r] for r in map_tiles], dtype=numpy.uint16)
+        assert tileIDs.max() < common.MAXTILES, \
+            f"Tile ID {tileIDs.max()} out of range (max {common.MAXTILES-1})."
 
-        iterated = numpy.nditer(map_tiles, flags=["multi_index"])
-
-        for i in iterated: # i dont know anymore lol
-            x = iterated.multi_index[1]
-            y = iterated.multi_index[0]
+        for y, x in numpy.ndindex(tileIDs.shape):
             coords = EBCoords.fromTile(x, y)
             sector = data.getSector(coords)
-            id = int(i.item(), 16)
-            assert id in range(0, common.MAXTILES), \
-                f"Tile ID {id} out of range (max {common.MAXTILES-1})."
             
-            tile = MapTile(id, coords,
+            tile = MapTile(tileIDs, coords,
                             sector.tileset,
                             sector.palettegroup,
                             sector.palette)
             
-            tileArray[iterated.multi_index[0], iterated.multi_index[1]] = tile
+            tileArray[y, x] = tile
 
+        data.tileIDs = tileIDs
         data.tiles = tileArray
 
     
     def _resourceSave(data: ProjectData):
         map = StringIO()
-        for column in data.tiles:
-            for row in column:
-                map.write(hex(row.tile)[2:].zfill(3))
-                map.write(" ")
-
-            offset = map.tell()
-            map.seek(offset-1, 0) # remove extra space at end of each row. can't use .seek(-1, 1) because we aren't in byte mode and i dont wanna figure that out
+        for row in data.tileIDs.tolist():
+            map.write(" ".join(hex(i)[2:].zfill(3) for i in row))
             map.write("\n")
         
         map.seek(0)
-        return map
\ No newline at end of file
+        return map
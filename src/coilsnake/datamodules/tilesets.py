@@ -9,6 +9,7 @@ import src.misc.common as common
 
 class TilesetModule(DataModule):
     NAME = "tilesets"
+    DATA = "tilesets"
     
     def load(data: ProjectData):
         tilesetList = []
@@ -22,6 +23,11 @@ class TilesetModule(DataModule):
         data.tilesets = tilesetList
     
     
+    def restored(data: ProjectData):
+        for i in data.tilesets:
+            i.minitileImageCache.clear()
+    
+    
     def save(data: ProjectData):
         files = []
         
@@ -8,6 +8,7 @@ from src.objects.trigger import (Trigger, TriggerDoor, TriggerEscalator,
 
 class TriggerModule(YMLResourceDataModule):
     NAME = "triggers"
+    DATA = "triggers"
     MODULE = "eb.DoorModule"
     RESOURCE = "map_doors"
     FLOW_STYLE = None
@@ -6,6 +6,7 @@ from src.objects.warp import Warp
 
 class WarpModule(YMLResourceDataModule):
     NAME = "warps"
+    DATA = "warps"
     MODULE = "eb.MiscTablesModule"
     RESOURCE = "teleport_destination_table"
     FLOW_STYLE = None
@@ -20,6 +21,11 @@ class WarpModule(YMLResourceDataModule):
             warps.append(Warp(id, EBCoords.fromWarp(warp["X"], warp["Y"]), warp["Direction"], warp["Warp Style"], warp["Unknown"], comment))
             
         data.warps = warps
+        data.warpGrid.rebuild(warps)
+    
+    
+    def restored(data: ProjectData):
+        data.warpGrid.rebuild(data.warps)
     
     
     def _resourceSave(data: ProjectData):
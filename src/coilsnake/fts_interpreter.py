@@ -1,6 +1,8 @@
-import functools
+import itertools
+from collections import OrderedDict
 
-from PIL import Image, ImageOps
+import numpy
+from PIL import Image
 
 import src.misc.common as common
 from src.misc.exceptions import NotBase32Error, NotHexError
@@ -12,6 +14,7 @@ class FullTileset:
         self.contents = contents
 
         self.id = id
+        self.minitileImageCache = MinitileImageCache()
         self.interpretFTS()
     
     def verify_hex(self, val):
@@ -32,13 +35,40 @@ class FullTileset:
         if mt1 == mt2:
             return
         self.minitiles[mt1], self.minitiles[mt2] = self.minitiles[mt2], self.minitiles[mt1]
+        self.minitileImageCache.invalidateMinitile(mt1)
+        self.minitileImageCache.invalidateMinitile(mt2)
+        # only visit the placements that actually use these minitiles
+        for t, i in self.minitilePlacements[mt1]:
+            t.metadata[i] = t.metadata[i] - mt1 + mt2
+        for t, i in self.minitilePlacements[mt2]:
+            t.metadata[i] = t.metadata[i] - mt2 + mt1
+        # happily we do not need to invalidate the image cache when doing this
+        self.minitilePlacements[mt1], self.minitilePlacements[mt2] = self.minitilePlacements[mt2], self.minitilePlacements[mt1]
+        self.minitileUses[[mt1, mt2]] = self.minitileUses[[mt2, mt1]]
+    
+    def buildMinitileUsage(self):
+        """Count how many tile placements use each minitile. After this, tile arrangements should only be changed through `Tile.setMetadata()` so the counts are kept up to date."""
+        # Index: minitile ID, Value: (tile, placement index) pairs using it
+        self.minitilePlacements: list[set[tuple[Tile, int]]] = [set() for _ in range(common.MAXMINITILES)]
         for t in self.tiles:
-            for i in range(0, 16):
-                if t.getMinitileID(i) == mt1:
-                    t.metadata[i] = t.metadata[i] - mt1 + mt2
-                elif t.getMinitileID(i) == mt2:
-                    t.metadata[i] = t.metadata[i] - mt2 + mt1
-                # happily we do not need to invalidate the image cache when doing this
+            t.fts = self
+            for i, metadata in enumerate(t.metadata):
+                self.minitilePlacements[metadata & 0x3FF].add((t, i))
+        # Index: minitile ID, Value: number of placements using it
+        self.minitileUses = numpy.array([len(i) for i in self.minitilePlacements], dtype=numpy.int32)
+    
+    def updateMinitileUsage(self, tile: "Tile", index: int, old: int, new: int):
+        """Move a tile placement's use from one minitile to another. Called by `Tile.setMetadata()`."""
+        if old == new:
+            return
+        self.minitilePlacements[old].discard((tile, index))
+        self.minitilePlacements[new].add((tile, index))
+        self.minitileUses[old] -= 1
+        self.minitileUses[new] += 1
+    
+    def unusedMinitiles(self) -> list[int]:
+        """Get the IDs of all minitiles not used by any tile."""
+        return numpy.flatnonzero(self.minitileUses == 0).tolist()
     
     def swapTiles(self, t1: int, t2: int):
         if t1 == t2:
@@ -46,6 +76,121 @@ class FullTileset:
         temp = self.tiles[t1]
         self.tiles[t1] = self.tiles[t2]
         self.tiles[t2] = temp
+    
+    def permuteTiles(self, permutation):
+        """Reorder tiles. `permutation` is a sequence of new tile IDs, indexed by old tile ID."""
+        tiles = [None] * len(self.tiles)
+        for old, new in enumerate(permutation):
+            tiles[new] = self.tiles[old]
+        self.tiles[:] = tiles
+    
+    def findDuplicateTiles(self) -> numpy.ndarray:
+        """Find tiles with identical arrangement and collision data.
+
+        Returns:
+            numpy.ndarray: for each tile ID, the lowest tile ID with the same data (itself if it has no earlier duplicate)
+        """
+        rows = numpy.array([t.metadata + t.collision for t in self.tiles], dtype=numpy.uint16)
+        first: dict[bytes, int] = {}
+        table = numpy.arange(len(self.tiles), dtype=numpy.uint16)
+        for id, row in enumerate(rows):
+            table[id] = first.setdefault(row.tobytes(), id)
+        return table
+    
+    def minitileBitmaps(self) -> numpy.ndarray:
+        """Get the bitmaps of all minitiles as an array of shape (minitile, layer, y, x). Layer 0 is the background, layer 1 is the foreground."""
+        return numpy.array([(m.background, m.foreground) for m in self.minitiles], dtype=numpy.uint8).reshape(-1, 2, 8, 8)
+    
+    def minitileArray(self, id: int, subpalette: "Subpalette") -> numpy.ndarray:
+        """Get the pixels of a minitile, foreground layered on background. Cached, so don't modify the result.
+
+        Args:
+            id (int): minitile ID
+            subpalette (Subpalette): subpalette to render with
+
+        Returns:
+            numpy.ndarray: RGBA pixels of shape (y, x, 4)
+        """
+        key = (id, subpalette.version)
+        pixels = self.minitileImageCache.get(key)
+        if pixels is None:
+            pixels = self.renderMinitiles(subpalette, [id])[0]
+            self.minitileImageCache.put(key, pixels)
+        return pixels
+    
+    def invalidateMinitileImage(self, minitile: "Minitile|int"):
+        """Drop cached images of a minitile after its graphics change. Does nothing if the minitile isn't in this tileset."""
+        if isinstance(minitile, Minitile):
+            try:
+                minitile = next(id for id, i in enumerate(self.minitiles) if i is minitile)
+            except StopIteration:
+                return
+        self.minitileImageCache.invalidateMinitile(minitile)
+    
+    def renderMinitiles(self, subpalette: "Subpalette", ids: list[int]|None=None, fgOnly: bool=False, bgOnly: bool=False) -> numpy.ndarray:
+        """Render minitiles, foreground layered on background, in one pass.
+
+        Args:
+            subpalette (Subpalette): subpalette to render with
+            ids (list[int] | None, optional): minitile IDs to render. Defaults to None (all of them).
+            fgOnly (bool, optional): render just the foreground. Defaults to False.
+            bgOnly (bool, optional): render just the background. Defaults to False.
+
+        Returns:
+            numpy.ndarray: RGBA pixels of shape (minitile, y, x, 4)
+        """
+        if ids is None:
+            bitmaps = self.minitileBitmaps()
+        else:
+            bitmaps = numpy.array([(self.minitiles[i].background, self.minitiles[i].foreground) for i in ids], dtype=numpy.uint8).reshape(-1, 2, 8, 8)
+        
+        colours = subpalette.toArray()
+        background = colours[bitmaps[:, 0]]
+        background[..., 3] = 255 # bg tiles cannot have alpha
+        if bgOnly:
+            return background
+        foreground = colours[bitmaps[:, 1]]
+        if fgOnly:
+            return foreground
+        return numpy.where(foreground[..., 3:] != 0, foreground, background)
+    
+    def arrangementArray(self) -> numpy.ndarray:
+        """Get the placement metadata of all tiles as an array of shape (tile, placement)."""
+        return numpy.array([t.metadata for t in self.tiles], dtype=numpy.uint16)
+
+    def collisionArray(self) -> numpy.ndarray:
+        """Get the collision of all tiles as an array of shape (tile, y, x), for each 8x8 area."""
+        return numpy.array([t.collision for t in self.tiles], dtype=numpy.uint8).reshape(-1, 4, 4)
+
+    def findDuplicateMinitiles(self, includeFlipped: bool=True) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Find minitiles with identical graphics (in both layers) to an earlier minitile, optionally if either is flipped.
+
+        Args:
+            includeFlipped (bool, optional): Also match minitiles that are flipped copies of each other. Defaults to True.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: for each minitile ID, the lowest minitile ID with the same graphics (itself if it has no earlier duplicate), \
+                and the metadata flip bits (0x4000 horizontal, 0x8000 vertical) to apply to that minitile to get the same image.
+        """
+        bitmaps = self.minitileBitmaps()
+        canonical = numpy.arange(len(bitmaps), dtype=numpy.uint16)
+        flips = numpy.zeros(len(bitmaps), dtype=numpy.uint16)
+        
+        # Key: bitmap bytes, Value: (minitile ID, flip bits that produce this bitmap from it)
+        index: dict[bytes, tuple[int, int]] = {}
+        for id, bitmap in enumerate(bitmaps):
+            key = bitmap.tobytes()
+            if key in index:
+                canonical[id], flips[id] = index[key]
+                continue
+            
+            index[key] = (id, 0)
+            if includeFlipped:
+                index.setdefault(bitmap[:, :, ::-1].tobytes(), (id, 0x4000))
+                index.setdefault(bitmap[:, ::-1, :].tobytes(), (id, 0x8000))
+                index.setdefault(bitmap[:, ::-1, ::-1].tobytes(), (id, 0xC000))
+        
+        return canonical, flips
             
     def getPaletteGroup(self, groupID):
         """From a palette group ID, get a PaletteGroup object"""
@@ -144,6 +289,60 @@ class FullTileset:
         self.palettes: list[Palette] = self.interpretPalettes(self.contents)
         self.paletteGroups: list[PaletteGroup] = self.buildPaletteGroups()
         self.tiles: list[Tile] = self.interpretTiles(self.contents)
+        self.buildMinitileUsage()
+
+
+class MinitileImageCache:
+    """Bounded least-recently-used cache of minitile images for one tileset.
+    Keyed by (minitile ID, subpalette content version), so colour edits don't need to invalidate anything - old entries just stop being used and age out."""
+    DEFAULT_SIZE = 2048
+    
+    def __init__(self, maxsize: int=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._images: OrderedDict[tuple[int, int], numpy.ndarray] = OrderedDict()
+        # Index: minitile ID, Value: keys of cached images of it
+        self._keysByMinitile: dict[int, set[tuple[int, int]]] = {}
+    
+    def get(self, key: tuple[int, int]) -> numpy.ndarray|None:
+        pixels = self._images.get(key)
+        if pixels is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._images.move_to_end(key)
+        return pixels
+    
+    def put(self, key: tuple[int, int], pixels: numpy.ndarray):
+        self._images[key] = pixels
+        self._images.move_to_end(key)
+        self._keysByMinitile.setdefault(key[0], set()).add(key)
+        self._evict()
+    
+    def invalidateMinitile(self, id: int):
+        for key in self._keysByMinitile.pop(id, ()):
+            del self._images[key]
+    
+    def clear(self):
+        self._images.clear()
+        self._keysByMinitile.clear()
+    
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        self._evict()
+    
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._images), "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses}
+    
+    def _evict(self):
+        while len(self._images) > self.maxsize:
+            key, _ = self._images.popitem(last=False)
+            keys = self._keysByMinitile[key[0]]
+            keys.discard(key)
+            if not keys:
+                del self._keysByMinitile[key[0]]
 
 
 class PaletteGroup:
@@ -186,13 +385,32 @@ class Subpalette:
     """A single subpalette in an .fts file
     ### Parameters
         `subpalette` - raw subpalette from an .fts file palette"""
+    # versions are unique across all subpalettes, so they can key caches shared between them
+    _versions = itertools.count()
+    
     def __init__(self, subpalette):
         self.subpaletteRGBA: list[tuple[int, int, int, int]] = []
+        # changes whenever the colours do
+        self.version = next(Subpalette._versions)
 
         for entry in range(16):  # create RGBA list too
             if entry == 0: self.subpaletteRGBA.append((int(str(subpalette[entry][0]), 32)*8, int(str(subpalette[entry][1]), 32)*8, int(str(subpalette[entry][2]), 32)*8, 0)) # alpha channel = 0 for first colour
             else: self.subpaletteRGBA.append((int(str(subpalette[entry][0]), 32)*8, int(str(subpalette[entry][1]), 32)*8, int(str(subpalette[entry][2]), 32)*8, 255)) # R, G, B out of base 32 + A
 
+    def setColour(self, index: int, colour: tuple[int, int, int, int]):
+        """Set an RGBA colour of this subpalette"""
+        self.subpaletteRGBA[index] = colour
+        self.version = next(Subpalette._versions)
+    
+    def __setstate__(self, state: dict):
+        # versions from another process (such as a project snapshot) could match ones already used in this one
+        self.__dict__.update(state)
+        self.version = next(Subpalette._versions)
+    
+    def toArray(self) -> numpy.ndarray:
+        """Get the colours of this subpalette as an RGBA array of shape (16, 4)."""
+        return numpy.array(self.subpaletteRGBA, dtype=numpy.uint8)
+
     def toRaw(self):
         raw = ""
         for i in self.subpaletteRGBA:               
@@ -211,6 +429,8 @@ class Tile:
         # make the proper data
         self.metadata = []
         self.collision = []
+        # the tileset this tile belongs to, which tracks minitile usage
+        self.fts: FullTileset|None = None
 
         for i in range(0, 96, 6):
             self.metadata.append(int(self.tile[i] + self.tile[i+1] + self.tile[i+2] + self.tile[i+3], 16))
@@ -221,6 +441,13 @@ class Tile:
         return self.metadata[id]
         # We will extract the actual metadata in the other functions - see below
     
+    def setMetadata(self, id, metadata):
+        """Set the SNES metadata of a given minitile placement in a tile"""
+        old = self.metadata[id]
+        self.metadata[id] = metadata
+        if self.fts:
+            self.fts.updateMinitileUsage(self, id, old & 0x3FF, metadata & 0x3FF)
+    
     def getMinitileID(self, id):
         """Get minitile ID from placement metadata"""
         metadata = self.getMetadata(id)
@@ -269,36 +496,33 @@ class Tile:
             build.append(subbuild)
         return build
     
-    def toImage(self, palette: Palette, fts: FullTileset, fgOnly=False, bgOnly=False):
-        """Convert to a PIL Image"""
+    def toArray(self, palette: Palette, fts: FullTileset, fgOnly=False, bgOnly=False) -> numpy.ndarray:
+        """Render to an RGBA array of shape (32, 32, 4)"""
         # seems a little weird to pass the entire fts file, but it means we can cache it, which is significantly better for performance..!
-        if fgOnly:
-            img = Image.new("RGBA", (32, 32))
-        else: img = Image.new("RGB", (32, 32))
+        tile = numpy.empty((32, 32, 4), dtype=numpy.uint8)
         
-        x = 0
-        y = 0
-        for id, subpalette, hflip, vflip, collision in self.getMinitileDataList():
-            if fgOnly:
-                minitile = fts.minitiles[id].ForegroundToImage(palette.subpalettes[subpalette])
-            elif bgOnly:
-                minitile = fts.minitiles[id].BackgroundToImage(palette.subpalettes[subpalette])
+        for i, (id, subpalette, hflip, vflip, collision) in enumerate(self.getMinitileDataList()):
+            if fgOnly or bgOnly:
+                minitile = fts.renderMinitiles(palette.subpalettes[subpalette], [id], fgOnly, bgOnly)[0]
             else:
-                minitile = fts.minitiles[id].BothToImage(palette.subpalettes[subpalette])
-            
-            if x == 32:
-                x = 0
-                y += 8
+                minitile = fts.minitileArray(id, palette.subpalettes[subpalette])
 
             if hflip:
-                minitile = ImageOps.mirror(minitile)
+                minitile = minitile[:, ::-1]
             if vflip:
-                minitile = ImageOps.flip(minitile)
-            img.paste(minitile, (x, y))
-
-            x += 8
+                minitile = minitile[::-1]
+            
+            y, x = divmod(i, 4)
+            tile[y*8:y*8+8, x*8:x*8+8] = minitile
         
-        return img
+        return tile
+    
+    def toImage(self, palette: Palette, fts: FullTileset, fgOnly=False, bgOnly=False):
+        """Convert to a PIL Image"""
+        img = Image.fromarray(self.toArray(palette, fts, fgOnly, bgOnly), "RGBA")
+        if fgOnly:
+            return img
+        return img.convert("RGB")
 
     def toRaw(self):
         raw = ""
@@ -315,67 +539,6 @@ class Minitile:
         self.background = background
         self.foreground = foreground
 
-    # @functools.lru_cache(maxsize=5000)
-    def mapIndexToRGBABackground(self, subpalette: Subpalette):
-        RGBAbuild = []
-        for i in self.background:
-            value = subpalette.subpaletteRGBA[i]
-            if value[3] == 0: # bg tiles cannot have alpha
-                # TODO verify this behavior. Does it do something weird like make it subpalette 0's first colour?
-                value = (value[0], value[1], value[2], 255)
-                
-            RGBAbuild.append(value)
-        
-        return RGBAbuild
-    
-    # @functools.lru_cache(maxsize=5000)
-    def mapIndexToRGBAForeground(self, subpalette: Subpalette):
-        RGBAbuild = []
-        for i in self.foreground:
-            RGBAbuild.append(subpalette.subpaletteRGBA[i])
-
-        return RGBAbuild
-        
-    def BackgroundToImage(self, subpalette):
-        """Convert raw bitmap graphics to a usable PIL Image.\n
-        Just the background.
-        ### Params
-            `subpalette` - a Subpalette object
-        ### Returns
-            `img` - a PIL Image"""
-        
-        img = Image.new("RGBA", (8, 8))
-        img.putdata(self.mapIndexToRGBABackground(subpalette))
-        return img
-
-
-    def ForegroundToImage(self, subpalette):
-        """Convert raw bitmap graphics to a usable PIL Image.\n
-        Just the foreground.
-        ### Params
-            `subpalette` - a Subpalette object
-        ### Returns
-            `img` - a PIL Image"""
-        
-        img = Image.new("RGBA", (8, 8))
-        img.putdata(self.mapIndexToRGBAForeground(subpalette))
-        return img
-    
-    @functools.lru_cache(maxsize=5000)
-    def BothToImage(self, subpalette):
-        """Convert raw bitmap graphics to a usable PIL Image.\n
-        Foreground layers on background.
-        ### Params
-            `subpalette` - a Subpalette object
-        ### Returns
-            `img` - a PIL Image"""
-        
-        img = Image.new("RGBA", (8, 8))
-        img.putdata(self.mapIndexToRGBABackground(subpalette))
-        fg = self.ForegroundToImage(subpalette)
-        img.paste(fg, (0, 0), fg)
-        return img
-    
     def bgToRaw(self):
         raw = ""
         for i in range(0, 64):
@@ -0,0 +1,131 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import numpy
+
+if TYPE_CHECKING:
+    from src.coilsnake.project_data import ProjectData
+
+REPORT_PATH: str|None = None
+"""Where to write the JSON report of the last load and save. Set by --profile-io"""
+
+_current = threading.local()
+
+
+class ModuleProfile:
+    """Where the time of loading or saving one data module went"""
+    def __init__(self, name: str):
+        self.name = name
+        self.wallTime = 0.0
+        self.cpuTime = 0.0
+        self.bytes = 0
+        self.objects: int|None = None
+        self.files: list[str] = []
+        self.restored = False
+
+    def toDict(self) -> dict:
+        return {"module": self.name,
+                "wall_time": round(self.wallTime, 6),
+                "cpu_time": round(self.cpuTime, 6),
+                "bytes": self.bytes,
+                "objects": self.objects,
+                "restored": self.restored}
+
+
+class IOProfile:
+    """Timings, bytes read or written and object counts of each data module over one project load or save"""
+    def __init__(self, operation: str):
+        """
+        Args:
+            operation (str): "load" or "save"
+        """
+        self.operation = operation
+        self.modules: list[ModuleProfile] = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.wallTime = 0.0
+
+    @contextlib.contextmanager
+    def record(self, module, projectData: "ProjectData"):
+        """Record a data module's load or save, done inside this context. Safe to use from several threads at once.
+
+        Args:
+            module (type[DataModule]): the module
+            projectData (ProjectData): the project being loaded or saved
+
+        Yields:
+            ModuleProfile: the module's profile
+        """
+        profile = ModuleProfile(module.NAME)
+        _current.profile = profile
+        wall = time.perf_counter()
+        # per thread, as other modules may be loading at the same time
+        cpu = time.thread_time()
+        try:
+            yield profile
+        finally:
+            profile.cpuTime = time.thread_time() - cpu
+            profile.wallTime = time.perf_counter() - wall
+            _current.profile = None
+            profile.objects = countObjects(projectData, module.DATA)
+            with self._lock:
+                self.modules.append(profile)
+
+    def finish(self):
+        """Record the total time, then log the report and write it to REPORT_PATH if set"""
+        self.wallTime = time.perf_counter() - self._start
+        logging.info(self.report())
+
+        if REPORT_PATH:
+            try:
+                with open(REPORT_PATH, "r", encoding="utf-8") as file:
+                    reports = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                reports = {}
+            reports[self.operation] = self.toDict()
+            with open(REPORT_PATH, "w", encoding="utf-8") as file:
+                json.dump(reports, file, indent=2)
+
+    def toDict(self) -> dict:
+        return {"wall_time": round(self.wallTime, 6),
+                "modules": [i.toDict() for i in self.modules]}
+
+    def report(self) -> str:
+        """Get the profile as a table, slowest module first"""
+        lines = [f"Project {self.operation} took {self.wallTime:.3f}s",
+                 f"{'module':<28}{'wall (s)':>10}{'cpu (s)':>10}{'bytes':>12}{'objects':>10}"]
+        for i in sorted(self.modules, key=lambda i: i.wallTime, reverse=True):
+            objects = "" if i.objects is None else i.objects
+            name = f"{i.name} (snapshot)" if i.restored else i.name
+            lines.append(f"{name:<28}{i.wallTime:>10.3f}{i.cpuTime:>10.3f}{i.bytes:>12}{objects:>10}")
+        return "\n".join(lines)
+
+
+def countFile(path: str):
+    """Count a file towards the bytes read or written by the data module running on this thread, and remember it was used.
+    Call once the file is closed, so written files have their final size."""
+    profile: ModuleProfile|None = getattr(_current, "profile", None)
+    if profile:
+        profile.files.append(path)
+        try:
+            profile.bytes += os.path.getsize(path)
+        except OSError:
+            pass
+
+
+def countObjects(projectData: "ProjectData", attribute: str) -> int|None:
+    """Count the objects in a ProjectData attribute filled by a data module, if it has one"""
+    if not attribute:
+        return None
+    data = getattr(projectData, attribute)
+    if isinstance(data, numpy.ndarray):
+        return int(data.size)
+    try:
+        return len(data)
+    except TypeError:
+        return None
@@ -1,24 +1,111 @@
 import logging
 import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 from src.coilsnake.datamodules import MODULES
+from src.coilsnake.datamodules.data_module import DataModule
+from src.coilsnake.datamodules.project_snake import ProjectSnakeModule
+from src.coilsnake.io_profile import IOProfile, ModuleProfile
 from src.coilsnake.project_data import ProjectData
+from src.coilsnake.snapshot import ProjectSnapshot
 from src.misc.worker import Worker
 
 
+def loadModule(module: type[DataModule], projectData: ProjectData, profile: IOProfile,
+               snapshot: ProjectSnapshot|None, restore: bool) -> ModuleProfile:
+    with profile.record(module, projectData) as record:
+        record.restored = restore and snapshot.restore(module)
+        if not record.restored:
+            module.load(projectData)
+    return record
+
+
+def loadModules(worker: Worker, projectData: ProjectData, modules: tuple[type[DataModule], ...], profile: IOProfile,
+                snapshot: ProjectSnapshot|None = None) -> dict[type[DataModule], ModuleProfile]:
+    """Load data modules as soon as the modules they depend on are loaded, several at a time
+
+    Args:
+        worker (Worker): worker to report progress to
+        projectData (ProjectData): the project to load into
+        modules (tuple[type[DataModule], ...]): the modules to load. Must include all of their dependencies
+        profile (IOProfile): profile to record the modules in
+        snapshot (ProjectSnapshot, optional): restore modules from this where possible. Defaults to None.
+
+    Returns:
+        dict[type[DataModule], ModuleProfile]: the profile of each module
+    """
+    waiting = {m: set(m.DEPENDS) for m in modules}
+    for m, depends in waiting.items():
+        if not depends <= waiting.keys():
+            raise ValueError(f"{m.NAME} depends on modules that aren't loaded: {', '.join(d.NAME for d in depends - waiting.keys())}")
+
+    running: dict[Future, type[DataModule]] = {}
+    records: dict[type[DataModule], ModuleProfile] = {}
+    # only restore a module if everything it was made from was restored too
+    restored: set[type[DataModule]] = set()
+
+    # the modules don't share anything other than ProjectData, and each one only fills its own part of it
+    with ThreadPoolExecutor(thread_name_prefix="ebme-load") as pool:
+        try:
+            while waiting or running:
+                for m in [m for m, depends in waiting.items() if not depends]:
+                    del waiting[m]
+                    restore = snapshot is not None and restored.issuperset(m.DEPENDS)
+                    running[pool.submit(loadModule, m, projectData, profile, snapshot, restore)] = m
+
+                if not running:
+                    raise ValueError(f"Modules depend on each other: {', '.join(m.NAME for m in waiting)}")
+
+                worker.updates.emit(f"Loading {', '.join(m.NAME for m in running.values())}... ({len(records)}/{len(modules)})")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    module = running.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        worker.returns.emit({"title": f"Failed to load {module.NAME}.",
+                                             "text": f"Could not load {module.NAME}.",
+                                             "info": f"{type(e).__name__}: {str(e)}"})
+                        raise
+
+                    records[module] = record
+                    if record.restored:
+                        restored.add(module)
+                    for depends in waiting.values():
+                        depends.discard(module)
+        finally:
+            for future in running:
+                future.cancel()
+
+    return records
+
+
 def readDirectory(worker: Worker, dir):
-    try:            
-        projectData = ProjectData(dir)        
-        for module in MODULES:
-            try:
-                worker.updates.emit(f"Loading {module.NAME}...")
-                module.load(projectData)
-            except Exception as e:
-                worker.returns.emit({"title": f"Failed to load {module.NAME}.",
-                                     "text": f"Could not load {module.NAME}.",
-                                     "info": f"{type(e).__name__}: {str(e)}"})
-                raise
+    try:
+        projectData = ProjectData(dir)
+        profile = IOProfile("load")
+        snapshot = ProjectSnapshot(projectData)
+        # every other module finds its resources through Project.snake
+        try:
+            worker.updates.emit(f"Loading {ProjectSnakeModule.NAME}...")
+            with profile.record(ProjectSnakeModule, projectData):
+                ProjectSnakeModule.load(projectData)
+        except Exception as e:
+            worker.returns.emit({"title": f"Failed to load {ProjectSnakeModule.NAME}.",
+                                 "text": f"Could not load {ProjectSnakeModule.NAME}.",
+                                 "info": f"{type(e).__name__}: {str(e)}"})
+            raise
+
+        records = loadModules(worker, projectData, tuple(m for m in MODULES if m is not ProjectSnakeModule), profile, snapshot)
         
+        # before the project is handed over and starts changing
+        worker.updates.emit("Saving project snapshot...")
+        for module, record in records.items():
+            if not record.restored:
+                snapshot.store(module, record.files)
+
+        profile.finish()
         logging.info(f"Successfully loaded project at {projectData.dir}")
         worker.returns.emit(projectData)
 
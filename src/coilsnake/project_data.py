@@ -1,27 +1,42 @@
 import os
-from typing import Literal
+from typing import Iterable, Literal
 from uuid import UUID
 
 import numpy
-from PIL import ImageQt
+from PySide6.QtGui import QPixmap
 
 import src.misc.common as common
 from src.coilsnake.fts_interpreter import FullTileset
 from src.misc.coords import EBCoords
 from src.misc.exceptions import CoilsnakeResourceNotFoundError
+from src.misc.spatial import SpatialGrid
 from src.objects.changes import MapChange
 from src.objects.enemy import EnemyGroup, EnemyMapGroup, EnemyTile
 from src.objects.hotspot import Hotspot
 from src.objects.music import MapMusicHierarchy
 from src.objects.npc import NPC, NPCInstance
 from src.objects.palette_settings import PaletteSettings
-from src.objects.sector import Sector
+from src.objects.sector import Sector, SectorStore
 from src.objects.sprite import BattleSprite, Sprite
 from src.objects.tile import MapTile, MapTileGraphic
 from src.objects.trigger import Trigger
 from src.objects.warp import Teleport, Warp
 
 
+# bounds of map objects for SpatialGrid, in pixels (inclusive)
+def npcInstanceBounds(instance: NPCInstance) -> tuple[int, int, int, int]:
+    return instance.coords.x, instance.coords.y, instance.coords.x, instance.coords.y
+
+def triggerBounds(trigger: Trigger) -> tuple[int, int, int, int]:
+    return trigger.coords.x, trigger.coords.y, trigger.coords.x+7, trigger.coords.y+7
+
+def hotspotBounds(hotspot: Hotspot) -> tuple[int, int, int, int]:
+    return hotspot.start.x, hotspot.start.y, hotspot.end.x, hotspot.end.y
+
+def warpBounds(warp: Warp|Teleport) -> tuple[int, int, int, int]:
+    return warp.dest.x, warp.dest.y, warp.dest.x+7, warp.dest.y+7
+
+
 class ProjectData():
     """Container for loaded project data"""
     def __init__(self, directory: str):
@@ -31,12 +46,12 @@ class ProjectData():
         self.tilesets: list[FullTileset] = []
         self.paletteSettings: dict[int, dict[int, PaletteSettings]] = {}
         self.sectors: numpy.ndarray[Sector] = []
+        self.sectorStore: SectorStore = SectorStore(0) # sector attributes. Sectors are views of this
         self.tiles: numpy.ndarray[MapTile] = []
+        self.tileIDs: numpy.ndarray = [] # uint16, same shape as tiles. MapTiles are views of this
         self.tilegfx: dict[int, dict[str, dict[int, MapTileGraphic]]] = {}
         self.npcs: list[NPC] = []
-        self.npcinstances: list[NPCInstance] = []
         self.sprites: list[Sprite] = []
-        self.triggers: list[Trigger] = []
         self.enemyPlacements: numpy.ndarray[EnemyTile] = []
         self.enemyMapGroups: list[EnemyMapGroup] = []
         self.enemyGroups: list[EnemyGroup] = []
@@ -49,8 +64,25 @@ class ProjectData():
         self.mapChanges: list[MapChange] = []
         self.playerSprites: dict[common.PLAYERSPRITES, int] = {}
         
-        self._ripple_small: ImageQt.ImageQt = None
-        self._ripple_large: ImageQt.ImageQt = None
+        self._ripple_small: Sprite = None
+        self._ripple_large: Sprite = None
+        
+        # NPC instances and triggers, in the order they were added, so removing one doesn't need a search.
+        # Lookups kept up to date by add/remove/setNPCInstanceNPC
+        self._npcInstancesByUUID: dict[UUID, NPCInstance] = {}
+        self._npcInstancesByNPCID: dict[int, dict[UUID, NPCInstance]] = {}
+        self._triggersByUUID: dict[UUID, Trigger] = {}
+        
+        # groups of adjacent sectors with the same tileset, palette group and palette.
+        # Made when first needed; reset by updateSectorKey
+        self._sectorLabels: numpy.ndarray|None = None
+        
+        # where map objects are. Moving an object requires updating its grid
+        self.npcInstanceGrid: SpatialGrid[NPCInstance] = SpatialGrid(npcInstanceBounds)
+        self.triggerGrid: SpatialGrid[Trigger] = SpatialGrid(triggerBounds)
+        self.hotspotGrid: SpatialGrid[Hotspot] = SpatialGrid(hotspotBounds)
+        self.warpGrid: SpatialGrid[Warp] = SpatialGrid(warpBounds)
+        self.teleportGrid: SpatialGrid[Teleport] = SpatialGrid(warpBounds)
         
 
     def getResourcePath(self, module: Literal[
@@ -128,11 +160,38 @@ class ProjectData():
                 for pg in t.keys():
                     t[pg] = {}
                             
+    def permuteTileGraphicsCache(self, tileset: int, permutation: numpy.ndarray):
+        """Move cached tile graphics to follow a reordering of a tileset's tiles, so they don't need to be rendered again.
+
+        Args:
+            tileset (int): the tileset that was reordered
+            permutation (numpy.ndarray): new tile ID, indexed by old tile ID
+        """
+        for pg, graphics in self.tilegfx[tileset].items():
+            permuted = {}
+            for tile, gfx in graphics.items():
+                gfx.tile = int(permutation[tile])
+                permuted[gfx.tile] = gfx
+            self.tilegfx[tileset][pg] = permuted
+    
+    def tilesetMask(self, tileset: int) -> numpy.ndarray:
+        """Get a boolean array the shape of `tileIDs`, True where the tile is in a sector using this tileset."""
+        sectorTilesets = self.sectorStore.columns["tileset"].reshape(self.sectors.shape)
+        # sectors are 8 tiles wide and 4 tiles tall
+        return (sectorTilesets == tileset).repeat(4, axis=0).repeat(8, axis=1)
+
+    def usedTiles(self, tileset: int) -> numpy.ndarray:
+        """Get a boolean array of which of a tileset's tiles are used, either on the map or by map changes."""
+        used = numpy.zeros(common.MAXTILES, dtype=numpy.bool_)
+        used[self.tileIDs[self.tilesetMask(tileset)]] = True
+        used[list(self.mapChanges[tileset].usedTiles())] = True
+        return used
+                            
     # other things
-    def getRipple(self, sprite: Sprite):
+    def getRipple(self, sprite: Sprite) -> QPixmap:
         if sprite.size[0] != 16: # apparently vanilla behaviour? See $C0AC43
-            return self._ripple_large
-        return self._ripple_small
+            return self._ripple_large.renderFacingPixmap(0, 0)
+        return self._ripple_small.renderFacingPixmap(0, 0)
                             
     # project getters
     def getProjectVersion(self) -> int:
@@ -198,30 +257,129 @@ class ProjectData():
         
         return above, right, below, left
 
-    def adjacentMatchingSectors(self, sector: Sector, selected: list = []) -> list[Sector]:
-        """Recursively get matching adjacent sectors
+    def sectorsWhere(self, **attributes) -> list[Sector]:
+        """Find sectors by their attributes, such as `sectorsWhere(palettegroup=5, palette=2)`
+
+        Returns:
+            list[Sector]: the sectors where every given attribute matches, in ID order
+        """
+        return list(self.sectors.ravel()[self.sectorStore.where(**attributes)])
+
+    def sectorKeys(self) -> numpy.ndarray:
+        """Get the tileset, palette group and palette of every sector as an array of shape (y, x, 3).
+        After changing any of these on a sector, call `updateSectorKey()`."""
+        columns = self.sectorStore.columns
+        return numpy.stack((columns["tileset"], columns["palettegroup"], columns["palette"]),
+                           axis=-1).reshape(*self.sectors.shape, 3)
+    
+    def updateSectorKey(self, sector: Sector):
+        """Update the sector lookups after a sector's tileset, palette group or palette changes"""
+        self._sectorLabels = None
+    
+    def sectorLabels(self) -> numpy.ndarray:
+        """Label the groups of adjacent sectors with the same tileset, palette group and palette.
+
+        Returns:
+            numpy.ndarray: array the shape of `sectors`. Sectors in the same group have the same label
+        """
+        if self._sectorLabels is None:
+            keys = self.sectorKeys()
+            h, w = keys.shape[:2]
+            matchesRight = (keys[:, 1:] == keys[:, :-1]).all(axis=2)
+            matchesBelow = (keys[1:] == keys[:-1]).all(axis=2)
+            
+            # start with every sector labelled by its own index, then spread the smallest label through each group.
+            # labels are always the index of a sector in the same group, so they can also be followed to skip ahead
+            none = h*w
+            labels = numpy.arange(h*w).reshape(h, w)
+            while True:
+                new = labels.copy()
+                new[:, 1:] = numpy.minimum(new[:, 1:], numpy.where(matchesRight, labels[:, :-1], none))
+                new[:, :-1] = numpy.minimum(new[:, :-1], numpy.where(matchesRight, labels[:, 1:], none))
+                new[1:] = numpy.minimum(new[1:], numpy.where(matchesBelow, labels[:-1], none))
+                new[:-1] = numpy.minimum(new[:-1], numpy.where(matchesBelow, labels[1:], none))
+                new = new.ravel()[new]
+                if (new == labels).all():
+                    break
+                labels = new
+            self._sectorLabels = labels
+        return self._sectorLabels
+    
+    def matchingSectorMask(self, sector: Sector) -> numpy.ndarray:
+        """Get the sectors connected to this one that have the same tileset, palette group and palette.
 
         Args:
             sector (Sector): the root sector
 
         Returns:
-            list[Sector]: list of all valid sectors
+            numpy.ndarray: boolean array the shape of `sectors`, True where the sector matches
         """
-        
-        selected.append(sector)
-        
-        above, right, below, left = self.adjacentSectors(sector)
-        
-        for i in [above, right, below, left]:
-            if (i and not i in selected and 
-                i.tileset == sector.tileset and
-                i.palettegroup == sector.palettegroup
-                and i.palette == sector.palette):
-                selected.append(i)
-                
-                selected = self.adjacentMatchingSectors(i, selected)
-                
-        return list(set(selected)) # ensure no duplicates
+        labels = self.sectorLabels()
+        x, y = sector.coords.coordsSector()
+        return labels == labels[y, x]
+    
+    def adjacentMatchingSectors(self, sector: Sector) -> list[Sector]:
+        """Get the sectors connected to this one that have the same tileset, palette group and palette.
+
+        Args:
+            sector (Sector): the root sector
+
+        Returns:
+            list[Sector]: list of all valid sectors, including the root
+        """
+        return list(self.sectors[self.matchingSectorMask(sector)])
+
+    @property
+    def npcinstances(self) -> tuple[NPCInstance, ...]:
+        """All NPC instances on the map, in the order they were added. Use add/removeNPCInstance to change them"""
+        return tuple(self._npcInstancesByUUID.values())
+    
+    @npcinstances.setter
+    def npcinstances(self, instances: Iterable[NPCInstance]):
+        # replaces all of them, so rebuild the lookups from scratch
+        self._npcInstancesByUUID = {i.uuid: i for i in instances}
+        self._npcInstancesByNPCID = {}
+        self.npcInstanceGrid.rebuild(self._npcInstancesByUUID.values())
+        for i in self._npcInstancesByUUID.values():
+            self._npcInstancesByNPCID.setdefault(i.npcID, {})[i.uuid] = i
+
+    def addNPCInstance(self, instance: NPCInstance) -> bool:
+        """Add an NPCInstance to the map
+
+        Args:
+            instance (NPCInstance): the instance to add
+
+        Returns:
+            bool: False if it was already on the map
+        """
+        if instance.uuid in self._npcInstancesByUUID:
+            return False
+        self._npcInstancesByUUID[instance.uuid] = instance
+        self._npcInstancesByNPCID.setdefault(instance.npcID, {})[instance.uuid] = instance
+        self.npcInstanceGrid.insert(instance)
+        return True
+
+    def removeNPCInstance(self, instance: NPCInstance):
+        """Remove an NPCInstance from the map
+
+        Args:
+            instance (NPCInstance): the instance to remove
+        """
+        self._npcInstancesByUUID.pop(instance.uuid)
+        self._npcInstancesByNPCID[instance.npcID].pop(instance.uuid)
+        self.npcInstanceGrid.remove(instance)
+
+    def setNPCInstanceNPC(self, instance: NPCInstance, id: int):
+        """Change which NPC an NPCInstance uses
+
+        Args:
+            instance (NPCInstance): the instance
+            id (int): the new NPC ID
+        """
+        if instance.uuid in self._npcInstancesByUUID:
+            self._npcInstancesByNPCID[instance.npcID].pop(instance.uuid)
+            self._npcInstancesByNPCID.setdefault(id, {})[instance.uuid] = instance
+        instance.npcID = id
 
     def npcInstanceFromUUID(self, uuid: UUID) -> NPCInstance:
         """Get an NPCInstance by UUID
@@ -232,9 +390,8 @@ class ProjectData():
         Returns:
             NPCInstance: the matching NPCInstance
         """
-        for i in self.npcinstances:
-            if i.uuid == uuid:
-                return i
+        return self._npcInstancesByUUID.get(uuid)
+    
     def npcInstancesFromNPCID(self, id: int) -> list[NPCInstance]:
         """Get all NPCInstances that use a given NPC ID
 
@@ -244,11 +401,41 @@ class ProjectData():
         Returns:
             list[NPCInstance]: All matching NPCInstances. Blank list if none.
         """
-        npcs = []
-        for i in self.npcinstances:
-            if i.npcID == id:
-                npcs.append(i)
-        return npcs
+        return list(self._npcInstancesByNPCID.get(id, {}).values())
+    
+    @property
+    def triggers(self) -> tuple[Trigger, ...]:
+        """All triggers on the map, in the order they were added. Use add/removeTrigger to change them"""
+        return tuple(self._triggersByUUID.values())
+    
+    @triggers.setter
+    def triggers(self, triggers: Iterable[Trigger]):
+        self._triggersByUUID = {i.uuid: i for i in triggers}
+        self.triggerGrid.rebuild(self._triggersByUUID.values())
+
+    def addTrigger(self, trigger: Trigger) -> bool:
+        """Add a Trigger to the map
+
+        Args:
+            trigger (Trigger): the trigger to add
+
+        Returns:
+            bool: False if it was already on the map
+        """
+        if trigger.uuid in self._triggersByUUID:
+            return False
+        self._triggersByUUID[trigger.uuid] = trigger
+        self.triggerGrid.insert(trigger)
+        return True
+
+    def removeTrigger(self, trigger: Trigger):
+        """Remove a Trigger from the map
+
+        Args:
+            trigger (Trigger): the trigger to remove
+        """
+        self._triggersByUUID.pop(trigger.uuid)
+        self.triggerGrid.remove(trigger)
     
     def triggerFromUUID(self, uuid: UUID) -> Trigger:
         """Get a Trigger by UUID
@@ -259,9 +446,7 @@ class ProjectData():
         Returns:
             Trigger: the matching Trigger
         """
-        for i in self.triggers:
-            if i.uuid == uuid:
-                return i
+        return self._triggersByUUID.get(uuid)
     
     # generic getters (so return type is known)
     # assume that oob errors are checked by the caller
@@ -3,6 +3,7 @@ import contextlib
 from PySide6.QtCore import QSettings
 
 import src.misc.common as common
+from src.coilsnake.io_profile import countFile
 from src.coilsnake.project_data import ProjectData
 
 
@@ -43,6 +44,7 @@ def openCoilsnakeResource(module: str, resource: str, mode: str, projectData: Pr
     finally:
         try:
             file.close()
+            countFile(path)
         except UnboundLocalError:
             pass # never got past the getResourcePath, which we already check for
         
@@ -61,5 +63,6 @@ def openTextResource(path: str, mode: str):
     finally:
         try:
             file.close()
+            countFile(path)
         except UnboundLocalError:
             pass
\ No newline at end of file
@@ -2,22 +2,26 @@ import logging
 import traceback
 
 from src.coilsnake.datamodules import MODULES
+from src.coilsnake.io_profile import IOProfile
 from src.coilsnake.project_data import ProjectData
 from src.misc.worker import Worker
 
 
 def writeDirectory(worker: Worker, data: ProjectData):   
     try:
+        profile = IOProfile("save")
         for module in MODULES:
             try:
                 worker.updates.emit(f"Saving {module.NAME}...")
-                module.save(data)
+                with profile.record(module, data):
+                    module.save(data)
             except Exception as e:
                 worker.returns.emit({"title": f"Failed to save {module.NAME}",
                                      "text": f"Could not save {module.NAME}.",
                                      "info": f"{type(e).__name__}: {str(e)}"})
                 raise
 
+        profile.finish()
         logging.info(f"Successfully saved project at {data.dir}")
         worker.returns.emit(True)
 
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import os
+import pickle
+
+from PySide6.QtCore import QStandardPaths
+
+import src.misc.common as common
+from src.coilsnake.io_profile import countFile
+from src.coilsnake.project_data import ProjectData
+
+SNAPSHOT_VERSION = 1
+"""Increase when the layout of snapshots changes, so old ones are ignored"""
+
+
+def fileHash(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+class ProjectSnapshot:
+    """Data of each module from the last time a project was loaded, to reopen it without parsing files that haven't changed.
+
+    Each module's snapshot records the files it was loaded from. It is only used if none of them have changed since,
+    and if every module it depends on was restored from its snapshot too.
+
+    Snapshots are pickles, so they're kept in EBME's cache folder rather than the project folder. Loading a project
+    from someone else can't run code from their snapshots.
+    """
+    def __init__(self, projectData: ProjectData):
+        self.projectData = projectData
+        self.projectSnake = os.path.normpath(os.path.join(projectData.dir, "Project.snake"))
+
+        cache = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(projectData.dir)).encode()).hexdigest()
+        self.dir = os.path.join(cache, "snapshots", key)
+
+    def _path(self, module) -> str:
+        return os.path.join(self.dir, f"{module.__name__}.snapshot")
+
+    @staticmethod
+    def canSnapshot(module) -> bool:
+        return module.SNAPSHOT and bool(module.DATA)
+
+    def _fileStates(self, files: list[str]) -> dict[str, tuple[int, int, str]]:
+        # Key: path relative to the project, Value: size, modification time, hash
+        states = {}
+        for path in set(files) | {self.projectSnake}:
+            stat = os.stat(path)
+            states[os.path.relpath(path, self.projectData.dir)] = (stat.st_size, stat.st_mtime_ns, fileHash(path))
+        return states
+
+    def _isCurrent(self, states: dict[str, tuple[int, int, str]]) -> bool:
+        for path, (size, mtime, hash) in states.items():
+            try:
+                stat = os.stat(os.path.join(self.projectData.dir, path))
+            except OSError:
+                return False
+            if stat.st_size != size:
+                return False
+            # touched or rewritten with the same contents, such as by saving
+            if stat.st_mtime_ns != mtime and fileHash(os.path.join(self.projectData.dir, path)) != hash:
+                return False
+        return True
+
+    def restore(self, module) -> bool:
+        """Restore a module's data from its snapshot, if it's still current
+
+        Args:
+            module (type[DataModule]): the module
+
+        Returns:
+            bool: whether it was restored. If not, load the module normally
+        """
+        path = self._path(module)
+        if not self.canSnapshot(module) or not os.path.exists(path):
+            return False
+
+        try:
+            with open(path, "rb") as file:
+                header = pickle.load(file)
+                if header["version"] != SNAPSHOT_VERSION or header["ebme"] != common.VERSION:
+                    return False
+                if not self._isCurrent(header["files"]):
+                    return False
+                data = pickle.load(file)
+        except Exception:
+            logging.warning(f"Couldn't read the snapshot of {module.NAME}, loading it normally instead.", exc_info=True)
+            return False
+        countFile(path)
+
+        for attribute, value in data.items():
+            setattr(self.projectData, attribute, value)
+        module.restored(self.projectData)
+        return True
+
+    def store(self, module, files: list[str]):
+        """Write a module's snapshot after it's loaded
+
+        Args:
+            module (type[DataModule]): the module
+            files (list[str]): the files it was loaded from
+        """
+        if not self.canSnapshot(module):
+            return
+
+        path = self._path(module)
+        try:
+            header = {"version": SNAPSHOT_VERSION,
+                      "ebme": common.VERSION,
+                      "files": self._fileStates(files)}
+            data = {i: getattr(self.projectData, i) for i in (module.DATA,) + module.EXTRA_DATA}
+
+            os.makedirs(self.dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+        except Exception:
+            logging.warning(f"Couldn't write the snapshot of {module.NAME}.", exc_info=True)
+            try:
+                os.remove(path + ".tmp")
+            except OSError:
+                pass
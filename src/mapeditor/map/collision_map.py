@@ -0,0 +1,100 @@
+import numpy
+
+import src.misc.common as common
+from src.coilsnake.fts_interpreter import Tile
+from src.coilsnake.project_data import ProjectData
+from src.objects.sector import Sector
+
+
+class CollisionMap:
+    """Collision of the whole map, one byte per 8x8 area, kept in sync with the tiles.
+
+    The raster is built from the tile IDs and each tileset's collision table in one go, and afterwards only the
+    parts affected by an edit are rebuilt. Map changes that are being previewed are applied, so this is the
+    collision of what is drawn on the map.
+    """
+    def __init__(self, projectData: ProjectData):
+        self.projectData = projectData
+
+        h, w = projectData.tileIDs.shape
+        self.array = numpy.zeros((h*4, w*4), dtype=numpy.uint8)
+        """Collision at each 8x8 area, indexed by [y, x] in warp coordinates"""
+        # same memory, as (tile y, y within tile, tile x, x within tile)
+        self._blocks = self.array.reshape(h, 4, w, 4)
+
+        self.tileMappings: dict[int, dict[int, int]] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild everything, such as after tiles are replaced or moved around in a tileset"""
+        tilesets = self.projectData.tilesets
+        self._collision = numpy.zeros((len(tilesets), common.MAXTILES, 4, 4), dtype=numpy.uint8)
+        for i, tileset in enumerate(tilesets):
+            collision = tileset.collisionArray()
+            self._collision[i, :len(collision)] = collision
+
+        sectorTilesets = self.projectData.sectorStore.columns["tileset"].reshape(self.projectData.sectors.shape)
+        # sectors are 8 tiles wide and 4 tiles tall
+        self._tilesets = sectorTilesets.repeat(4, axis=0).repeat(8, axis=1)
+
+        self.setTileMappings(self.tileMappings)
+
+    def setTileMappings(self, mappings: dict[int, dict[int, int]]):
+        """Set the tiles replaced by previewed map changes, and update the whole map
+
+        Args:
+            mappings (dict[int, dict[int, int]]): tileset: {before: after}
+        """
+        self.tileMappings = mappings
+        self._lookup = numpy.tile(numpy.arange(common.MAXTILES, dtype=numpy.uint16), (len(self._collision), 1))
+        for tileset, changes in mappings.items():
+            for before, after in changes.items():
+                self._lookup[tileset, before] = after
+
+        self.updateTiles(0, 0, self._tilesets.shape[1]-1, self._tilesets.shape[0]-1)
+
+    def updateTiles(self, x1: int, y1: int, x2: int, y2: int):
+        """Update an area after tiles are placed
+
+        Args:
+            x1, y1, x2, y2 (int): the area, in tile coordinates (inclusive)
+        """
+        tilesets = self._tilesets[y1:y2+1, x1:x2+1]
+        tiles = self._lookup[tilesets, self.projectData.tileIDs[y1:y2+1, x1:x2+1]]
+        # (tile y, tile x, y, x) -> (tile y, y, tile x, x)
+        self._blocks[y1:y2+1, :, x1:x2+1, :] = self._collision[tilesets, tiles].transpose(0, 2, 1, 3)
+
+    def updateSector(self, sector: Sector):
+        """Update a sector after its tileset is changed"""
+        x, y = sector.coords.coordsSector()
+        self._tilesets[y*4:(y+1)*4, x*8:(x+1)*8] = sector.tileset
+        self.updateTiles(x*8, y*4, (x+1)*8-1, (y+1)*4-1)
+
+    def updateTileCollision(self, tile: Tile):
+        """Update everywhere a tile is placed after its collision is changed"""
+        tileset = next(i for i, t in enumerate(self.projectData.tilesets) if t is tile.fts)
+        id = next(i for i, t in enumerate(tile.fts.tiles) if t is tile)
+
+        collision = numpy.array(tile.collision, dtype=numpy.uint8).reshape(4, 4)
+        self._collision[tileset, id] = collision
+
+        placed = (self._tilesets == tileset) & (self._lookup[tileset][self.projectData.tileIDs] == id)
+        ys, xs = placed.nonzero()
+        self._blocks[ys, :, xs, :] = collision
+
+    def at(self, x: int, y: int) -> int:
+        """Get the collision at a point, in warp coordinates"""
+        return int(self.array[y, x])
+
+    def sample(self, x1: int, y1: int, x2: int, y2: int) -> int:
+        """Combine the collision of an area
+
+        Args:
+            x1, y1, x2, y2 (int): the area, in warp coordinates (inclusive)
+
+        Returns:
+            int: every collision bit set anywhere in the area
+        """
+        # keep negative coordinates from wrapping around
+        area = self.array[max(y1, 0):max(y2+1, 0), max(x1, 0):max(x2+1, 0)]
+        return int(numpy.bitwise_or.reduce(area, axis=None))
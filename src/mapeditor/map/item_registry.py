@@ -0,0 +1,159 @@
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Iterable
+
+from PySide6.QtCore import QRectF
+from PySide6.QtWidgets import QGraphicsItem
+
+from src.misc.spatial import SpatialGrid
+
+if TYPE_CHECKING:
+    from src.mapeditor.map.map_scene import MapEditorScene
+
+
+class MapItemRegistry:
+    """Scene items for one kind of map object, only created while their part of the map is near a view.
+
+    Where objects are comes from their SpatialGrid in ProjectData. The scene tells every registry which grid cells
+    are near a view, and items are created for the objects in them. Items far away from every view are
+    removed from the scene again, unless they're selected or being dragged.
+    """
+    def __init__(self, scene: "MapEditorScene",
+                 key: Callable[[Any], Hashable],
+                 grid: SpatialGrid,
+                 create: Callable[[Any], QGraphicsItem],
+                 retire: Callable[[QGraphicsItem], None]|None = None):
+        """
+        Args:
+            scene (MapEditorScene): the scene to add items to
+            key (Callable): gets the key (UUID, ID) of an object
+            grid (SpatialGrid): the grid the objects are kept in
+            create (Callable): creates the scene item for an object
+            retire (Callable, optional): called with an item after it's removed from the scene. Defaults to None.
+        """
+        self.scene = scene
+        self.key = key
+        self.grid = grid
+        self.create = create
+        self.retire = retire
+
+        self.objects: dict[Hashable, Any] = {}
+        self._items: dict[Hashable, QGraphicsItem] = {}
+
+        self._active: set[tuple[int, int]] = set()
+
+    def _isActive(self, key: Hashable) -> bool:
+        return any(i in self._active for i in self.grid.cellsOf(self.objects[key]))
+
+    def _materialise(self, key: Hashable) -> QGraphicsItem:
+        item = self.create(self.objects[key])
+        self._items[key] = item
+        self.scene.addItem(item)
+        return item
+
+    def _dematerialise(self, key: Hashable):
+        item = self._items.pop(key)
+        if item.scene():
+            item.scene().removeItem(item)
+        if self.retire:
+            self.retire(item)
+
+    def _materialiseCells(self, cells: Iterable[tuple[int, int]]):
+        for cell in cells:
+            for obj in self.grid.objectsInCell(cell):
+                key = self.key(obj)
+                if key in self.objects and key not in self._items:
+                    self._materialise(key)
+
+    def register(self, obj, materialise: bool=False) -> QGraphicsItem|None:
+        """Start tracking a map object. It must already be in the grid. Its item is created if it's near a view.
+
+        Args:
+            obj: the object to track
+            materialise (bool, optional): always create its item, even if it's far away. Defaults to False.
+
+        Returns:
+            QGraphicsItem|None: the object's item, if it was created
+        """
+        key = self.key(obj)
+        if key in self.objects:
+            raise KeyError(f"{key} is already registered")
+
+        self.objects[key] = obj
+        if materialise or self._isActive(key):
+            return self._materialise(key)
+
+    def unregister(self, key: Hashable):
+        """Stop tracking a map object, and remove its item from the scene
+
+        Args:
+            key (Hashable): the key of the object
+        """
+        if key in self._items:
+            self._dematerialise(key)
+        self.objects.pop(key)
+
+    def relocate(self, key: Hashable) -> QGraphicsItem|None:
+        """Check an object after it's been moved. Its item is created if it's moved near a view.
+
+        Args:
+            key (Hashable): the key of the object
+
+        Returns:
+            QGraphicsItem|None: the object's item, if it exists
+        """
+        if key not in self.objects:
+            raise KeyError(key)
+
+        if key not in self._items and self._isActive(key):
+            return self._materialise(key)
+        return self._items.get(key)
+
+    def item(self, key: Hashable) -> QGraphicsItem:
+        """Get the item of an object, creating it if it doesn't exist yet
+
+        Args:
+            key (Hashable): the key of the object
+
+        Returns:
+            QGraphicsItem: the item
+        """
+        if key in self._items:
+            return self._items[key]
+        if key not in self.objects:
+            raise KeyError(key)
+        return self._materialise(key)
+
+    def get(self, key: Hashable) -> QGraphicsItem|None:
+        """Get the item of an object, if it exists. Doesn't create it."""
+        return self._items.get(key)
+
+    def items(self) -> list[QGraphicsItem]:
+        """Get all items that currently exist"""
+        return list(self._items.values())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.objects
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def materialiseRect(self, rect: QRectF):
+        """Create the items of all objects in an area, regardless of the view. They'll be removed again when out of view."""
+        self._materialiseCells(self.grid.cellsInRect(rect.left(), rect.top(), rect.right(), rect.bottom()))
+
+    def setActiveCells(self, active: set[tuple[int, int]], keep: set[tuple[int, int]]):
+        """Create items for objects in active grid cells, and remove the items of objects outside of the kept cells
+
+        Args:
+            active (set[tuple[int, int]]): cells that should have items
+            keep (set[tuple[int, int]]): cells whose existing items stay. Should include `active`
+        """
+        self._active = active
+
+        grabbed = self.scene.mouseGrabberItem()
+        for key, item in list(self._items.items()):
+            if item.isSelected() or item is grabbed:
+                continue
+            if not any(i in keep for i in self.grid.cellsOf(self.objects[key])):
+                self._dematerialise(key)
+
+        self._materialiseCells(active)
@@ -2,7 +2,6 @@ import copy
 import json
 import logging
 import math
-import sys
 import traceback
 from math import ceil
 from typing import TYPE_CHECKING
@@ -10,15 +9,16 @@ from uuid import UUID
 
 import numpy
 from ordered_set import OrderedSet
-from PySide6.QtCore import QPoint, QRect, QRectF, QSettings, Qt, QTimer
+from PySide6.QtCore import QPoint, QPointF, QRect, QRectF, QSettings, Qt, QTimer
 from PySide6.QtGui import (QBrush, QColor, QKeySequence, QPainter,
-                           QPainterPath, QPen, QPixmap, QPolygon, QUndoCommand)
+                           QPainterPath, QPen, QPixmap, QPolygon, QRegion,
+                           QUndoCommand)
 from PySide6.QtWidgets import (QApplication, QGraphicsLineItem,
                                QGraphicsPathItem, QGraphicsPixmapItem,
                                QGraphicsRectItem, QGraphicsScene,
                                QGraphicsSceneContextMenuEvent,
                                QGraphicsSceneMouseEvent, QInputDialog, QMenu,
-                               QMessageBox, QProgressDialog)
+                               QProgressDialog)
 
 import src.misc.common as common
 import src.misc.icons as icons
@@ -47,28 +47,57 @@ from src.actions.sector_actions import (ActionAddSectorUserDataField,
                                         ActionChangeSectorAttributes,
                                         ActionImportSectorUserData,
                                         ActionRemoveSectorUserDataField)
-from src.actions.tile_actions import ActionPlaceTile, ActionSwapTiles
+from src.actions.tile_actions import (ActionPermuteTiles, ActionPlaceTile,
+                                      ActionRemapTiles)
 from src.actions.trigger_actions import (ActionAddTrigger, ActionDeleteTrigger,
                                          ActionMoveTrigger,
                                          ActionUpdateTrigger)
 from src.actions.warp_actions import (ActionMoveTeleport, ActionMoveWarp,
                                       ActionUpdateTeleport, ActionUpdateWarp)
 from src.coilsnake.project_data import ProjectData
+from src.mapeditor.map.collision_map import CollisionMap
+from src.mapeditor.map.item_registry import MapItemRegistry
+from src.mapeditor.map.npc_collision import NPCCollisionBoxes
 from src.misc.coords import EBCoords
 from src.misc.dialogues import ClearDialog
+from src.misc.spatial import SpatialGrid
 from src.objects.changes import MapChangeEvent
 from src.objects.enemy import EnemySpawnLines
-from src.objects.hotspot import MapEditorHotspot
+from src.objects.hotspot import Hotspot, MapEditorHotspot
 from src.objects.npc import NPC, MapEditorNPC, NPCInstance
 from src.objects.sector import Sector
-from src.objects.sprite import Sprite
+from src.objects.sprite import Sprite, heldSpriteImages
 from src.objects.tile import MapTile
-from src.objects.warp import MapEditorWarp
+from src.objects.warp import MapEditorWarp, Teleport, Warp
 
 if TYPE_CHECKING:
     from src.mapeditor.map_editor import MapEditor, MapEditorState
 
 
+def discardItem(items: list, item):
+    """Remove an item from a list of instances if it's (still) in it"""
+    if item in items:
+        items.remove(item)
+
+
+def sectorRegion(mask: numpy.ndarray) -> QRegion:
+    """Get the area covered by some sectors
+
+    Args:
+        mask (numpy.ndarray): boolean array the shape of the sectors, True where a sector is included
+
+    Returns:
+        QRegion: the area, in pixels
+    """
+    region = QRegion()
+    for y, row in enumerate(mask):
+        # one rect for each run of sectors in a row
+        edges = numpy.flatnonzero(numpy.diff(row.astype(numpy.int8), prepend=0, append=0))
+        for start, end in zip(edges[::2], edges[1::2]):
+            region = region.united(QRect(int(start)*256, y*128, int(end-start)*256, 128))
+    return region
+
+
 class MapEditorScene(QGraphicsScene):
     PREVIEWNPCMAXSAMPLES = 4 # higher = less jittering on diagonals, but more delay. 4 seems to work nicely
     PREVIEWNPCANIMDELAY = 7 # how many mouse-move inputs before switching animation frame
@@ -99,6 +128,8 @@ class MapEditorScene(QGraphicsScene):
         self.sectorSelect.setBrush(QBrush(QColor(255, 255, 0, 0)))
         self.sectorSelect.setZValue(common.MAPZVALUES.SECTORSELECT)
         self.addItem(self.sectorSelect)
+        # what the outline was last made from
+        self._sectorSelectMask: numpy.ndarray|None = None
         self.sectorBrushChangeTimer = QTimer(self)
         self.sectorBrushChangeTimer.setInterval(50)
         self.sectorBrushChangeTimer.timeout.connect(self.changeSectorBrush)
@@ -118,7 +149,7 @@ class MapEditorScene(QGraphicsScene):
         
         self.previewNPC.setSprite(spr, common.DIRECTION8.down, 0, False)
         self.previewNPC.setCollisionBounds(8, 8) # use player's hardcoded collision
-        # self.previewNPC.collisionBounds.setY(4)
+        # self.previewNPC.collisionBoundsOffset = QPointF(0, 4)
         self.previewNPC.hide()
         self.addItem(self.previewNPC)
         
@@ -132,14 +163,25 @@ class MapEditorScene(QGraphicsScene):
             QBrush(QPixmap(":/ui/bg.png"))
         )
 
-        # easier access
-        self.placedNPCsByID: dict[int, list[MapEditorNPC]] = {}
-        self.placedNPCsByUUID: dict[UUID, MapEditorNPC] = {}
-        self.placedTriggersByUUID: dict[UUID, trigger.MapEditorTrigger] = {} 
-        self.placedHotspots: list[MapEditorHotspot] = []
-        self.placedWarps: list[MapEditorWarp] = []
-        self.placedTeleports: list[MapEditorWarp] = []
-        
+        # items for map objects are only created when they're near a view. See MapItemRegistry
+        self.placedNPCs = MapItemRegistry(self, lambda i: i.uuid, data.npcInstanceGrid,
+                                          self.createNPCItem, lambda i: discardItem(MapEditorNPC.instances, i))
+        self.placedTriggers = MapItemRegistry(self, lambda i: i.uuid, data.triggerGrid,
+                                              self.createTriggerItem, lambda i: discardItem(trigger.MapEditorTrigger.instances, i))
+        self.placedHotspots = MapItemRegistry(self, lambda i: i.id, data.hotspotGrid,
+                                              self.createHotspotItem, lambda i: discardItem(MapEditorHotspot.hotspots, i))
+        self.placedWarps = MapItemRegistry(self, lambda i: i.id, data.warpGrid,
+                                           self.createWarpItem, lambda i: discardItem(MapEditorWarp.instances, i))
+        self.placedTeleports = MapItemRegistry(self, lambda i: i.id, data.teleportGrid,
+                                               self.createTeleportItem, lambda i: discardItem(MapEditorWarp.instances, i))
+        self.itemRegistries = (self.placedNPCs, self.placedTriggers, self.placedHotspots, self.placedWarps, self.placedTeleports)
+
+        self._materialisedCells: set[tuple[int, int]] = set()
+        self.materialiseTimer = QTimer(self)
+        self.materialiseTimer.setSingleShot(True)
+        self.materialiseTimer.setInterval(0)
+        self.materialiseTimer.timeout.connect(self.updateMaterialisedItems)
+
         self.populateNPCs()
         self.populateTriggers()
         self.populateHotspots()
@@ -171,11 +213,15 @@ class MapEditorScene(QGraphicsScene):
         
         self.enabledMapEvents: OrderedSet[MapChangeEvent] = OrderedSet()
         self.mapEventTileMappings: dict[dict[int, int]] = {} # Tileset: [ {Before: after} ]
+        self.collisionMap = CollisionMap(self.projectData)
+        self.npcCollision = NPCCollisionBoxes(self.projectData)
         
         self.dontUpdateModeNextAction = False
         """Avoid updating the current mode when pushing an action to the stack. Unset after the action is received. Won't affect undo/redo later on."""
         
         self._lastSector = self.projectData.getSector(EBCoords(0, 0))
+        # area covered by each (tileset, palette group, palette). Made when needed
+        self._sectorRegions: dict[tuple[int, int, int], QRegion] = {}
         self._lastCoords = EBCoords(0, 0)
         
         self._skipNextCtxEvent = False
@@ -515,6 +561,8 @@ class MapEditorScene(QGraphicsScene):
         for c in commands:
             if isinstance(c, ActionPlaceTile):
                 actionType = "tile"
+                x, y = c.maptile.coords.coordsTile()
+                self.collisionMap.updateTiles(x, y, x, y)
 
             if isinstance(c, ActionMoveNPCInstance) or isinstance(c, ActionChangeNPCInstance):
                 actionType = "npc"
@@ -533,6 +581,7 @@ class MapEditorScene(QGraphicsScene):
             
             if isinstance(c, ActionDeleteNPCInstance):
                 actionType = "npc"
+                self.npcCollision.refresh(c.instance.uuid)
                 
             if isinstance(c, ActionMoveTrigger) or isinstance(c, ActionUpdateTrigger):
                 actionType = "trigger"
@@ -551,6 +600,8 @@ class MapEditorScene(QGraphicsScene):
             if isinstance(c, ActionChangeSectorAttributes):
                 actionType = "sector"
                 self.refreshSector(c.sector.coords)
+                self.collisionMap.updateSector(c.sector)
+                self.refreshSectorRegions(c.sector)
                 
             if isinstance(c, ActionPlaceEnemyTile):
                 actionType = "enemy"
@@ -578,6 +629,7 @@ class MapEditorScene(QGraphicsScene):
                 
             if isinstance(c, ActionChangeCollision):
                 actionType = "collision"
+                self.collisionMap.updateTileCollision(c.tile)
             
             if isinstance(c, ActionChangeMapChangeEvent):
                 actionType = "mapchange"
@@ -604,11 +656,13 @@ class MapEditorScene(QGraphicsScene):
                 actionType = "tile"
                 self.parent().sidebarTile.tilesetSelect.setCurrentIndex(c.index)
                 self.parent().sidebarTile.scene.update()
+                self.collisionMap.rebuild()
             
-            if isinstance(c, ActionSwapTiles):
+            if isinstance(c, ActionPermuteTiles) or isinstance(c, ActionRemapTiles):
                 actionType = "tile"
                 self.parent().sidebarTile.scene.update()
                 self.parent().sidebarChanges.refreshEvent()
+                self.collisionMap.rebuild()
                 self.calculateMapEventTileMappings()
 
         match actionType:
@@ -957,22 +1011,12 @@ class MapEditorScene(QGraphicsScene):
         self.update()
                 
     def collisionAt(self, coords: EBCoords) -> int:
-        tile = self.projectData.getTile(coords)
-        
-        tileset = self.projectData.getTileset(tile.tileset)
-        collisionMap = tileset.tiles[tile.tile].collision
-        
-        x, y = coords.coordsWarp()
-        x = x % 4
-        y = y % 4
-        return collisionMap[x + y * 4]
+        """Get the collision at a point, as it's drawn (including map changes being previewed)"""
+        return self.collisionMap.at(*coords.coordsWarp())
     
     def sampleCollisionRegion(self, topleft: EBCoords, bottomright: EBCoords) -> int:
-        collision = 0
-        for x in range(topleft.coordsWarp()[0], bottomright.coordsWarp()[0]+1):
-            for y in range(topleft.coordsWarp()[1], bottomright.coordsWarp()[1]+1):
-                collision |= self.collisionAt(EBCoords.fromWarp(x, y))
-        return collision
+        """Combine the collision of every 8x8 area from `topleft` to `bottomright` (inclusive)"""
+        return self.collisionMap.sample(*topleft.coordsWarp(), *bottomright.coordsWarp())
 
     def placeTile(self, coords: EBCoords):
         """Place a tile (id determined by tile selector active tile).
@@ -1093,14 +1137,14 @@ class MapEditorScene(QGraphicsScene):
         self.parent().sidebarCollision.display.currentTileset = tileset
         self.parent().sidebarCollision.presets.verifyTileCollision(tile)
         
-        if self.collisionAt(coords) != self.state.currentCollision:
+        x, y = coords.coordsWarp()
+        x = x % 4
+        y = y % 4
+        index = x + y * 4
+        if tile.collision[index] != self.state.currentCollision:
             if not self.state.placingCollision:
                 self.undoStack.beginMacro("Place collision")
                 self.state.placingCollision = True
-            x, y = coords.coordsWarp()
-            x = x % 4
-            y = y % 4
-            index = x + y * 4
             action = ActionChangeCollision(tile, self.state.currentCollision, index)
             self.undoStack.push(action)
             self.update()
@@ -1208,19 +1252,28 @@ class MapEditorScene(QGraphicsScene):
             self.parent().sidebarTile.fromSector(sector)
             self.parent().sidebarSector.fromSectors()
 
-        rects = []
-        for i in self.state.currentSectors:
-            x, y = i.coords.roundToSector()
-            rects.append(QRect(x, y, 256, 128))
+        self.refreshSectorSelection()
         
-        path = QPainterPath()
-        for rect in rects:
-            miniPath = QPainterPath()
-            miniPath.addRect(rect)
-            path = path.united(miniPath)
-            # TODO not perfect, leaves lines between some rects on thin selections. QPolygon?
+    def refreshSectorSelection(self, mask: numpy.ndarray|None = None):
+        """Outline the selected sectors
+
+        Args:
+            mask (numpy.ndarray, optional): which sectors are selected, if already known. Defaults to None.
+        """
+        if mask is None:
+            mask = numpy.zeros(self.projectData.sectors.shape, dtype=numpy.bool_)
+            for i in self.state.currentSectors:
+                x, y = i.coords.coordsSector()
+                mask[y, x] = True
         
-        self.sectorSelect.setPath(path)
+        if self._sectorSelectMask is not None and numpy.array_equal(mask, self._sectorSelectMask):
+            return
+        self._sectorSelectMask = mask
+        
+        # one region for the whole selection, so there are no lines between sectors
+        path = QPainterPath()
+        path.addRegion(sectorRegion(mask))
+        self.sectorSelect.setPath(path.simplified())
         
     def selectMultipleSectors(self, coords: EBCoords):
         """Select multiple sectors in a flood-fill fashion. Sectors will be selected if palette data is identical.
@@ -1230,29 +1283,10 @@ class MapEditorScene(QGraphicsScene):
         """
         coords.restrictToMap()
         sector = self.projectData.getSector(coords)    
-        try: 
-            matches = self.projectData.adjacentMatchingSectors(sector, [])
-        except RecursionError:
-            return common.showErrorMsg("Sector selection error",
-                                "Too many matching adjacent sectors to select!",
-                                f"Max recursion depth is {sys.getrecursionlimit()}.",
-                                QMessageBox.Icon.Warning)
-        
-        rects = []
-        for i in matches:
-            x, y = i.coords.roundToSector()
-            rects.append(QRect(x, y, 256, 128))
+        mask = self.projectData.matchingSectorMask(sector)
         
-        path = QPainterPath()
-        for rect in rects:
-            miniPath = QPainterPath()
-            miniPath.addRect(rect)
-            path = path.united(miniPath)
-            # TODO not perfect, leaves lines between some rects
-
-        self.sectorSelect.setPath(path)
-        
-        self.state.currentSectors = matches
+        self.state.currentSectors = list(self.projectData.sectors[mask])
+        self.refreshSectorSelection(mask)
         self.parent().sidebarSector.fromSectors()
         #self.parent().sidebarTile.fromSectors(matches)
 
@@ -1391,8 +1425,11 @@ class MapEditorScene(QGraphicsScene):
         spr = self.projectData.getSprite(npc.sprite)
         npc.render(spr)
         
-        for i in self.placedNPCsByID[id]:
-            i.setSprite(spr, common.DIRECTION8[npc.direction], 0)
+        for i in self.projectData.npcInstancesFromNPCID(id):
+            self.npcCollision.update(i)
+        for i in self.placedNPCs.items():
+            if i.id == id:
+                i.setSprite(spr, common.DIRECTION8[npc.direction], 0)
 
     def refreshNPCInstance(self, uuid: UUID):
         """Refresh an NPC instance on the map
@@ -1400,24 +1437,18 @@ class MapEditorScene(QGraphicsScene):
         Args:
             uuid (UUID): the UUID of the instance to refresh
         """
+        self.npcCollision.refresh(uuid)
         inst = self.projectData.npcInstanceFromUUID(uuid)
-        placement = self.placedNPCsByUUID[uuid]
+        placement = self.placedNPCs.relocate(uuid)
+        if not placement:
+            return # it'll be created up to date when it comes into view
+        
         npc = self.projectData.getNPC(inst.npcID)
         spr = self.projectData.getSprite(npc.sprite)
         placement.setSprite(spr, common.DIRECTION8[npc.direction], 0)
         placement.setText(str(inst.npcID).zfill(4))
-        placement.id = inst.uuid
+        placement.id = inst.npcID
         placement.setPos(inst.coords.x, inst.coords.y)
-
-        # now fix placedNPCsByID
-        for id, npcs in self.placedNPCsByID.items():
-            if placement in npcs and id != inst.npcID:
-                npcs.remove(placement)
-                if not inst.npcID in self.placedNPCsByID:
-                    self.placedNPCsByID[inst.npcID] = [placement,]
-                else:
-                    self.placedNPCsByID[inst.npcID].append(placement)
-                break
             
     def createNPCAndInstance(self, coords: EBCoords):
         """Create a new NPC and add an instance of it to the map at the given location."""
@@ -1480,32 +1511,18 @@ class MapEditorScene(QGraphicsScene):
             uuid (UUID): the UUID of the trigger to refresh
         """
         trigger_ = self.projectData.triggerFromUUID(uuid)
-        placement = self.placedTriggersByUUID[uuid]
+        placement = self.placedTriggers.relocate(uuid)
+        if not placement:
+            return
+        
         placement.setPos(trigger_.coords.x, trigger_.coords.y)
-
-        match type(trigger_.typeData):
-            case trigger.TriggerDoor:
-                placement.setPixmap(self.imgTriggerDoor)
-            case trigger.TriggerEscalator:
-                placement.setPixmap(self.imgTriggerEscalator)
-            case trigger.TriggerLadder:
-                placement.setPixmap(self.imgTriggerLadder)
-            case trigger.TriggerObject:
-                placement.setPixmap(self.imgTriggerObject)
-            case trigger.TriggerPerson:
-                placement.setPixmap(self.imgTriggerPerson)
-            case trigger.TriggerRope:
-                placement.setPixmap(self.imgTriggerRope)
-            case trigger.TriggerStairway:
-                placement.setPixmap(self.imgTriggerStairway)
-            case trigger.TriggerSwitch:
-                placement.setPixmap(self.imgTriggerSwitch)
-            case _: # should never happen
-                logging.warning(f"Unknown trigger type {trigger_.typeData}")
+        placement.setPixmap(self.triggerPixmap(trigger_))
     
     def refreshHotspot(self, id: int):
         hotspot = self.projectData.hotspots[id]
-        placement = self.placedHotspots[id]
+        placement = self.placedHotspots.relocate(id)
+        if not placement:
+            return
         
         placement.setRect(hotspot.start.x, hotspot.start.y, hotspot.end.x-hotspot.start.x, hotspot.end.y-hotspot.start.y)
         placement.setBrush(QBrush(QColor.fromRgb(*hotspot.colour, 128)))
@@ -1528,17 +1545,21 @@ class MapEditorScene(QGraphicsScene):
             end = EBCoords(*end.roundToWarp())
             if end >= coords: # may happen at edge of map
                 coords = end - EBCoords(8, 8)
-            action = ActionChangeHotspotLocation(hotspot, coords, end)
+            action = ActionChangeHotspotLocation(self.projectData, hotspot, coords, end)
             self.undoStack.push(action)
         
     def refreshWarp(self, id: int):
         warp = self.projectData.warps[id]
-        placement = self.placedWarps[id]
+        placement = self.placedWarps.relocate(id)
+        if not placement:
+            return
         placement.setPos(warp.dest.x, warp.dest.y)
     
     def refreshTeleport(self, id: int):
         teleport = self.projectData.teleports[id]
-        placement = self.placedTeleports[id]
+        placement = self.placedTeleports.relocate(id)
+        if not placement:
+            return
         placement.setPos(teleport.dest.x, teleport.dest.y)
         
     def moveWarp(self, coords: EBCoords):
@@ -1550,7 +1571,7 @@ class MapEditorScene(QGraphicsScene):
                                    0, 0, len(self.projectData.warps)-1)
         if id[1]:
             warp = self.projectData.warps[id[0]]
-            action = ActionMoveWarp(warp, coords)
+            action = ActionMoveWarp(self.projectData, warp, coords)
             self.undoStack.push(action)
             self.refreshWarp(id[0])
     
@@ -1563,7 +1584,7 @@ class MapEditorScene(QGraphicsScene):
                                    0, 0, len(self.projectData.teleports)-1)
         if id[1]:
             teleport = self.projectData.teleports[id[0]]
-            action = ActionMoveTeleport(teleport, coords)
+            action = ActionMoveTeleport(self.projectData, teleport, coords)
             self.undoStack.push(action)
     
     def calculateMapEventTileMappings(self):
@@ -1593,8 +1614,15 @@ class MapEditorScene(QGraphicsScene):
                         break
                 self.mapEventTileMappings[i.tileset][j.before] = checking
         
+        self.collisionMap.setTileMappings(self.mapEventTileMappings)
+        
     def drawBackground(self, painter: QPainter, rect: QRectF):
         super().drawBackground(painter, rect)
+        # a view is getting close to areas without items. Don't add them mid-paint, though
+        if not self.materialiseTimer.isActive() and not self._materialisedCells.issuperset(SpatialGrid.cellsInRect(
+            rect.left(), rect.top(), rect.right(), rect.bottom(), 1)):
+            self.materialiseTimer.start()
+
         start = EBCoords(*rect.topLeft().toTuple())
         end = EBCoords(*rect.bottomRight().toTuple())
         
@@ -1612,6 +1640,14 @@ class MapEditorScene(QGraphicsScene):
             
         previewing = self.state.isPreviewingPalette()
         
+        showCollision = self.state.mode == common.MODEINDEX.COLLISION or (self.state.mode == common.MODEINDEX.ALL and self.state.allModeShowsCollision)
+        if showCollision:
+            region = self.collisionMap.array[y0*4:(y1+1)*4, x0*4:(x1+1)*4]
+            blocks = region.reshape(y1-y0+1, 4, x1-x0+1, 4)
+            # tiles with the same collision everywhere can be drawn with 1 rect instead of 16
+            uniform = (blocks == blocks[:, :1, :, :1]).all(axis=(1, 3)).tolist()
+            region = region.tolist()
+        
         for y in range(y0, y1+1):
             for x in range(x0, x1+1):
                 coords = EBCoords.fromTile(x, y)
@@ -1652,16 +1688,15 @@ class MapEditorScene(QGraphicsScene):
                         tint = False 
                     
                     # Draw collision
-                    if self.state.mode == common.MODEINDEX.COLLISION or (self.state.mode == common.MODEINDEX.ALL and self.state.allModeShowsCollision):
+                    if showCollision:
                         painter.setOpacity(0.7)
                         painter.setPen(Qt.PenStyle.NoPen)
                         
-                        tileset = self.projectData.getTileset(tile.tileset)
-                        collisionMap = tileset.tiles[overrideTileID].collision
-                        if len(set(collisionMap)) > 1: # special-casing for if all the collision is the same
+                        rx, ry = (x-x0)*4, (y-y0)*4
+                        if not uniform[y-y0][x-x0]: # special-casing for if all the collision is the same
                             for cx in range(0, 4):
                                 for cy in range(0, 4):
-                                    collision = collisionMap[cx + cy * 4] # slightly more performant to do it manually instead of collisionAt
+                                    collision = region[ry+cy][rx+cx]
                                     if collision:
                                         try:
                                             colour = presetColours[collision]
@@ -1671,7 +1706,7 @@ class MapEditorScene(QGraphicsScene):
                                         painter.drawRect((x*32)+(cx*8), (y*32)+(cy*8), 8, 8)
                         else: # all is the same - just draw 1 rect instead of 16
                             try:
-                                colour = presetColours[collisionMap[0]]
+                                colour = presetColours[region[ry][rx]]
                             except KeyError:
                                 colour = 0x303030
                             if colour:
@@ -1714,6 +1749,31 @@ class MapEditorScene(QGraphicsScene):
         if self.state.mode == common.MODEINDEX.ENEMY or (self.state.mode == common.MODEINDEX.ALL and self.state.allModeShowsEnemyTiles):
             x = start.coordsEnemy()[0]
             y = start.coordsEnemy()[1]
+            
+            # prepare the groups coming into view together, so their sprites can be decoded at once
+            h, w = self.projectData.enemyPlacements.shape
+            unprepared = set()
+            for r in range(max(x, 0), min(end.coordsEnemy()[0], w-1)+1):
+                for c in range(max(y, 0), min(end.coordsEnemy()[1], h-1)+1):
+                    group = self.projectData.enemyMapGroups[self.projectData.enemyPlacements[c, r].groupID]
+                    if group.groupID != 0 and (group.renderedEnemiesOverworld is None or group.preparedEnemiesBattle is None):
+                        unprepared.add(group)
+            if unprepared:
+                sprites, battleSprites = set(), set()
+                for group in unprepared:
+                    groupSprites, groupBattleSprites = group.usedSprites(self.projectData)
+                    sprites |= groupSprites
+                    battleSprites |= groupBattleSprites
+                try:
+                    with heldSpriteImages(sprites, battleSprites):
+                        for group in unprepared:
+                            if group.renderedEnemiesOverworld is None:
+                                group.renderEnemiesOverworld(self.projectData)
+                            if group.preparedEnemiesBattle is None:
+                                group.prepareEnemiesBattle(self.projectData)
+                except Exception:
+                    logging.warning(traceback.format_exc())
+            
             for r in range(x, end.coordsEnemy()[0]+1):
                 for c in range(y, end.coordsEnemy()[1]+1):
                     try:
@@ -1793,10 +1853,9 @@ class MapEditorScene(QGraphicsScene):
             # draw bg
             if self.state.showPreviewMap:
                 painter.setBrush(QBrush(self._lastTileGraphic.rendered))
-                polygon = QPolygon(rect.toRect())
-                for i in self._lastMatchingSectorRects:
-                    polygon = polygon.subtracted(QPolygon(i))
-                painter.drawPolygon(polygon)
+                painter.setClipRegion(QRegion(rect.toAlignedRect()).subtracted(self._lastMatchingSectorRegion))
+                painter.drawRect(rect)
+                painter.setClipping(False)
             
             # draw screen overlay
             if self.state.showPreviewScreen:
@@ -1832,22 +1891,35 @@ class MapEditorScene(QGraphicsScene):
         if sector.setting == "robot sprites":
             return self.projectData.getSprite(self.projectData.playerSprites[common.PLAYERSPRITES.ROBOT]), None
 
-        # not the best solution for trigger checking here.
-        # the items need to be visible for self.items() to find them...
-        triggersShown = list(self.placedTriggersByUUID.values())[0].isVisible()
-        trigger.MapEditorTrigger.showTriggers()
-        for i in self.items(self.previewNPC.collisionBounds.mapRectToScene(self.previewNPC.collisionBounds.rect())):
-            if isinstance(i, trigger.MapEditorTrigger):
-                if not triggersShown: trigger.MapEditorTrigger.hideTriggers()
-                t = self.projectData.triggerFromUUID(i.uuid)
-                if isinstance(t.typeData, trigger.TriggerLadder):
-                    return self.projectData.getSprite(self.projectData.playerSprites[common.PLAYERSPRITES.LADDER]), common.DIRECTION8.up
-                if isinstance(t.typeData, trigger.TriggerRope):
-                    return self.projectData.getSprite(self.projectData.playerSprites[common.PLAYERSPRITES.ROPE]), common.DIRECTION8.up
-        if not triggersShown: trigger.MapEditorTrigger.hideTriggers()
+        bounds = self.previewNPC.mapRectToScene(self.previewNPC.collisionBoundsRect.translated(self.previewNPC.collisionBoundsOffset))
+        for t in self.projectData.triggerGrid.objectsInRect(bounds.left(), bounds.top(), bounds.right(), bounds.bottom()):
+            if isinstance(t.typeData, trigger.TriggerLadder):
+                return self.projectData.getSprite(self.projectData.playerSprites[common.PLAYERSPRITES.LADDER]), common.DIRECTION8.up
+            if isinstance(t.typeData, trigger.TriggerRope):
+                return self.projectData.getSprite(self.projectData.playerSprites[common.PLAYERSPRITES.ROPE]), common.DIRECTION8.up
         
         return self.projectData.getSprite(self.projectData.playerSprites[common.PLAYERSPRITES.NORMAL]), None
         
+    def previewCollides(self, pos: QPointF) -> bool:
+        """Check if the preview NPC would bump into a wall or an NPC at a position
+
+        Args:
+            pos (QPointF): where the preview NPC would be
+
+        Returns:
+            bool: if it's blocked
+        """
+        if self.previewNPC.sampleCollision(pos) & (common.COLLISIONBITS.SOLID | common.COLLISIONBITS.VERYSOLID):
+            return True
+        if not MapEditorNPC.shown:
+            return False
+        
+        # recreation of some of the logic in $C05FF6 playerEntityCollisionCheck
+        subjectRect = self.previewNPC.collisionBoundsRect
+        playerPos = pos - self.previewNPC.collisionBoundsOffset*2
+        return len(self.npcCollision.colliding(int(playerPos.x()), int(playerPos.y()),
+                                               int(subjectRect.width()), int(subjectRect.height()))) > 0
+        
     def moveGameModeMask(self, coords: EBCoords, forceRefreshSector: bool=False):
         coords.restrictToMap()
         self._lastCoords = coords
@@ -1857,39 +1929,19 @@ class MapEditorScene(QGraphicsScene):
             return
         
         old = self.previewNPC.pos()
-        self.previewNPC.setPos(coords.x, coords.y)
-        collidesWithTerrain = (self.previewNPC.sampleCollision() & (common.COLLISIONBITS.SOLID | common.COLLISIONBITS.VERYSOLID))
-        collidingItems = self.previewNPC.collidingItems()
-        collidesWithNPC = False
-        for i in collidingItems:
-            if isinstance(i, MapEditorNPC):
-                
-                # recreation of some of the logic in $C05FF6 playerEntityCollisionCheck
-                subjectRect = self.previewNPC.collisionBounds.rect()
-                subjectRect.setHeight(subjectRect.height())
-                
-                targetRect = i.collisionBounds.rect()
-                targetRect.setHeight(targetRect.height())
-                
-                entityPos = i.pos() - i.collisionBounds.pos()*2 + QPoint(0, 8) # 8 is the manually-added offset
-                playerPos = self.previewNPC.pos() - self.previewNPC.collisionBounds.pos()*2
-                
-                if entityPos.y() - targetRect.height() - subjectRect.height() >= playerPos.y():
-                    continue
-                if targetRect.height() + entityPos.y() - targetRect.height() <= playerPos.y():
-                    continue
-                if entityPos.x() - targetRect.width() - subjectRect.width() * 2 >= playerPos.x():
-                    continue
-                if entityPos.x() - targetRect.width() + targetRect.width() * 2 <= playerPos.x():
-                    continue
-
-                collidesWithNPC = True
-                break
-        
-        # TODO some sort of system that lets you move along walls
-        # best way to do this would probably be to mimic the movement rewrite
-        
-        if not (collidesWithTerrain or collidesWithNPC) or not self.state.previewCollides:
+        target = QPointF(coords.x, coords.y)
+        if self.state.previewCollides and self.previewCollides(target):
+            # slide along whatever's in the way, if only one direction is blocked
+            target = None
+            for candidate in (QPointF(coords.x, old.y()), QPointF(old.x(), coords.y)):
+                if candidate != old and not self.previewCollides(candidate):
+                    target = candidate
+                    break
+        
+        if target is not None:
+            coords = EBCoords(int(target.x()), int(target.y()))
+            self.previewNPC.setPos(target)
+            
             self.previewNPCPositionSamples.insert(0, coords)
             if len(self.previewNPCPositionSamples) > self.PREVIEWNPCMAXSAMPLES:
                 last = self.previewNPCPositionSamples.pop()
@@ -1922,8 +1974,6 @@ class MapEditorScene(QGraphicsScene):
             self.previewNPC.setSprite(sprite, facing, self.previewNPCAnimState, False)
             
             self.previewNPC.setPos(coords.x, coords.y)
-        else:
-            self.previewNPC.setPos(old)
             
         sector = self.projectData.getSector(coords)
             
@@ -1940,19 +1990,32 @@ class MapEditorScene(QGraphicsScene):
                 palette = self.projectData.getPaletteGroup(sector.palettegroup).palettes[sector.palette]
                 tilegraphic.render(self.projectData.getTileset(sector.tileset), palette)
                 
-            # get the rects of each sector that matches the current one
-            rects = []
-            for y in self.projectData.sectors:
-                for s in y:
-                    if s.tileset == sector.tileset and s.palettegroup == sector.palettegroup and s.palette == sector.palette:
-                        rects.append(QRect(s.coords.x, s.coords.y, 256, 128))    
-            
             self._lastSector = sector
-            self._lastMatchingSectorRects = rects
+            self._lastMatchingSectorRegion = self.matchingSectorRegion(sector)
             self._lastTileGraphic = tilegraphic
         
         self.update()
            
+    def matchingSectorRegion(self, sector: Sector) -> QRegion:
+        """Get the area of every sector with the same tileset, palette group and palette as this one.
+
+        Args:
+            sector (Sector): the sector to match
+
+        Returns:
+            QRegion: the area, in pixels
+        """
+        key = (sector.tileset, sector.palettegroup, sector.palette)
+        if key not in self._sectorRegions:
+            self._sectorRegions[key] = sectorRegion((self.projectData.sectorKeys() == key).all(axis=2))
+        return self._sectorRegions[key]
+    
+    def refreshSectorRegions(self, sector: Sector):
+        """Update the sector areas used by the game mode mask after a sector's attributes change"""
+        self.projectData.updateSectorKey(sector)
+        # the mask itself is refreshed when entering game mode
+        self._sectorRegions.clear()
+    
     def importpng2ftsMap(self, png: QGraphicsPixmapItem, tiles: numpy.array, tileset: int):
         """Import a png2fts map into the map editor
 
@@ -2316,23 +2379,17 @@ class MapEditorScene(QGraphicsScene):
 
     def populateNPCs(self):
         for i in self.projectData.npcinstances:
-            npc = self.projectData.getNPC(i.npcID)
-            spr = self.projectData.getSprite(npc.sprite)
-            inst = MapEditorNPC(i.coords, i.npcID, i.uuid, spr)
-            inst.setSprite(spr, common.DIRECTION8[npc.direction], 0)
-            
-            if not i.npcID in self.placedNPCsByID:
-                self.placedNPCsByID[i.npcID] = [inst,]
-            else:
-                self.placedNPCsByID[i.npcID].append(inst)
-
-            if not i.uuid in self.placedNPCsByUUID:
-                self.placedNPCsByUUID[i.uuid] = inst
-                self.addItem(inst)
-            else:
+            if i.uuid in self.placedNPCs:
                 logging.warning(f"Can't add an NPC twice! id: {i.uuid}")
-            
-            QApplication.processEvents()
+                continue
+            self.placedNPCs.register(i)
+
+    def createNPCItem(self, instance: NPCInstance) -> MapEditorNPC:
+        npc = self.projectData.getNPC(instance.npcID)
+        spr = self.projectData.getSprite(npc.sprite)
+        item = MapEditorNPC(instance.coords, instance.npcID, instance.uuid, spr)
+        item.setSprite(spr, common.DIRECTION8[npc.direction], 0)
+        return item
 
     def populateTriggers(self):
         self.imgTriggerDoor = QPixmap(":/triggers/triggerDoor.png")
@@ -2346,53 +2403,90 @@ class MapEditorScene(QGraphicsScene):
         self.imgTriggerDest = QPixmap(":/triggers/triggerDestination.png")
 
         for i in self.projectData.triggers:
-            trigger_ = trigger.MapEditorTrigger(i.coords, i.uuid)
-
-            match type(i.typeData):
-                case trigger.TriggerDoor:
-                    trigger_.setPixmap(self.imgTriggerDoor)
-                case trigger.TriggerEscalator:
-                    trigger_.setPixmap(self.imgTriggerEscalator)
-                case trigger.TriggerLadder:
-                    trigger_.setPixmap(self.imgTriggerLadder)
-                case trigger.TriggerObject:
-                    trigger_.setPixmap(self.imgTriggerObject)
-                case trigger.TriggerPerson:
-                    trigger_.setPixmap(self.imgTriggerPerson)
-                case trigger.TriggerRope:
-                    trigger_.setPixmap(self.imgTriggerRope)
-                case trigger.TriggerStairway:
-                    trigger_.setPixmap(self.imgTriggerStairway)
-                case trigger.TriggerSwitch:
-                    trigger_.setPixmap(self.imgTriggerSwitch)
-                case _: # should never happen
-                    logging.warning(f"Unknown trigger type {i.typeData}")
-
-            self.addItem(trigger_)
-            self.placedTriggersByUUID[i.uuid] = trigger_
-
-            QApplication.processEvents()
+            self.placedTriggers.register(i)
+
+    def createTriggerItem(self, trigger_: trigger.Trigger) -> trigger.MapEditorTrigger:
+        item = trigger.MapEditorTrigger(trigger_.coords, trigger_.uuid)
+        item.setPixmap(self.triggerPixmap(trigger_))
+        return item
+
+    def triggerPixmap(self, trigger_: trigger.Trigger) -> QPixmap:
+        """Get the icon for a trigger's type"""
+        match type(trigger_.typeData):
+            case trigger.TriggerDoor:
+                return self.imgTriggerDoor
+            case trigger.TriggerEscalator:
+                return self.imgTriggerEscalator
+            case trigger.TriggerLadder:
+                return self.imgTriggerLadder
+            case trigger.TriggerObject:
+                return self.imgTriggerObject
+            case trigger.TriggerPerson:
+                return self.imgTriggerPerson
+            case trigger.TriggerRope:
+                return self.imgTriggerRope
+            case trigger.TriggerStairway:
+                return self.imgTriggerStairway
+            case trigger.TriggerSwitch:
+                return self.imgTriggerSwitch
+            case _: # should never happen
+                logging.warning(f"Unknown trigger type {trigger_.typeData}")
+                return self.imgTriggerDoor
             
     def populateHotspots(self):
         for i in self.projectData.hotspots:
-            hotspot = MapEditorHotspot(i.id, i.start, i.end, i.colour)
-            self.placedHotspots.append(hotspot)
-            self.addItem(hotspot)
+            self.placedHotspots.register(i)
+
+    def createHotspotItem(self, hotspot: Hotspot) -> MapEditorHotspot:
+        return MapEditorHotspot(hotspot.id, hotspot.start, hotspot.end, hotspot.colour)
             
     def populateWarps(self):
         self.warpPixmap = QPixmap(":/ui/warp.png")
         self.teleportPixmap = QPixmap(":/ui/teleport.png")
         for i in self.projectData.warps:
-            warp = MapEditorWarp(i.dest, i.id, self.warpPixmap, "warp")
-            warp.setText("W"+str(i.id).zfill(3))
-            self.addItem(warp)
-            self.placedWarps.append(warp)
+            self.placedWarps.register(i)
             
         for i in self.projectData.teleports:
-            teleport = MapEditorWarp(i.dest, i.id, self.teleportPixmap, "teleport")
-            teleport.setText("TP`"+str(i.id).zfill(2))
-            self.addItem(teleport)
-            self.placedTeleports.append(teleport)
+            self.placedTeleports.register(i)
+
+    def createWarpItem(self, warp: Warp) -> MapEditorWarp:
+        item = MapEditorWarp(warp.dest, warp.id, self.warpPixmap, "warp")
+        item.setText("W"+str(warp.id).zfill(3))
+        return item
+
+    def createTeleportItem(self, teleport: Teleport) -> MapEditorWarp:
+        item = MapEditorWarp(teleport.dest, teleport.id, self.teleportPixmap, "teleport")
+        item.setText("TP`"+str(teleport.id).zfill(2))
+        return item
+
+    def updateMaterialisedItems(self):
+        """Create items for map objects near any visible view, and remove the ones far away from all of them"""
+        active = set()
+        keep = set()
+        for view in self.views():
+            if not view.isVisible():
+                continue
+            rect = view.mapToScene(view.viewport().rect()).boundingRect()
+            active.update(SpatialGrid.cellsInRect(rect.left(), rect.top(), rect.right(), rect.bottom(), 1))
+            keep.update(SpatialGrid.cellsInRect(rect.left(), rect.top(), rect.right(), rect.bottom(), 2))
+
+        # decode the sprites of NPCs in and near view in the background, so they don't all decode one by one when drawn
+        for cell in keep:
+            for i in self.projectData.npcInstanceGrid.objectsInCell(cell):
+                self.projectData.getSprite(self.projectData.getNPC(i.npcID).sprite).prefetch()
+
+        self._materialisedCells = active
+        for i in self.itemRegistries:
+            i.setActiveCells(active, keep)
+
+    def materialiseRect(self, rect: QRectF):
+        """Make sure all map objects in an area have items, such as before rendering it"""
+        # the NPCs' sprites are all needed now, so decode them together
+        sprites = {self.projectData.getSprite(self.projectData.getNPC(i.npcID).sprite)
+                   for i in self.projectData.npcInstanceGrid.objectsInRect(rect.left(), rect.top(), rect.right(), rect.bottom())}
+        with heldSpriteImages(sprites):
+            for i in self.itemRegistries:
+                i.materialiseRect(rect)
             
     def parent(self) -> "MapEditor": # for typing
         return super().parent()
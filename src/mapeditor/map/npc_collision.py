@@ -0,0 +1,82 @@
+from uuid import UUID
+
+import numpy
+
+import src.misc.common as common
+from src.coilsnake.project_data import ProjectData
+from src.objects.npc import NPCInstance
+
+
+class NPCCollisionBoxes:
+    """Collision boxes of every NPC instance on the map, kept as arrays so they can all be checked at once.
+
+    Boxes are stored the way the game compares them (see $C05FF6 playerEntityCollisionCheck): an anchor point,
+    and the width and height of the box. Instances are found by UUID, and removing one moves the last box into its slot.
+    """
+    def __init__(self, projectData: ProjectData):
+        self.projectData = projectData
+        self.rebuild()
+
+    def rebuild(self):
+        """Recreate all boxes from the NPC instances in the project"""
+        self._index: dict[UUID, int] = {}
+        self._uuids: list[UUID] = []
+        # anchor x, anchor y, width, height
+        self._boxes = numpy.zeros((max(len(self.projectData.npcinstances), 16), 4), dtype=numpy.int32)
+
+        for i in self.projectData.npcinstances:
+            self.update(i)
+
+    def _box(self, instance: NPCInstance) -> tuple[int, int, int, int]:
+        npc = self.projectData.getNPC(instance.npcID)
+        sprite = self.projectData.getSprite(npc.sprite)
+        w, h = sprite.getFacingCollision(common.DIRECTION8[npc.direction].value)
+        # the box hangs 8 pixels above the NPC's position, and is twice as wide as its collision width
+        return instance.coords.x, instance.coords.y - 8, w*2, h
+
+    def update(self, instance: NPCInstance):
+        """Add an instance, or update its box after it's moved or its NPC changes"""
+        index = self._index.get(instance.uuid)
+        if index is None:
+            index = len(self._uuids)
+            if index == len(self._boxes):
+                self._boxes = numpy.concatenate((self._boxes, numpy.zeros_like(self._boxes)))
+            self._index[instance.uuid] = index
+            self._uuids.append(instance.uuid)
+        self._boxes[index] = self._box(instance)
+
+    def remove(self, uuid: UUID):
+        """Remove the box of an instance"""
+        index = self._index.pop(uuid)
+        last = len(self._uuids) - 1
+        if index != last:
+            self._boxes[index] = self._boxes[last]
+            self._uuids[index] = self._uuids[last]
+            self._index[self._uuids[index]] = index
+        self._uuids.pop()
+
+    def refresh(self, uuid: UUID):
+        """Add, update or remove the box of an instance, depending on whether it's in the project"""
+        instance = self.projectData.npcInstanceFromUUID(uuid)
+        if instance:
+            self.update(instance)
+        elif uuid in self._index:
+            self.remove(uuid)
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    def colliding(self, x: int, y: int, w: int, h: int) -> list[UUID]:
+        """Find the instances the player would bump into, using the game's check
+
+        Args:
+            x, y (int): the player's anchor point
+            w, h (int): the width and height of the player's box
+
+        Returns:
+            list[UUID]: the instances collided with
+        """
+        boxes = self._boxes[:len(self._uuids)]
+        ex, ey, ew, eh = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        hits = (ey - eh - h < y) & (ey > y) & (ex - ew - w*2 < x) & (ex + ew > x)
+        return [self._uuids[i] for i in numpy.flatnonzero(hits)]
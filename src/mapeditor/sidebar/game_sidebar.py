@@ -1,7 +1,6 @@
 from typing import TYPE_CHECKING
 
 from PySide6.QtCore import QRect, Qt
-from PySide6.QtGui import QPolygon
 from PySide6.QtWidgets import (QCheckBox, QFormLayout, QGroupBox, QLabel,
                                QPushButton, QSlider, QVBoxLayout, QWidget)
 
@@ -95,17 +94,8 @@ class SidebarGame(QWidget):
         self.mapeditor.scene.update()
         
     def renderRegion(self):
-        sectors = self.projectData.adjacentMatchingSectors(self.mapeditor.scene._lastSector, [])
-        
-        rects = []
-        for sector in sectors:
-            rects.append(QRect(sector.coords.x, sector.coords.y, 256, 128))
-            
-        master = QPolygon(rects[0])
-        for i in rects:
-            master = master.united(i)
-            
-        rect = master.boundingRect()
+        ys, xs = self.projectData.matchingSectorMask(self.mapeditor.scene._lastSector).nonzero()
+        rect = QRect(xs.min()*256, ys.min()*128, (xs.max()-xs.min()+1)*256, (ys.max()-ys.min()+1)*128)
         self.mapeditor.renderMap(rect.left(), rect.top(), rect.right(), rect.bottom(), True)
     
     def renderScreen(self):
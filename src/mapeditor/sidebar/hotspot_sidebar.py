@@ -78,7 +78,7 @@ class SidebarHotspot(QWidget):
             if start.y > end.y:
                 start.y, end.y = end.y, start.y
                 
-            action = ActionChangeHotspotLocation(hotspot, start, end)
+            action = ActionChangeHotspotLocation(self.projectData, hotspot, start, end)
             action.fromSidebar = True
             
             self.mapeditor.scene.undoStack.push(action)
@@ -93,7 +93,7 @@ class SidebarNPC(QWidget):
                 for i in self.state.currentNPCInstances:
                     coords = EBCoords(self.instancePos.x.value() if not self.instancePos.isBlankX() else i.coords.x,
                                     self.instancePos.y.value() if not self.instancePos.isBlankY() else i.coords.y)
-                    action = ActionMoveNPCInstance(i, coords)
+                    action = ActionMoveNPCInstance(self.projectData, i, coords)
                     action.fromSidebar = True # allow merge (does this work....?)
                     actionWrapper.addCommand(action)
                     
@@ -104,7 +104,7 @@ class SidebarNPC(QWidget):
                     
             if npcChanged:
                 for i in self.state.currentNPCInstances:
-                    action = ActionChangeNPCInstance(i,
+                    action = ActionChangeNPCInstance(self.projectData, i,
                                                     self.instanceNPC.value() if not self.instanceNPC.isBlank() else i.npcID)
                     actionWrapper.addCommand(action)           
             
@@ -113,7 +113,7 @@ class SidebarNPC(QWidget):
         else:
             instance = self.state.currentNPCInstances[0]
             if instance.coords.x != self.instancePos.x.value() or instance.coords.y != self.instancePos.y.value():
-                action = ActionMoveNPCInstance(instance,
+                action = ActionMoveNPCInstance(self.projectData, instance,
                                                EBCoords(self.instancePos.x.value(),
                                                         self.instancePos.y.value()))
                 
@@ -121,7 +121,7 @@ class SidebarNPC(QWidget):
                 self.mapeditor.scene.undoStack.push(action)
 
             if instance.npcID != self.instanceNPC.value():
-                action = ActionChangeNPCInstance(instance, self.instanceNPC.value())
+                action = ActionChangeNPCInstance(self.projectData, instance, self.instanceNPC.value())
                 self.mapeditor.scene.undoStack.push(action)
          
         for i in self.state.currentNPCInstances:
@@ -279,7 +279,7 @@ class SidebarTrigger(QWidget):
                 actionWrapper.setText(f"Update {len(self.state.currentTriggers)} triggers")
             for i in self.state.currentTriggers:
                 if i.coords.coordsWarp()[0] != self.generalPos.x.value() or i.coords.coordsWarp()[1] != self.generalPos.y.value():
-                    action = ActionMoveTrigger(i,
+                    action = ActionMoveTrigger(self.projectData, i,
                                                EBCoords.fromWarp(self.generalPos.x.value() if not self.generalPos.isBlankX() else i.coords.x//8,
                                                                  self.generalPos.y.value() if not self.generalPos.isBlankY() else i.coords.y//8))
                     action.fromSidebar = True # does it do anything?
@@ -350,11 +350,12 @@ class SidebarTrigger(QWidget):
         triggers = self.state.currentTriggers
         commands = []
         for i in triggers:
-            collision = self.mapeditor.scene.collisionAt(i.coords)
+            maptile = self.projectData.getTile(i.coords)
+            tile = self.projectData.getTileset(maptile.tileset).tiles[maptile.tile]
+            index = (i.coords.coordsWarp()[0] % 4) + (i.coords.coordsWarp()[1] % 4) * 4
+            # edit the tile that's actually placed, not one a previewed map change shows instead
+            collision = tile.collision[index]
             if not (collision & common.COLLISIONBITS.TRIGGER):
-                maptile = self.projectData.getTile(i.coords)
-                tile = self.projectData.getTileset(maptile.tileset).tiles[maptile.tile]
-                index = (i.coords.coordsWarp()[0] % 4) + (i.coords.coordsWarp()[1] % 4) * 4
                 commands.append(ActionChangeCollision(tile, collision|common.COLLISIONBITS.TRIGGER, index))
         if commands:
             self.mapeditor.scene.dontUpdateModeNextAction = True
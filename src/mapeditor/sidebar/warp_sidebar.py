@@ -94,7 +94,7 @@ class SidebarWarp(QWidget):
             coords = EBCoords.fromWarp(self.warpCoords.x.value(), 
                                        self.warpCoords.y.value())
             if warp.dest != coords:
-                action = ActionMoveWarp(warp, coords)
+                action = ActionMoveWarp(self.projectData, warp, coords)
                 action.fromSidebar = True
                 
                 self.mapeditor.scene.undoStack.push(action)
@@ -114,7 +114,7 @@ class SidebarWarp(QWidget):
                                        self.teleportCoords.y.value())
 
             if warp.dest != coords:
-                action = ActionMoveTeleport(warp, coords)
+                action = ActionMoveTeleport(self.projectData, warp, coords)
                 action.fromSidebar = True
                 
                 self.mapeditor.scene.undoStack.push(action)
@@ -209,6 +209,8 @@ ACTIONINDEX = IntEnum("ACTIONINDEX", ["MULTI", # wrapper to merge many commands
                                       "USERDATAIMPORT", # cannot merge with itself
                                       "REPLACETILESET", # cannot merge with itself
                                       "UPDATEPROJECTMETADATA", # can merge with itself
+                                      "TILEPERMUTE", # cannot merge with itself
+                                      "TILEREMAP", # cannot merge with itself
                                       ])
 
 
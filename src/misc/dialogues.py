@@ -3,7 +3,7 @@ import traceback
 from math import ceil
 from typing import TYPE_CHECKING, OrderedDict
 
-from PIL import ImageQt
+import numpy
 from PySide6.QtCore import QFile, QRectF, QSettings, Qt, Signal
 from PySide6.QtGui import QColor, QImage, QPainter, QPixmap, QValidator
 from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QDialog,
@@ -27,10 +27,12 @@ from src.actions.fts_actions import (ActionChangeArrangement,
 from src.actions.misc_actions import MultiActionWrapper
 from src.actions.sector_actions import (ActionAddSectorUserDataField,
                                         ActionImportSectorUserData)
+from src.actions.tile_actions import ActionRemapTiles
 from src.coilsnake.fts_interpreter import (FullTileset, Minitile, Palette,
                                            PaletteGroup, Subpalette)
 from src.coilsnake.project_data import ProjectData
 from src.misc.coords import EBCoords
+from src.misc.imaging import arrayToQImage
 from src.objects.changes import MapChangeEvent, TileChange
 from src.objects.sector import Sector
 from src.objects.sector_userdata import USERDATA_TYPES, UserDataType
@@ -100,10 +102,9 @@ class FindDialog(QDialog):
 
         match objType:
             case "NPC":
-                for i in self.projectData.npcinstances:
-                    if i.npcID == objID:
-                        item = FindDialogListItem(i, f"-At ({i.coords.x}, {i.coords.y})")
-                        self.resultsList.addItem(item)
+                for i in self.projectData.npcInstancesFromNPCID(objID):
+                    item = FindDialogListItem(i, f"-At ({i.coords.x}, {i.coords.y})")
+                    self.resultsList.addItem(item)
             case "Enemy tile":
                 if objID != 0:
                     for x in self.projectData.enemyPlacements:
@@ -691,6 +692,7 @@ class RenderMapDialog(QDialog):
         image = QImage(rect.width(), rect.height(), QImage.Format.Format_ARGB32)
         painter = QPainter(image)
         
+        self.scene.materialiseRect(rect)
         self.scene.render(painter, image.rect(), rect)
         painter.end()
         
@@ -770,7 +772,7 @@ class RenderTilesDialog(QDialog):
         for id, tile in enumerate(self.tileset.tiles):
             x = id % w
             y = id // w
-            painter.drawImage(x*32+(gaps*x), y*32+(gaps*y), ImageQt.ImageQt(tile.toImage(self.paletteObj, self.tileset)))
+            painter.drawImage(x*32+(gaps*x), y*32+(gaps*y), arrayToQImage(tile.toArray(self.paletteObj, self.tileset)))
         
         painter.end()
         
@@ -847,10 +849,10 @@ class RenderMinitilesDialog(QDialog):
         image.fill(Qt.GlobalColor.transparent)
         painter = QPainter(image)
         
-        for id, minitile in enumerate(self.tileset.minitiles):
+        for id in range(len(self.tileset.minitiles)):
             x = id % w
             y = id // w
-            painter.drawImage(x*8+(gaps*x), y*8+(gaps*y), ImageQt.ImageQt(minitile.BothToImage(self.subpalette)))
+            painter.drawImage(x*8+(gaps*x), y*8+(gaps*y), arrayToQImage(self.tileset.minitileArray(id, self.subpalette)))
         
         painter.end()
         
@@ -1099,20 +1101,11 @@ class AutoMinitileRearrangerDialog(QDialog):
     def rearrange(self):
         try:
             tileset = self.projectData.getTileset(self.tilesetInput.value())
-            countWithFg = 0
-            toMove: list[int] = []
-            canBeReplaced: list[int] = []
             
-            for id, minitile in enumerate(tileset.minitiles):
-                raw = minitile.fgToRaw() 
-                if raw != "0000000000000000000000000000000000000000000000000000000000000000":
-                    countWithFg += 1
-                    if id >= 384:
-                        toMove.append(id)
-                    
-                elif raw == "0000000000000000000000000000000000000000000000000000000000000000"\
-                and id < 384:
-                    canBeReplaced.append(id)
+            hasFg = tileset.minitileBitmaps()[:, 1].any(axis=(1, 2))
+            countWithFg = int(numpy.count_nonzero(hasFg))
+            toMove = numpy.flatnonzero(hasFg[common.MINITILENOFOREGROUND:]) + common.MINITILENOFOREGROUND
+            canBeReplaced = numpy.flatnonzero(~hasFg[:common.MINITILENOFOREGROUND])
                 
             if countWithFg > 384:
                 return common.showErrorMsg("Unable to rearrange minitiles",
@@ -1122,8 +1115,8 @@ class AutoMinitileRearrangerDialog(QDialog):
             # I've decided to reverse it for a few reasons:
             #   - minitile 0 should probably not be messed with first... i dont know the ramifications of that if any
             #   - this algorithm moves them out from the end so I guess it visually makes sense..?
-            canBeReplaced = list(reversed(canBeReplaced))
-            toMove = list(reversed(toMove))
+            canBeReplaced = list(reversed(canBeReplaced.tolist()))
+            toMove = list(reversed(toMove.tolist()))
                 
             actions: list[ActionSwapMinitiles] = []
             for id, minitile in enumerate(toMove):
@@ -1192,9 +1185,6 @@ class EditEventPaletteDialog(QDialog):
         ActionChangeSubpaletteColour(self.paletteCopy.subpalettes[subpalette], index,
                                     self.paletteSelector.buttons[subpalette][index].chosenColour.toTuple()[:3]
                                     ).redo()
-        
-        for i in self.projectData.getTileset(self.tileset).minitiles:
-            i.BothToImage.cache_clear()
             
         self.tilesetDisplay.forcedPaletteCache = {}
         self.tilesetDisplay.update()
@@ -1399,12 +1389,9 @@ class FindUnusedMinitilesDialog(QDialog):
         
     def findUnused(self):
         try:
-            unused = set(range(0, common.MAXMINITILES))
             tileset = self.projectData.getTileset(self.tilesetInput.value())
             
-            for tile in tileset.tiles:
-                for i in range(16):
-                    unused.discard(tile.getMinitileID(i))
+            unused = tileset.unusedMinitiles()
             
             resultString = f"Unused in tileset {tileset.id}\n"
             if unused:
@@ -1796,6 +1783,113 @@ class TileChangeEditDialog(QDialog):
             return ActionAddTileChange(event, index, change)
 
 
+class DuplicateMinitilesDialog(QDialog):
+    def __init__(self, parent, projectData: ProjectData):
+        super().__init__(parent)
+        self.setWindowTitle("Find Duplicate Minitiles")
+        self.projectData = projectData
+        
+        layout = QFormLayout()
+        self.setLayout(layout)
+        
+        label = QLabel("Find minitiles in this tileset with the same graphics as another, and optionally make tiles use only the first copy. The duplicates will then be unused.\n(Can be undone.)")
+        label.setWordWrap(True)
+        layout.addRow(label)
+        
+        self.tilesetInput = QSpinBox()
+        self.tilesetInput.setMaximum(len(self.projectData.tilesets)-1)
+        layout.addRow("Tileset", self.tilesetInput)
+        
+        self.flippedInput = QCheckBox("Include flipped duplicates")
+        self.flippedInput.setChecked(True)
+        layout.addRow(self.flippedInput)
+        
+        self.buttons = QDialogButtonBox()
+        self.buttons.addButton(QDialogButtonBox.StandardButton.Ok)
+        self.buttons.addButton(QDialogButtonBox.StandardButton.Apply)
+        self.buttons.addButton(QDialogButtonBox.StandardButton.Close)
+        self.buttons.button(QDialogButtonBox.StandardButton.Apply).setText("Merge")
+        
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).clicked.connect(self.findDuplicates)
+        self.buttons.button(QDialogButtonBox.StandardButton.Apply).clicked.connect(self.merge)
+        self.buttons.rejected.connect(self.reject)
+        layout.addRow(self.buttons)
+        
+        self.resultsLabel = QLabel("Choose a tileset and press OK.")
+        self.resultsLabel.setWordWrap(True)
+        layout.addRow(self.resultsLabel)
+        
+        self.copyResultButton = QPushButton(icons.ICON_COPY, "Copy result")
+        self.copyResultButton.clicked.connect(self.copyResult)
+        layout.addRow(self.copyResultButton)
+        
+        self.action: MultiActionWrapper|None = None
+    
+    def findDuplicates(self):
+        try:
+            tileset = self.projectData.getTileset(self.tilesetInput.value())
+            canonical, flips = tileset.findDuplicateMinitiles(self.flippedInput.isChecked())
+            
+            resultString = f"Duplicates in tileset {tileset.id}\n"
+            duplicates = numpy.flatnonzero(canonical != numpy.arange(len(canonical)))
+            if len(duplicates) > 0:
+                for i in duplicates.tolist():
+                    resultString += f"{i} = {canonical[i]}"
+                    match int(flips[i]):
+                        case 0x4000: resultString += " (H)"
+                        case 0x8000: resultString += " (V)"
+                        case 0xC000: resultString += " (HV)"
+                    resultString += ", "
+                resultString = resultString.removesuffix(", ")
+            else:
+                resultString += "No duplicate minitiles."
+            
+            self.resultsLabel.setText(resultString)
+        
+        except Exception as e:
+            logging.warning(traceback.format_exc())
+            return common.showErrorMsg("Unable to find duplicate minitiles",
+                                       f"There was an issue when finding duplicate minitiles.",
+                                       str(e))
+    
+    def merge(self):
+        try:
+            tileset = self.projectData.getTileset(self.tilesetInput.value())
+            canonical, flips = tileset.findDuplicateMinitiles(self.flippedInput.isChecked())
+            
+            metadata = tileset.arrangementArray()
+            ids = metadata & 0x3FF
+            # flipping a flipped minitile back is an XOR of the flip bits
+            remapped = ((metadata & ~numpy.uint16(0x3FF)) | canonical[ids]) ^ flips[ids]
+            
+            actions: list[ActionChangeArrangement] = []
+            for tile, index in numpy.argwhere(remapped != metadata).tolist():
+                actions.append(ActionChangeArrangement(tileset.tiles[tile], int(remapped[tile, index]), index))
+            
+            if len(actions) > 0:
+                self.action = MultiActionWrapper(actions, "Merge duplicate minitiles")
+            return self.accept()
+        
+        except Exception as e:
+            logging.warning(traceback.format_exc())
+            return common.showErrorMsg("Unable to merge duplicate minitiles",
+                                       f"There was an issue when merging duplicate minitiles.",
+                                       str(e))
+    
+    def copyResult(self):
+        text = self.resultsLabel.text()
+        if text != "Choose a tileset and press OK.": # dont copy the default output...
+            QApplication.clipboard().setText(text)
+    
+    @staticmethod
+    def findDuplicateMinitiles(parent, projectData: ProjectData, initTileset: int|None=None):
+        dialog = DuplicateMinitilesDialog(parent, projectData)
+        if initTileset:
+            dialog.tilesetInput.setValue(initTileset)
+        dialog.exec()
+        return dialog.action
+
+
 class ReplaceSwapMinitileInstancesDialog(QDialog):
     def __init__(self, parent, projectData: ProjectData, tileset: int):
         super().__init__(parent)
@@ -1843,14 +1937,93 @@ class ReplaceSwapMinitileInstancesDialog(QDialog):
             selectedTileset = projectData.getTileset(int(dialog.tileset.currentText()))
             swap = dialog.swap.isChecked()
             actions: list[ActionChangeArrangement] = []
-            for tile in selectedTileset.tiles:
-                for i in range(16):
-                    if tile.getMinitileID(i) == dialog.before.value():
-                        newMetadata = tile.getMetadata(i)
-                        newMetadata = newMetadata - dialog.before.value() + dialog.after.value() 
-                        actions.append(ActionChangeArrangement(tile, newMetadata, i))
-                    if swap and tile.getMinitileID(i) == dialog.after.value():
-                        newMetadata = tile.getMetadata(i)
-                        newMetadata = newMetadata - dialog.after.value() + dialog.before.value()
-                        actions.append(ActionChangeArrangement(tile, newMetadata, i))
-            return MultiActionWrapper(actions, "Replace/swap minitile instances")
\ No newline at end of file
+            before = dialog.before.value()
+            after = dialog.after.value()
+            for tile, i in selectedTileset.minitilePlacements[before]:
+                newMetadata = tile.getMetadata(i) - before + after
+                actions.append(ActionChangeArrangement(tile, newMetadata, i))
+            if swap and before != after:
+                for tile, i in selectedTileset.minitilePlacements[after]:
+                    newMetadata = tile.getMetadata(i) - after + before
+                    actions.append(ActionChangeArrangement(tile, newMetadata, i))
+            return MultiActionWrapper(actions, "Replace/swap minitile instances")
+
+class TileRemapDialog(QDialog):
+    def __init__(self, parent, projectData: ProjectData, tileset: int):
+        super().__init__(parent)
+        self.setWindowTitle("Merge and Compact Tiles")
+        self.projectData = projectData
+        
+        layout = QFormLayout()
+        self.setLayout(layout)
+        
+        label = QLabel("Merge tiles with identical arrangement and collision, and/or move used tiles to the start of the tileset. The map and map changes are updated to match.\n(Can be undone.)")
+        label.setWordWrap(True)
+        layout.addRow(label)
+        
+        self.tilesetInput = QSpinBox()
+        self.tilesetInput.setMaximum(len(self.projectData.tilesets)-1)
+        self.tilesetInput.setValue(tileset)
+        layout.addRow("Tileset", self.tilesetInput)
+        
+        self.mergeInput = QCheckBox("Merge duplicate tiles")
+        self.mergeInput.setChecked(True)
+        layout.addRow(self.mergeInput)
+        
+        self.compactInput = QCheckBox("Move used tiles to the start")
+        layout.addRow(self.compactInput)
+        
+        self.resultsLabel = QLabel()
+        self.resultsLabel.setWordWrap(True)
+        layout.addRow(self.resultsLabel)
+        
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addRow(self.buttons)
+        
+        self.tilesetInput.valueChanged.connect(self.calculate)
+        self.mergeInput.toggled.connect(self.calculate)
+        self.compactInput.toggled.connect(self.calculate)
+        
+        self.table: numpy.ndarray = None
+        self.permutation: numpy.ndarray|None = None
+        self.calculate()
+    
+    def calculate(self):
+        tileset = self.tilesetInput.value()
+        identity = numpy.arange(common.MAXTILES, dtype=numpy.uint16)
+        
+        if self.mergeInput.isChecked():
+            merge = self.projectData.getTileset(tileset).findDuplicateTiles()
+        else:
+            merge = identity
+        merged = int(numpy.count_nonzero(merge != identity))
+        
+        used = numpy.zeros(common.MAXTILES, dtype=numpy.bool_)
+        used[merge[self.projectData.usedTiles(tileset)]] = True
+        
+        if self.compactInput.isChecked():
+            order = numpy.concatenate((numpy.flatnonzero(used), numpy.flatnonzero(~used)))
+            self.permutation = numpy.argsort(order).astype(numpy.uint16)
+            self.table = self.permutation[merge]
+            moved = int(numpy.count_nonzero(self.permutation != identity))
+        else:
+            self.permutation = None
+            self.table = merge
+            moved = 0
+        
+        usedCount = int(numpy.count_nonzero(used))
+        self.resultsLabel.setText(f"{merged} duplicate tile(s) will be merged.\n"
+                                  f"{moved} tile(s) will be moved.\n"
+                                  f"{usedCount} tile(s) will be in use, leaving {common.MAXTILES-usedCount} free.")
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(merged > 0 or moved > 0)
+    
+    @staticmethod
+    def remapTiles(parent, projectData: ProjectData, tileset: int) -> ActionRemapTiles|None:
+        dialog = TileRemapDialog(parent, projectData, tileset)
+        result = dialog.exec()
+        if result == QDialog.DialogCode.Accepted:
+            action = ActionRemapTiles(projectData, dialog.table, dialog.permutation, dialog.tilesetInput.value())
+            action.setText("Merge and compact tiles")
+            return action
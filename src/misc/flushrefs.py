@@ -8,11 +8,12 @@
 # I don't even know that this will work, or even if there is a problem in the first place
 # as usual... better safe than sorry, right?
 
-from src.objects import enemy, npc, trigger, warp
+from src.objects import enemy, hotspot, npc, trigger, warp
 from src.widgets import input
 
 def flush():
     npc.MapEditorNPC.instances = []
     trigger.MapEditorTrigger.instances = []
     warp.MapEditorWarp.instances = []
+    hotspot.MapEditorHotspot.hotspots = []
     input.BaseChangerSpinbox.instances = []
@@ -0,0 +1,131 @@
+import contextlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class ImageCache(Generic[T]):
+    """Images decoded from files when they're first needed. Only the most recently used ones are kept.
+
+    Images that will probably be needed soon can be decoded ahead of time on a thread pool with `prefetch()`.
+    Images that are needed all at once can be decoded together with `held()`.
+    """
+    def __init__(self, decode: Callable[[str], T], maxSize: int):
+        """
+        Args:
+            decode (Callable[[str], T]): decodes the image at a path. Must be safe to call from any thread
+            maxSize (int): how many images to keep
+        """
+        self.decode = decode
+        self.maxSize = maxSize
+
+        self._images: OrderedDict[str, T] = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        # images that aren't removed, even past maxSize. Key: path, Value: how many held() contexts hold it
+        self._held: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor|None = None # made when first needed
+        # increased by clear(), so images decoded before it aren't kept
+        self._generation = 0
+
+    def get(self, path: str) -> T:
+        """Get the image at a path, decoding it if it isn't cached
+
+        Args:
+            path (str): the path of the image
+
+        Returns:
+            T: the decoded image
+        """
+        with self._lock:
+            if path in self._images:
+                self._images.move_to_end(path)
+                return self._images[path]
+            pending = self._pending.get(path)
+            generation = self._generation
+
+        if pending is not None:
+            return pending.result()
+
+        image = self.decode(path)
+        self._store(path, image, generation)
+        return image
+
+    def prefetch(self, paths: Iterable[str]):
+        """Start decoding images in the background, if they aren't cached yet
+
+        Args:
+            paths (Iterable[str]): the paths of the images
+        """
+        with self._lock:
+            for path in paths:
+                if path in self._images or path in self._pending:
+                    continue
+                if not self._pool:
+                    self._pool = ThreadPoolExecutor(thread_name_prefix="ebme-images")
+                self._pending[path] = self._pool.submit(self._decodeAhead, path, self._generation)
+
+    @contextlib.contextmanager
+    def held(self, paths: Iterable[str]) -> Iterator[list[T]]:
+        """Decode images in parallel, and keep them cached until the context exits, even if there are more than maxSize
+
+        Args:
+            paths (Iterable[str]): the paths of the images
+
+        Yields:
+            list[T]: the decoded images, in the same order as `paths`
+        """
+        paths = list(paths)
+        with self._lock:
+            self._held.update(paths)
+        try:
+            self.prefetch(paths)
+            yield [self.get(i) for i in paths]
+        finally:
+            with self._lock:
+                self._held.subtract(paths)
+                self._held += Counter() # drop paths that aren't held anymore
+                self._evict()
+
+    def clear(self):
+        """Forget all images, such as when a project is (re)loaded"""
+        with self._lock:
+            self._images.clear()
+            self._pending.clear()
+            self._generation += 1
+
+    def _decodeAhead(self, path: str, generation: int) -> T:
+        try:
+            image = self.decode(path)
+            self._store(path, image, generation)
+            return image
+        finally:
+            with self._lock:
+                if generation == self._generation:
+                    self._pending.pop(path, None)
+
+    def _store(self, path: str, image: T, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._images[path] = image
+            self._images.move_to_end(path)
+            self._evict()
+
+    def _evict(self):
+        # oldest first. Call with the lock held
+        excess = len(self._images) - self.maxSize
+        if excess > 0:
+            for path in [i for i in self._images if i not in self._held][:excess]:
+                del self._images[path]
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return path in self._images
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._images)
@@ -0,0 +1,35 @@
+# for getting pixel data into Qt without going through PIL.ImageQt
+
+import numpy
+from PIL import Image
+from PySide6.QtGui import QImage, QPixmap
+
+
+class ArrayQImage(QImage):
+    """A QImage that uses a NumPy array's memory directly, and keeps the array alive for as long as it exists."""
+    def __init__(self, array: numpy.ndarray):
+        """
+        Args:
+            array (numpy.ndarray): uint8 pixels of shape (height, width, 4) in RGBA order. Copied only if it isn't C-contiguous.
+        """
+        if array.ndim != 3 or array.shape[2] != 4 or array.dtype != numpy.uint8:
+            raise ValueError(f"Expected a uint8 array of shape (height, width, 4), recieved {array.dtype} {array.shape}")
+
+        self._array = numpy.ascontiguousarray(array)
+        super().__init__(self._array.data, self._array.shape[1], self._array.shape[0],
+                         self._array.strides[0], QImage.Format.Format_RGBA8888)
+
+
+def arrayToQImage(array: numpy.ndarray) -> QImage:
+    """Wrap an RGBA array of shape (height, width, 4) in a QImage, without copying it"""
+    return ArrayQImage(array)
+
+def arrayToQPixmap(array: numpy.ndarray) -> QPixmap:
+    """Convert an RGBA array of shape (height, width, 4) to a QPixmap. The pixel data is copied once, straight to the pixmap."""
+    return QPixmap.fromImage(ArrayQImage(array))
+
+def imageToArray(img: Image.Image) -> numpy.ndarray:
+    """Get the pixels of a PIL Image as an RGBA array of shape (height, width, 4)"""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    return numpy.asarray(img)
@@ -0,0 +1,144 @@
+from typing import Callable, Generic, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+class SpatialGrid(Generic[T]):
+    """Uniform grid of map objects, for finding objects by location without checking every one of them.
+
+    Each object is filed under every cell its bounds touch. Bounds are (x1, y1, x2, y2) in pixels, inclusive,
+    and come from the `bounds` function given to the grid, so the grid must be told with `update()` when an object moves.
+    Objects are compared by identity.
+    """
+    CELLSIZE = 256 # one bisector
+
+    def __init__(self, bounds: Callable[[T], tuple[int, int, int, int]], objects: Iterable[T] = ()):
+        """
+        Args:
+            bounds (Callable): gets the area (x1, y1, x2, y2) an object covers on the map, in pixels
+            objects (Iterable, optional): objects to add. Defaults to ().
+        """
+        self.bounds = bounds
+        self.cells: dict[tuple[int, int], dict[T, None]] = {}
+        self._boundsOf: dict[T, tuple[int, int, int, int]] = {}
+        self.rebuild(objects)
+
+    @classmethod
+    def cellsInRect(cls, x1: float, y1: float, x2: float, y2: float, margin: int=0) -> list[tuple[int, int]]:
+        """Get the cells covering an area of the map
+
+        Args:
+            x1, y1, x2, y2 (float): the area, in pixels (inclusive)
+            margin (int, optional): extra cells to include on each side. Defaults to 0.
+
+        Returns:
+            list[tuple[int, int]]: (x, y) of each cell
+        """
+        cx1 = int(x1 // cls.CELLSIZE) - margin
+        cy1 = int(y1 // cls.CELLSIZE) - margin
+        cx2 = int(x2 // cls.CELLSIZE) + margin
+        cy2 = int(y2 // cls.CELLSIZE) + margin
+        return [(x, y) for y in range(cy1, cy2+1) for x in range(cx1, cx2+1)]
+
+    def rebuild(self, objects: Iterable[T]):
+        """Replace the contents of the grid"""
+        self.cells = {}
+        self._boundsOf = {}
+        for i in objects:
+            self.insert(i)
+
+    def insert(self, obj: T):
+        """Add an object to the grid at its current bounds"""
+        bounds = tuple(self.bounds(obj))
+        self._boundsOf[obj] = bounds
+        for i in self.cellsInRect(*bounds):
+            self.cells.setdefault(i, {})[obj] = None
+
+    def remove(self, obj: T):
+        """Remove an object from the grid"""
+        for i in self.cellsInRect(*self._boundsOf.pop(obj)):
+            self.cells[i].pop(obj)
+
+    def update(self, obj: T):
+        """Re-file an object after it's moved or resized"""
+        if self._boundsOf.get(obj) != tuple(self.bounds(obj)):
+            self.remove(obj)
+            self.insert(obj)
+
+    def __contains__(self, obj: T) -> bool:
+        return obj in self._boundsOf
+
+    def __len__(self) -> int:
+        return len(self._boundsOf)
+
+    def cellsOf(self, obj: T) -> list[tuple[int, int]]:
+        """Get the cells an object is filed under"""
+        return self.cellsInRect(*self._boundsOf[obj])
+
+    def objectsInCell(self, cell: tuple[int, int]) -> list[T]:
+        """Get every object touching a cell"""
+        return list(self.cells.get(cell, ()))
+
+    def objectsInRect(self, x1: float, y1: float, x2: float, y2: float) -> list[T]:
+        """Get every object whose bounds overlap an area
+
+        Args:
+            x1, y1, x2, y2 (float): the area, in pixels (inclusive)
+
+        Returns:
+            list: matching objects, each only once
+        """
+        found = {}
+        for cell in self.cellsInRect(x1, y1, x2, y2):
+            for i in self.cells.get(cell, ()):
+                if i in found:
+                    continue
+                bx1, by1, bx2, by2 = self._boundsOf[i]
+                if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                    found[i] = None
+        return list(found)
+
+    def _distance(self, obj: T, x: float, y: float) -> float:
+        bx1, by1, bx2, by2 = self._boundsOf[obj]
+        dx = max(bx1 - x, 0, x - bx2)
+        dy = max(by1 - y, 0, y - by2)
+        return (dx*dx + dy*dy) ** 0.5
+
+    def nearest(self, x: float, y: float, maxDistance: float|None = None) -> T|None:
+        """Get the object closest to a point
+
+        Args:
+            x, y (float): the point, in pixels
+            maxDistance (float, optional): ignore objects further than this. Defaults to None (no limit).
+
+        Returns:
+            T|None: the closest object (by distance to its bounds), or None if there isn't one
+        """
+        if not self._boundsOf:
+            return None
+
+        cx, cy = int(x // self.CELLSIZE), int(y // self.CELLSIZE)
+        # search outwards in rings of cells. Stop once the ring can't contain anything closer.
+        # the ring can also stop at the furthest occupied cell
+        xs = [i[0] for i in self.cells if self.cells[i]]
+        ys = [i[1] for i in self.cells if self.cells[i]]
+        maxRing = max(abs(cx - min(xs)), abs(cx - max(xs)), abs(cy - min(ys)), abs(cy - max(ys)))
+
+        best = None
+        bestDistance = maxDistance if maxDistance is not None else float("inf")
+        for ring in range(0, maxRing+1):
+            # closest any point in this ring can be
+            if (ring-1) * self.CELLSIZE > bestDistance:
+                break
+            if ring == 0:
+                cells = [(cx, cy)]
+            else:
+                cells = [(cx+i, cy-ring) for i in range(-ring, ring+1)] + [(cx+i, cy+ring) for i in range(-ring, ring+1)] + \
+                        [(cx-ring, cy+i) for i in range(-ring+1, ring)] + [(cx+ring, cy+i) for i in range(-ring+1, ring)]
+            for cell in cells:
+                for i in self.cells.get(cell, ()):
+                    distance = self._distance(i, x, y)
+                    if distance <= bestDistance and (best is None or distance < bestDistance):
+                        best = i
+                        bestDistance = distance
+        return best
@@ -1,3 +1,4 @@
+import numpy
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtWidgets import QTreeWidget, QTreeWidgetItem
 
@@ -16,6 +17,27 @@ class MapChange:
         else:
             index = event
         common.moveListItem(self.events, index, target)
+    
+    def remapTiles(self, table: numpy.ndarray):
+        """Remap the tile IDs of every tile change in this tileset's events.
+
+        Args:
+            table (numpy.ndarray): new tile ID, indexed by old tile ID. Does not need to be a permutation (several tiles can be merged into one).
+        """
+        moved = numpy.flatnonzero(table != numpy.arange(len(table)))
+        if len(moved) == 0:
+            return
+        for event in self.events:
+            event.remapTiles(table, moved)
+    
+    def usedTiles(self) -> set[int]:
+        """Get the IDs of all tiles used by the tile changes of this tileset's events."""
+        used = set()
+        for event in self.events:
+            for change in event.changes:
+                used.add(change.before)
+                used.add(change.after)
+        return used
 
 class MapChangeEvent:
     def __init__(self, tileset: int, flag: int, changes: list["TileChange"], comment: str=None):
@@ -23,6 +45,47 @@ class MapChangeEvent:
         self.flag = flag
         self.changes = changes
         self.comment = comment
+        
+        # Key: tile ID, Value: tile changes with that ID as their before or after
+        # Built on demand. Anything that edits the tile changes should call invalidateTileIndex().
+        self._tileIndex: dict[int, list[TileChange]]|None = None
+    
+    def invalidateTileIndex(self):
+        self._tileIndex = None
+    
+    def changesUsingTile(self, tile: int) -> list["TileChange"]:
+        """Get all tile changes in this event which have this tile ID as their before or after."""
+        if self._tileIndex is None:
+            self._tileIndex = {}
+            for change in self.changes:
+                self._tileIndex.setdefault(change.before, []).append(change)
+                if change.after != change.before:
+                    self._tileIndex.setdefault(change.after, []).append(change)
+        return self._tileIndex.get(tile, [])
+    
+    def remapTiles(self, table: numpy.ndarray, moved: numpy.ndarray):
+        """Remap the tile IDs of tile changes in this event. Only changes using moved tiles are touched.
+
+        Args:
+            table (numpy.ndarray): new tile ID, indexed by old tile ID
+            moved (numpy.ndarray): tile IDs where `table` is not the identity
+        """
+        affected: dict[int, TileChange] = {}
+        for tile in moved.tolist():
+            for change in self.changesUsingTile(tile):
+                affected[id(change)] = change
+        
+        if not affected:
+            return
+        
+        for change in affected.values():
+            change.before = int(table[change.before])
+            change.after = int(table[change.after])
+        
+        # the index entries move with their tiles
+        entries = {tile: self._tileIndex.pop(tile) for tile in moved.tolist() if tile in self._tileIndex}
+        for tile, changes in entries.items():
+            self._tileIndex.setdefault(int(table[tile]), []).extend(changes)
     
     def moveTileChangeTo(self, change: "TileChange|int", target: int):
         if isinstance(change, TileChange):
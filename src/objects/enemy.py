@@ -1,7 +1,6 @@
 import math
 from typing import TYPE_CHECKING
 
-from PIL import ImageQt
 # Qt subclasses for better organisation and control
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPixmap
@@ -13,6 +12,7 @@ from src.misc.coords import EBCoords
 
 if TYPE_CHECKING:
     from src.coilsnake.project_data import ProjectData
+    from src.objects.sprite import BattleSprite, Sprite
     
 
 
@@ -52,6 +52,24 @@ class EnemyMapGroup:
 
         EnemyMapGroup.colours[self.groupID] = EnemyMapGroup.colourGen(self.groupID)
 
+    def usedSprites(self, projectData: "ProjectData") -> tuple[set["Sprite"], set["BattleSprite"]]:
+        """Get the overworld and battle sprites of the enemies in this group
+
+        Args:
+            projectData (ProjectData): the project
+
+        Returns:
+            tuple[set[Sprite], set[BattleSprite]]: overworld sprites, battle sprites
+        """
+        sprites = set()
+        battleSprites = set()
+        for i in list(self.subGroup1.values()) + list(self.subGroup2.values()):
+            for e in projectData.enemyGroups[i["Enemy Group"]].enemies:
+                sprites.add(projectData.getSprite(projectData.enemySprites[e["Enemy"]]))
+                if e["Enemy"] in projectData.battleSprites: # Not all enemies have a battle sprite
+                    battleSprites.add(projectData.getBattleSprite(e["Enemy"]))
+        return sprites, battleSprites
+
     def renderBg(self):
         pixmap = QPixmap(64, 64)
         pixmap.fill(QColor.fromRgb(self.colour[0], self.colour[1], self.colour[2], 178))
@@ -70,11 +88,11 @@ class EnemyMapGroup:
         for i in self.subGroup1.values():
             for e in projectData.enemyGroups[i["Enemy Group"]].enemies:
                 spr = projectData.getSprite(projectData.enemySprites[e["Enemy"]])
-                sprites1.append(QPixmap.fromImage(ImageQt.ImageQt(spr.renderFacingImg(4))))
+                sprites1.append(spr.renderFacingPixmap(4))
         for i in self.subGroup2.values():
             for e in projectData.enemyGroups[i["Enemy Group"]].enemies:
                 spr = projectData.getSprite(projectData.enemySprites[e["Enemy"]])
-                sprites2.append(QPixmap.fromImage(ImageQt.ImageQt(spr.renderFacingImg(4))))
+                sprites2.append(spr.renderFacingPixmap(4))
 
         if len(sprites1) > 0:
             distribution = 42//len(sprites1)
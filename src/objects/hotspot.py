@@ -39,6 +39,7 @@ class Hotspot:
     
 class MapEditorHotspot(QGraphicsRectItem):
     hotspots = []
+    shown = True
     def __init__(self, id: int, start: EBCoords, end: EBCoords, colour: tuple[int, int, int]):
         super().__init__(start.x, start.y, end.x-start.x, end.y-start.y)
         
@@ -50,6 +51,7 @@ class MapEditorHotspot(QGraphicsRectItem):
         self.setAcceptHoverEvents(True)
         self.setFlag(QGraphicsRectItem.GraphicsItemFlag.ItemIsSelectable)
         
+        self.setVisible(MapEditorHotspot.shown)
         MapEditorHotspot.hotspots.append(self)
         
         self.actionMode = MOUSEACTION.MOVE
@@ -194,7 +196,7 @@ class MapEditorHotspot(QGraphicsRectItem):
                     end = EBCoords(self.rect().right(), self.rect().bottom())
                     
                     if start != self.scene().state.currentHotspot.start or end != self.scene().state.currentHotspot.end:
-                        action = ActionChangeHotspotLocation(self.scene().state.currentHotspot, start, end)
+                        action = ActionChangeHotspotLocation(self.scene().projectData, self.scene().state.currentHotspot, start, end)
                     
                         self.scene().undoStack.push(action)
                         self.scene().parent().sidebarHotspot.fromHotspot()
@@ -205,10 +207,12 @@ class MapEditorHotspot(QGraphicsRectItem):
 
     @classmethod
     def showHotspots(cls):
+        MapEditorHotspot.shown = True
         for i in cls.hotspots:
             i.show()
     
     @classmethod
     def hideHotspots(cls):
+        MapEditorHotspot.shown = False
         for i in cls.hotspots:
             i.hide()          
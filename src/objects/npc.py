@@ -3,22 +3,20 @@ import math
 import uuid
 from typing import TYPE_CHECKING
 
-from PIL import ImageQt
-from PySide6.QtCore import QPoint, QSettings, Qt
+from PySide6.QtCore import QPoint, QPointF, QRectF, QSettings, Qt
 from PySide6.QtGui import (QBitmap, QBrush, QColor, QImage, QKeySequence,
-                           QPainter, QPainterPath, QPen, QPixmap, QRegion)
+                           QPainter, QPainterPath, QPen, QPixmap)
 from PySide6.QtWidgets import (QGraphicsItem, QGraphicsPixmapItem,
-                               QGraphicsRectItem,
                                QGraphicsSceneContextMenuEvent,
-                               QGraphicsSceneMouseEvent,
-                               QGraphicsSimpleTextItem, QMenu, QStyle)
+                               QGraphicsSceneMouseEvent, QMenu, QStyle,
+                               QStyleOptionGraphicsItem)
 
 import src.misc.common as common
 import src.misc.icons as icons
 from src.actions.npc_actions import ActionMoveNPCInstance
 from src.misc.coords import EBCoords
 from src.objects.sprite import Sprite
-from src.objects.tile import MapTile
+from src.objects.tile import MapTile, MapTileGraphic
 
 if TYPE_CHECKING:
     from src.mapeditor.map.map_scene import MapEditorScene
@@ -30,6 +28,8 @@ REDPEN = QPen(Qt.GlobalColor.red)
 CYANPEN = QPen(Qt.GlobalColor.cyan)
 YELLOWPEN = QPen(Qt.GlobalColor.yellow)
 BLUEPEN = QPen(Qt.GlobalColor.blue)
+SELECTIONPEN = QPen(Qt.GlobalColor.white, 0)
+SELECTIONDASHPEN = QPen(Qt.GlobalColor.black, 0, Qt.PenStyle.DashLine)
 
 class NPC:
     """NPC table entry"""
@@ -91,6 +91,7 @@ class NPCInstance:
     
 class MapEditorNPC(QGraphicsPixmapItem):
     instances = []
+    shown = True
     
     NPCIDsEnabled = False
     visualBoundsEnabled = False
@@ -103,34 +104,28 @@ class MapEditorNPC(QGraphicsPixmapItem):
 
         self.id = id
         self.uuid = uuid
+        self.isDummy = False
 
-        self.numBgRect = QGraphicsRectItem(self)
-        self.numShadow = QGraphicsSimpleTextItem(self)
-        self.num = QGraphicsSimpleTextItem(self)
-        self.visualBounds = QGraphicsRectItem(self)
-        self.collisionBounds = QGraphicsRectItem(self)
-            
-        self.numBgRect.setOpacity(0.5)
-        self.numBgRect.setBrush(BLACKBRUSH)
-        self.numBgRect.setPen(Qt.PenStyle.NoPen)
-        self.num.setFont("EBMain")
-        self.numShadow.setFont("EBMain")
-        self.num.setBrush(WHITEBRUSH)
-        self.visualBounds.setPen(REDPEN)
-        self.collisionBounds.setPen(CYANPEN)
+        # the ID display and bounds are all drawn in paint(), rather than being child items,
+        # so that each NPC is just one item in the scene. Their visibility comes from the class flags.
+        self.text = ""
+        self.numRect = QRectF()
+        self.visualBoundsRect = QRectF()
+        # collision bounds are relative to collisionBoundsOffset
+        self.collisionBoundsRect = QRectF()
+        self.collisionBoundsOffset = QPointF()
+        # whether the ripple is drawn, which makes the item bigger. Updated by updateInWater
+        self.inWater = False
+        # composited foreground drawn over the sprite, and what it was made from
+        self._foregroundMask: QPixmap|None = None
+        self._foregroundMaskKey: tuple|None = None
 
         self.setPos(coords.x, coords.y)
         self.setZValue(common.MAPZVALUES.NPC)
-        self.numBgRect.setFlag(QGraphicsItem.ItemIsSelectable, False)
-        self.numShadow.setFlag(QGraphicsItem.ItemIsSelectable, False)
-        self.num.setFlag(QGraphicsItem.ItemIsSelectable, False)
-        self.visualBounds.setFlag(QGraphicsItem.ItemIsSelectable, False)
-        self.collisionBounds.setFlag(QGraphicsItem.ItemIsSelectable, False)
 
         self.setFlag(QGraphicsItem.ItemIsMovable)
         self.setFlag(QGraphicsItem.ItemIsSelectable)
         
-        self.isDummy = False
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         
         self.facing = common.DIRECTION8.up
@@ -138,28 +133,37 @@ class MapEditorNPC(QGraphicsPixmapItem):
         self.sprite = sprite
         self.setSprite(sprite)
         self.setText(str(self.id).zfill(4))
+        self.setVisible(MapEditorNPC.shown)
 
-        if not MapEditorNPC.NPCIDsEnabled:
-            self.num.hide()
-            self.numShadow.hide()
-            self.numBgRect.hide()
+    def setText(self, text: str):
+        self.text = text
+        self.update()
         
-        if not MapEditorNPC.visualBoundsEnabled:
-            self.visualBounds.hide()
+    def boundingRect(self):
+        rect = super().boundingRect()
+        # the ripple sticks out of the sprite
+        if self.inWater:
+            rect = rect.united(self.rippleRect())
+        if self.isDummy:
+            return rect
         
-        if not MapEditorNPC.collisionBoundsEnabled:
-            self.collisionBounds.hide()
-
-    def setText(self, text: str):
-        self.numShadow.setText(text)
-        self.num.setText(text)
+        if MapEditorNPC.NPCIDsEnabled:
+            rect = rect.united(self.numRect)
+        if MapEditorNPC.visualBoundsEnabled:
+            rect = rect.united(self.visualBoundsRect.adjusted(-0.5, -0.5, 0.5, 0.5))
+        if MapEditorNPC.collisionBoundsEnabled:
+            rect = rect.united(self.collisionBoundsRect.translated(self.collisionBoundsOffset).adjusted(-0.5, -0.5, 0.5, 0.5))
+        return rect
 
     # reimplementing function to allow ALL of visible NPC area to be selected.
     # otherwise only the opaque pixels will be detected, which is an issue for
     # small or invisible sprites
     def shape(self):
         path = QPainterPath()
-        path.addRect(self.boundingRect())
+        path.addRect(super().boundingRect())
+        # the ID display used to be a child item, which passed its clicks on to us
+        if MapEditorNPC.NPCIDsEnabled and not self.isDummy:
+            path.addRect(self.numRect)
         return path
         
     def setSprite(self, sprite: Sprite, facing: common.DIRECTION8|None = None, anim: int|None = None, updateCollisionBounds: bool=True):
@@ -170,15 +174,15 @@ class MapEditorNPC(QGraphicsPixmapItem):
         if anim is not None:
             self.anim = anim
             
-        img = sprite.renderFacingImg(self.facing.value, self.anim)
-        self.setPixmap(QPixmap.fromImage(ImageQt.ImageQt(img)))
+        pixmap = sprite.renderFacingPixmap(self.facing.value, self.anim)
+        if pixmap.cacheKey() != self.pixmap().cacheKey(): # frames are shared, so this is cheap to check
+            self.setPixmap(pixmap)
         if updateCollisionBounds:
             self.setCollisionBounds(*sprite.getFacingCollision(self.facing.value))
         
     def setFacing(self, facing: common.DIRECTION8):
         self.facing = facing
-        img = self.sprite.renderFacingImg(self.facing.value, self.anim)
-        self.setPixmap(QPixmap.fromImage(ImageQt.ImageQt(img)))
+        self.setPixmap(self.sprite.renderFacingPixmap(self.facing.value, self.anim))
         self.setCollisionBounds(*self.sprite.getFacingCollision(self.facing.value))
     
     # reimplementing function to properly offset and reposition image,
@@ -189,14 +193,13 @@ class MapEditorNPC(QGraphicsPixmapItem):
     def setPixmap(self, pixmap: QPixmap | QImage | str) -> None:
         offsetX = pixmap.width()//2
         offsetY = pixmap.height()-8 
+        self.prepareGeometryChange()
         self.setOffset(offsetX*-1, offsetY*-1)
-        self.numBgRect.setRect(0-offsetX, -13-offsetY, 27, 13)
-        self.numShadow.setPos(2-offsetX, -11-offsetY)
-        self.num.setPos(1-offsetX, -12-offsetY)
-        self.visualBounds.setRect(0-offsetX, 
-                                  0-offsetY,
-                                  pixmap.width(), 
-                                  pixmap.height())
+        self.numRect = QRectF(0-offsetX, -13-offsetY, 27, 13)
+        self.visualBoundsRect = QRectF(0-offsetX, 
+                                       0-offsetY,
+                                       pixmap.width(), 
+                                       pixmap.height())
 
         return super().setPixmap(pixmap)
     
@@ -261,164 +264,223 @@ class MapEditorNPC(QGraphicsPixmapItem):
             case (64, 80):
                 offsetY += -7
 
-        self.collisionBounds.setRect(-w, -h, w*2, h)
-        self.collisionBounds.setY(self.sprite.size[1] + self.offset().y())
+        self.prepareGeometryChange()
+        self.collisionBoundsRect = QRectF(-w, -h, w*2, h)
+        self.collisionBoundsOffset = QPointF(0, self.sprite.size[1] + self.offset().y())
         
         # see todo above
-        # self.collisionBounds.setY(offsetY)
+        # self.collisionBoundsOffset = QPointF(0, offsetY)
         
-    def sampleCollision(self) -> int:
-        colliderTopLeft = self.mapToScene(self.collisionBounds.rect().topLeft())
-        colliderTopLeft = EBCoords(colliderTopLeft.x(), colliderTopLeft.y()+self.collisionBounds.y())
+    def sampleCollision(self, pos: QPointF|None = None) -> int:
+        """Get the map collision under this NPC's collision bounds
+
+        Args:
+            pos (QPointF, optional): check as if the NPC was here instead. Defaults to None (where it is).
+
+        Returns:
+            int: every collision bit set under it
+        """
+        if pos is None:
+            pos = self.pos()
+        colliderTopLeft = pos + self.collisionBoundsRect.topLeft()
+        colliderTopLeft = EBCoords(colliderTopLeft.x(), colliderTopLeft.y()+self.collisionBoundsOffset.y())
         colliderTopLeft.restrictToMap()
-        colliderBottomRight = self.mapToScene(self.collisionBounds.rect().bottomRight())
-        colliderBottomRight = EBCoords(colliderBottomRight.x()-1, colliderBottomRight.y()+self.collisionBounds.y()-1)
+        colliderBottomRight = pos + self.collisionBoundsRect.bottomRight()
+        colliderBottomRight = EBCoords(colliderBottomRight.x()-1, colliderBottomRight.y()+self.collisionBoundsOffset.y()-1)
         colliderBottomRight.restrictToMap()
         return self.scene().sampleCollisionRegion(colliderTopLeft, colliderBottomRight)
     
+    def updateInWater(self, collision: int|None = None):
+        """Check whether this NPC is standing in water, and resize it to fit the ripple if that changed
+
+        Args:
+            collision (int, optional): the collision under it, if already known. Defaults to None (sample it).
+        """
+        if collision is None:
+            collision = self.sampleCollision()
+        inWater = bool(collision & common.COLLISIONBITS.WATER)
+        if inWater != self.inWater:
+            self.prepareGeometryChange()
+            self.inWater = inWater
+    
+    def paintSelection(self, painter: QPainter, rect: QRectF):
+        """Draw what Qt would draw around a selected item, but around just `rect`"""
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(SELECTIONPEN)
+        painter.drawRect(rect)
+        painter.setPen(SELECTIONDASHPEN)
+        painter.drawRect(rect)
+    
     # reimplementing function to highlight the border as that obscures the vanilla Qt selection border
     def paint(self, painter: QPainter, option, a):        
-        if QStyle.StateFlag.State_Selected in option.state:
-            self.visualBounds.setPen(YELLOWPEN)
-            self.collisionBounds.setPen(BLUEPEN)
-        else:
-            self.visualBounds.setPen(REDPEN)
-            self.collisionBounds.setPen(CYANPEN)
-
-
         collision = self.sampleCollision()
+        # the map can change under us without the NPC moving
+        self.updateInWater(collision)
+        selected = QStyle.StateFlag.State_Selected in option.state
         
-        if collision & (common.COLLISIONBITS.WATER):
+        if self.inWater:
             swimflag = self.sprite.getSwimFlag(self.facing.value, self.anim)
             
             # sinking into the water
-            pixmapBackup = self.pixmap()
             if swimflag:
-                offset = 0
+                sunk = 0
             elif collision & (common.COLLISIONBITS.SUNSTROKE):
-                offset = 16
+                sunk = 16
             else: 
-                offset = 8
-            self.setPixmap(pixmapBackup.copy(0, 0, pixmapBackup.width(), pixmapBackup.height()-offset))
-            super().paint(painter, option, a)
+                sunk = 8
+            pixmap = self.sprite.renderFacingPixmap(self.facing.value, self.anim, sunk)
+            painter.drawPixmap(self.offset(), pixmap)
+            if selected:
+                # around what's left above the water
+                self.paintSelection(painter, QRectF(self.offset(), pixmap.size()))
             
             # draw ripple
-            ripple = QPixmap.fromImage(self.scene().projectData.getRipple(self.sprite))
-            offsetX = -ripple.width()//2
-            offsetY = 0
-            # this adjustment seems accurate from testing
-            # have not checked code for this
-            if ripple.width() == 16:
-                offsetY = -2
-            painter.drawPixmap(offsetX, offsetY, ripple)
-            
-            # prevents artefacts as we are painting outisde of our bounding rect
-            self.scene().update(self.sceneBoundingRect().adjusted(-32, -32, 32, 32))
-            
-            self.setPixmap(pixmapBackup)
-        else:  
-            super().paint(painter, option, a)
+            painter.drawPixmap(self.rippleRect().topLeft(), self.scene().projectData.getRipple(self.sprite))
+        else:
+            # Qt would draw the selection around the whole bounding rect, overlays and all
+            spriteOption = QStyleOptionGraphicsItem(option)
+            spriteOption.state &= ~QStyle.StateFlag.State_Selected
+            super().paint(painter, spriteOption, a)
+            if selected:
+                self.paintSelection(painter, QRectF(self.offset(), self.pixmap().size()))
+        
+        if QSettings().value("mapeditor/MaskNPCsWithForeground", type=bool, defaultValue=True) \
+            and collision & (common.COLLISIONBITS.FOREGROUNDBOTTOM | common.COLLISIONBITS.FOREGROUNDTOP):
+            # paint the foreground of the tiles we intersect with on top.
+            # BUG masks can overlap with other NPCs, looks weird
+            painter.drawPixmap(self.offset(), self.foregroundMask(collision))
+                    
+        if not self.isDummy:
+            self.paintOverlays(painter, selected)
+    
+    def rippleRect(self) -> QRectF:
+        """Get where the ripple is drawn when this NPC is in water"""
+        ripple = self.scene().projectData.getRipple(self.sprite)
+        offsetY = 0
+        # this adjustment seems accurate from testing
+        # have not checked code for this
+        if ripple.width() == 16:
+            offsetY = -2
+        return QRectF(-ripple.width()//2, offsetY, ripple.width(), ripple.height())
+    
+    def foregroundGraphic(self, tile: MapTile) -> MapTileGraphic:
+        """Get the graphic of a tile (in the palette being previewed, if any), with its foreground rendered"""
+        scene = self.scene()
+        if scene.state.isPreviewingPalette():
+            paletteGroup, palette = scene.state.previewingPaletteGroup, scene.state.previewingPalette
+        else:
+            paletteGroup, palette = tile.palettegroup, tile.palette
+        
+        graphic = scene.projectData.getTileGraphic(tile.tileset, paletteGroup, palette, tile.tile)
+        if not graphic.hasRenderedFg:
+            graphic.renderFg(scene.projectData.getTileset(tile.tileset),
+                             scene.projectData.getPaletteGroup(paletteGroup).palettes[palette])
+        return graphic
+    
+    def foregroundMask(self, collision: int) -> QPixmap:
+        """Get the foreground of the tiles this NPC is standing in, cut to its sprite.
+        It's only drawn again when the NPC, its sprite, those tiles or the overlays on them change.
+
+        Args:
+            collision (int): the collision of where the NPC is standing
+
+        Returns:
+            QPixmap: the mask, to draw on top of the sprite
+        """
+        scene = self.scene()
+        width, height = self.pixmap().width(), self.pixmap().height()
+        left = math.ceil(self.x() + self.offset().x())
+        top = math.ceil(self.y() + self.offset().y())
+        
+        x0, y0 = max(left // 32, 0), max(top // 32, 0)
+        x1 = min((left + width) // 32, common.EBMAPWIDTH // 32 - 1)
+        y1 = min((top + height) // 32, common.EBMAPHEIGHT // 32 - 1)
+        graphics: list[tuple[int, int, MapTileGraphic]] = []
+        for y in range(y0, y1+1):
+            for x in range(x0, x1+1):
+                tile = scene.projectData.getTile(EBCoords.fromTile(x, y))
+                graphics.append((x*32 - left, y*32 - top, self.foregroundGraphic(tile)))
+        
+        showCollision = scene.state.mode == common.MODEINDEX.ALL and scene.state.allModeShowsCollision
+        brush = scene.grid.brush() if scene.grid.isVisible() else None
+        bottomOnly = bool(collision & common.COLLISIONBITS.FOREGROUNDBOTTOM) and not (collision & common.COLLISIONBITS.FOREGROUNDTOP)
         
-        if QSettings().value("mapeditor/MaskNPCsWithForeground", type=bool, defaultValue=True):
-        # get the mask based on tiles we intersect with
-        # what we actually do is just kinda paint on top. a real mask would be nice...
-        # BUG masks can overlap with other NPCs, looks weird
-        # QRegion mask?
+        key = (left, top, width, height, bottomOnly,
+               tuple(graphic.renderedFg.cacheKey() for _, _, graphic in graphics),
+               scene.collisionMap.array[y0*4:(y1+1)*4, x0*4:(x1+1)*4].tobytes() if showCollision else None,
+               brush.texture().cacheKey() if brush else None)
+        if key == self._foregroundMaskKey:
+            return self._foregroundMask
         
-            topLeft = self.mapToScene(self.boundingRect().topLeft())
-            bottomRight = self.mapToScene(self.boundingRect().bottomRight())
+        mask = QPixmap(width, height)
+        mask.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(mask)
+        if bottomOnly:
+            half = (8 * round((height//2)/8))
+            painter.setClipRect(0, height-half, width, half)
             
-            collision = self.sampleCollision()
+        for x, y, graphic in graphics:
+            painter.drawPixmap(x, y, graphic.renderedFg)
+        
+        # overlays only go on the foreground itself
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceAtop)
+        painter.setPen(Qt.PenStyle.NoPen)
+        if showCollision:
+            presets = QSettings().value("presets/presets", defaultValue=common.DEFAULTCOLLISIONPRESETS)
+            presetColours: dict[int, int] = {}
+            for _, value, colour in json.loads(presets):
+                presetColours[value] = colour
             
-            if collision & (common.COLLISIONBITS.FOREGROUNDBOTTOM | common.COLLISIONBITS.FOREGROUNDTOP):
-                height = self.pixmap().rect().height()
-                half = (8 * round((height//2)/8))
-                diff = height-half
-                adjusted = self.pixmap().rect().adjusted(self.offset().x(),
-                                                         self.offset().y(),
-                                                         0, 0)
-                bottomHalfRect = adjusted.adjusted(0, diff, 0, 0)
-                
-                # get the tiles we intersect with
-                x0, y0 = EBCoords(int(topLeft.x()), int(topLeft.y())).coordsTile()
-                x1, y1 = EBCoords(int(bottomRight.x()), int(bottomRight.y())).coordsTile()
-                tiles: list[MapTile] = []
-                for y in range(y0, y1+1):
-                    for x in range(x0, x1+1):
+            painter.setOpacity(0.7)
+            region = scene.collisionMap.array[y0*4:(y1+1)*4, x0*4:(x1+1)*4].tolist()
+            for cy, row in enumerate(region):
+                for cx, minitileCollision in enumerate(row):
+                    if minitileCollision:
                         try:
-                            tiles.append(self.scene().projectData.getTile(EBCoords.fromTile(x, y)))
-                        except IndexError:
-                            pass
-
-                grid = self.scene().grid
-                if grid.isVisible():
-                    brush = grid.brush()
-                else:
-                    brush = None
-                        
-                previewing = self.scene().state.isPreviewingPalette()
-                for tile in tiles:
-                    if not previewing:
-                        graphic = self.scene().projectData.getTileGraphic(tile.tileset,
-                                                                        tile.palettegroup,
-                                                                        tile.palette,
-                                                                        tile.tile)
-                        
-                        if not graphic.hasRenderedFg:
-                                palette = self.scene().projectData.getPaletteGroup(tile.palettegroup).palettes[tile.palette]
-                                graphic.renderFg(self.scene().projectData.getTileset(tile.tileset), palette)
-                    else:
-                        graphic = self.scene().projectData.getTileGraphic(
-                            tile.tileset,
-                            self.scene().state.previewingPaletteGroup,
-                            self.scene().state.previewingPalette,
-                            tile.tile)
-                        
-                        if not graphic.hasRenderedFg:
-                            palette = self.scene().projectData.getPaletteGroup(
-                                self.scene().state.previewingPaletteGroup
-                            ).palettes[self.scene().state.previewingPalette]
-                            graphic.renderFg(self.scene().projectData.getTileset(tile.tileset), palette)
-                    
-                    target = (tile.coords.x - math.ceil(topLeft.x()) + self.offset().x(),
-                            tile.coords.y - math.ceil(topLeft.y()) + self.offset().y())
-
-                    pixmap = graphic.renderedFg.copy() # seems inefficient but doesn't appear to have an actual impact?
-                    
-                    if self.scene().state.mode == common.MODEINDEX.ALL and self.scene().state.allModeShowsCollision:
-                        collisionPainter = QPainter(pixmap)
-                        collisionPainter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceAtop)
-                        collisionPainter.setOpacity(0.7)
-                        collisionPainter.setPen(Qt.PenStyle.NoPen)
-                        presets = QSettings().value("presets/presets", defaultValue=common.DEFAULTCOLLISIONPRESETS)
-                        presetColours: dict[int, int] = {}
-                        for _, value, colour in json.loads(presets):
-                            presetColours[value] = colour
-                        for cx in range(0, 4):
-                            for cy in range(0, 4):
-                                minitileCollision = self.scene().collisionAt(EBCoords.fromWarp(tile.coords.coordsWarp()[0]+cx, tile.coords.coordsWarp()[1]+cy))
-                                if minitileCollision:
-                                    try:
-                                        colour = presetColours[minitileCollision]
-                                    except KeyError:
-                                        colour = 0x303030
-                                    collisionPainter.setBrush(QColor.fromRgb(colour))
-                                    collisionPainter.drawRect(cx*8, cy*8, 8, 8)
-                        collisionPainter.end()
-                
-                    if brush:
-                        gridPainter = QPainter(pixmap)
-                        gridPainter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceAtop)
-                        gridPainter.setBrush(brush)
-                        gridPainter.setPen(Qt.GlobalColor.transparent)
-                        gridPainter.drawRect(0, 0, 32, 32)
-                        gridPainter.end()
-                    
-                    if (collision & common.COLLISIONBITS.FOREGROUNDBOTTOM) and not (collision & common.COLLISIONBITS.FOREGROUNDTOP):
-                        painter.setClipRect(bottomHalfRect)
-                    else:
-                        painter.setClipRect(adjusted)
-                    painter.drawPixmap(*target, pixmap)
+                            colour = presetColours[minitileCollision]
+                        except KeyError:
+                            colour = 0x303030
+                        painter.setBrush(QColor.fromRgb(colour))
+                        painter.drawRect(x0*32 - left + cx*8, y0*32 - top + cy*8, 8, 8)
+            painter.setOpacity(1)
+        
+        if brush:
+            painter.setBrush(brush)
+            for x, y, _ in graphics:
+                # the grid starts at the corner of each tile
+                painter.setBrushOrigin(x, y)
+                painter.drawRect(x, y, 32, 32)
+        painter.end()
+        
+        self._foregroundMaskKey = key
+        self._foregroundMask = mask
+        return mask
+    
+    def paintOverlays(self, painter: QPainter, selected: bool):
+        """Draw the visual bounds, collision bounds and ID display, if they're enabled"""
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        if MapEditorNPC.visualBoundsEnabled:
+            painter.setPen(YELLOWPEN if selected else REDPEN)
+            painter.drawRect(self.visualBoundsRect)
+        if MapEditorNPC.collisionBoundsEnabled:
+            painter.setPen(BLUEPEN if selected else CYANPEN)
+            painter.drawRect(self.collisionBoundsRect.translated(self.collisionBoundsOffset))
+        
+        if MapEditorNPC.NPCIDsEnabled:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(BLACKBRUSH)
+            painter.setOpacity(0.5)
+            painter.drawRect(self.numRect)
+            painter.setOpacity(1)
+            
+            painter.setFont("EBMain")
+            textRect = self.numRect.adjusted(1, 1, 0, 0)
+            #    - Shadow
+            painter.setPen(Qt.GlobalColor.black)
+            painter.drawText(textRect.translated(1, 1), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, self.text)
+            #    - Text
+            painter.setPen(Qt.GlobalColor.white)
+            painter.drawText(textRect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, self.text)
         
     def contextMenuEvent(self, event: QGraphicsSceneContextMenuEvent):
         if (not self.isDummy) and self.scene().state.mode == common.MODEINDEX.NPC:
@@ -475,7 +537,7 @@ class MapEditorNPC(QGraphicsPixmapItem):
 
                         i.setPos(coords.x, coords.y)
                     
-                        action = ActionMoveNPCInstance(inst, coords)
+                        action = ActionMoveNPCInstance(self.scene().projectData, inst, coords)
                         self.scene().undoStack.push(action)
 
                 if isMovingNPCs:
@@ -485,6 +547,8 @@ class MapEditorNPC(QGraphicsPixmapItem):
     
     def setPos(self, *args, **kwargs):
         super().setPos(*args, **kwargs)
+        if self.scene():
+            self.updateInWater()
         colliding = self.collidingItems()
         for i in colliding:
             if i.zValue() == self.zValue():
@@ -504,60 +568,51 @@ class MapEditorNPC(QGraphicsPixmapItem):
         """
         self.isDummy = True
         MapEditorNPC.instances.remove(self)
-        self.num.hide()
-        self.numShadow.hide()
-        self.numBgRect.hide()
-        self.visualBounds.hide()
-        self.collisionBounds.hide()
+        self.prepareGeometryChange()
         self.unsetCursor()
         self.setFlag(QGraphicsPixmapItem.GraphicsItemFlag.ItemIsSelectable, False)
         self.setFlag(QGraphicsPixmapItem.GraphicsItemFlag.ItemIsMovable, False)
     
     @classmethod
     def hideNPCs(cls):
+        MapEditorNPC.shown = False
         for i in cls.instances:
             i.hide()
     @classmethod
     def showNPCs(cls):
+        MapEditorNPC.shown = True
         for i in cls.instances:
             i.show()
 
     @classmethod
-    def hideNPCIDs(cls):
+    def _setOverlayFlag(cls, flag: str, enabled: bool):
+        # the bounding rect depends on what overlays are shown
         for i in cls.instances:
-            i.num.hide()
-            i.numShadow.hide()
-            i.numBgRect.hide()
-        MapEditorNPC.NPCIDsEnabled = False
+            i.prepareGeometryChange()
+        setattr(MapEditorNPC, flag, enabled)
+        for i in cls.instances:
+            i.update()
+
+    @classmethod
+    def hideNPCIDs(cls):
+        cls._setOverlayFlag("NPCIDsEnabled", False)
 
     @classmethod
     def showNPCIDs(cls):
-        for i in cls.instances:
-            i.num.show()
-            i.numShadow.show()
-            i.numBgRect.show()
-        MapEditorNPC.NPCIDsEnabled = True
+        cls._setOverlayFlag("NPCIDsEnabled", True)
 
     @classmethod
     def hideVisualBounds(cls):
-        for i in cls.instances:
-            i.visualBounds.hide()
-        MapEditorNPC.visualBoundsEnabled = False
+        cls._setOverlayFlag("visualBoundsEnabled", False)
     
     @classmethod
     def showVisualBounds(cls):
-        for i in cls.instances:
-            i.visualBounds.show()
-        MapEditorNPC.visualBoundsEnabled = True
+        cls._setOverlayFlag("visualBoundsEnabled", True)
 
     @classmethod
     def hideCollisionBounds(cls):
-        for i in cls.instances:
-            i.collisionBounds.hide()
-        MapEditorNPC.collisionBoundsEnabled = False
+        cls._setOverlayFlag("collisionBoundsEnabled", False)
 
     @classmethod
     def showCollisionBounds(cls):
-        for i in cls.instances:
-            i.collisionBounds.show()
-        MapEditorNPC.collisionBoundsEnabled = True
\ No newline at end of file
+        cls._setOverlayFlag("collisionBoundsEnabled", True)
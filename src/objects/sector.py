@@ -1,20 +1,94 @@
 import datetime
 from collections import OrderedDict
 
+import numpy
+
 import src.misc.common as common
 from src.misc.coords import EBCoords
 from src.objects.sector_userdata import UserDataType
 
 
+class SectorStore:
+    """Attributes of every sector, as one NumPy array per attribute, indexed by sector ID.
+    
+    `Sector` objects are views of their own entry, so queries over the whole map can work on the arrays directly."""
+    
+    # Key: attribute name, Value: dtype
+    COLUMNS: dict[str, type] = {
+        "item": numpy.int32,
+        "music": numpy.int32,
+        "palette": numpy.int32,
+        "palettegroup": numpy.int32,
+        "tileset": numpy.int32,
+        "setting": numpy.object_,
+        "teleport": numpy.object_,
+        "townmap": numpy.object_,
+        "townmaparrow": numpy.object_,
+        "townmapimage": numpy.object_,
+        "townmapx": numpy.int32,
+        "townmapy": numpy.int32
+    }
+    
+    def __init__(self, count: int):
+        self.columns: dict[str, numpy.ndarray] = {k: numpy.zeros(count, dtype=v) for k, v in SectorStore.COLUMNS.items()}
+        
+    def __len__(self) -> int:
+        return len(self.columns["item"])
+    
+    def where(self, **attributes) -> numpy.ndarray:
+        """Find sectors by their attributes, such as `where(tileset=3, palette=0)`
+
+        Returns:
+            numpy.ndarray: boolean array indexed by sector ID, True where every given attribute matches
+        """
+        mask = numpy.ones(len(self), dtype=numpy.bool_)
+        for k, v in attributes.items():
+            mask &= self.columns[k] == v
+        return mask
+
+
+def _storedAttribute(name: str) -> property:
+    def get(self: "Sector"):
+        return self._store.columns[name].item(self._index)
+    
+    def set(self: "Sector", value):
+        self._store.columns[name][self._index] = value
+    
+    return property(get, set)
+
+
 class Sector:
-    """Instance of a sector on the map."""
+    """Instance of a sector on the map.
+    
+    Its attributes are stored in a `SectorStore` (`ProjectData.sectorStore`). This object is a view of its own entry in it."""
     
     # Key: name, Value: datatype
     SECTORS_USERDATA: OrderedDict[str, type[UserDataType]] = OrderedDict()
     
+    item = _storedAttribute("item")
+    music = _storedAttribute("music")
+    palette = _storedAttribute("palette")
+    palettegroup = _storedAttribute("palettegroup")
+    tileset = _storedAttribute("tileset")
+    setting = _storedAttribute("setting")
+    teleport = _storedAttribute("teleport")
+    townmap = _storedAttribute("townmap")
+    townmaparrow = _storedAttribute("townmaparrow")
+    townmapimage = _storedAttribute("townmapimage")
+    townmapx = _storedAttribute("townmapx")
+    townmapy = _storedAttribute("townmapy")
+    
     def __init__(self, id: int, item: int, music: int, palette: int, palettegroup: int, tileset: int, setting: str, teleport: str,
-                 townmap: str, townmaparrow: str, townmapimage: str, townmapx: int, townmapy: int):
-        self.id = id
+                 townmap: str, townmaparrow: str, townmapimage: str, townmapx: int, townmapy: int, store: SectorStore|None = None):
+        """
+        Args:
+            store (SectorStore, optional): store to keep the attributes in, at this ID. Defaults to None (a store of its own, for sectors not on the map).
+        """
+        if store is None:
+            self._attach(SectorStore(1), 0, id)
+        else:
+            self._attach(store, id, id)
+        
         self.item = item
         self.music = music
         self.palette = palette
@@ -28,13 +102,32 @@ class Sector:
         self.townmapx = townmapx
         self.townmapy = townmapy
         
+    @classmethod
+    def fromStore(cls, store: SectorStore, id: int) -> "Sector":
+        """Get a view of a sector whose attributes are already in a store
+
+        Args:
+            store (SectorStore): the store
+            id (int): the sector ID
+
+        Returns:
+            Sector: the sector
+        """
+        sector = cls.__new__(cls)
+        sector._attach(store, id, id)
+        return sector
+    
+    def _attach(self, store: SectorStore, index: int, id: int):
+        self._store = store
+        self._index = index
+        self.id = id
+        
         # Key: name (as defined in SECTORS_USERDATA), Value: data
         # If userdata has not yet been assigned, the key may not exist!
         # Therefore, please always use .get() or .pop() to access data and provide a default value of 0.
         self.userdata: dict[str, ] = {}
 
         self.coords = EBCoords.fromSector(int(id%32), int(id/32)) # (x, y) of sector location (in sector array)
-        
     
     def attributesToDataDict(self) -> dict:
         return {
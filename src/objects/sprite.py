@@ -1,10 +1,48 @@
-from PIL import Image, ImageQt
+import contextlib
+from typing import Iterable, Iterator
+
+import numpy
+from PIL import Image
+from PySide6.QtGui import QImage, QPixmap
+
+from src.misc.image_cache import ImageCache
+from src.misc.imaging import arrayToQImage, arrayToQPixmap, imageToArray
+
+
+def decodeSpriteSheet(path: str) -> tuple[Image.Image, numpy.ndarray]:
+    img = Image.open(path).convert("RGBA")
+    return img, imageToArray(img)
+
+def decodeBattleSprite(path: str) -> QImage:
+    return arrayToQImage(imageToArray(Image.open(path)))
+
+# Most sessions only show a few of the sprite groups, so they're decoded when first drawn
+SPRITE_SHEETS: ImageCache[tuple[Image.Image, numpy.ndarray]] = ImageCache(decodeSpriteSheet, 128)
+BATTLE_SPRITES: ImageCache[QImage] = ImageCache(decodeBattleSprite, 64)
+
+
+@contextlib.contextmanager
+def heldSpriteImages(sprites: Iterable["Sprite"] = (), battleSprites: Iterable["BattleSprite"] = ()) -> Iterator[None]:
+    """Decode the images of many sprites at once on a thread pool, and keep them until the context exits.
+    Use when drawing a lot of sprites together, rather than decoding each in turn as it's drawn.
+
+    Args:
+        sprites (Iterable[Sprite], optional): sprite groups. Ones whose frames have already been drawn are skipped. Defaults to ().
+        battleSprites (Iterable[BattleSprite], optional): battle sprites. Defaults to ().
+    """
+    with SPRITE_SHEETS.held({i.path for i in sprites if not i._framePixmaps}), \
+         BATTLE_SPRITES.held({i.path for i in battleSprites}):
+        yield
 
 
 class Sprite:
     """Sprite image and rendering methods"""
     def __init__(self, id: int, size: tuple[int, int], length: int, collisionHorizontal: tuple[int, int],
-                 collisionVertical: tuple[int, int], swimFlags: tuple[bool], img: Image.Image):
+                 collisionVertical: tuple[int, int], swimFlags: tuple[bool], path: str):
+        """
+        Args:
+            path (str): path to the sprite group's image. It's decoded when first needed (see SPRITE_SHEETS)
+        """
         self.id = id
         self.size = size
         self.length = length
@@ -12,7 +50,24 @@ class Sprite:
         self.collisionVertical = collisionVertical
         self.swimFlags = swimFlags
         
-        self.img = img
+        self.path = path
+        # Key: (direction, animation frame, rows sunk), Value: the frame ready to draw. Shared by everything showing this sprite
+        self._framePixmaps: dict[tuple[int, int, int], QPixmap] = {}
+        
+    @property
+    def img(self) -> Image.Image:
+        """The sprite group's image, in RGBA"""
+        return SPRITE_SHEETS.get(self.path)[0]
+    
+    @property
+    def pixels(self) -> numpy.ndarray:
+        """The sprite group's pixels, of shape (y, x, 4). Don't modify it"""
+        return SPRITE_SHEETS.get(self.path)[1]
+        
+    def prefetch(self):
+        """Start decoding the sprite group's image in the background, unless its frames have already been drawn"""
+        if not self._framePixmaps:
+            SPRITE_SHEETS.prefetch((self.path,))
         
     def renderFacingImg(self, dir: int, anim: int=0) -> Image.Image:
         """Get the image of a frame from a sprite group, given direction
@@ -23,7 +78,48 @@ class Sprite:
         Returns:
             Image: the image
         """
-        
+        topLeftX, topLeftY = self._facingOffset(dir, anim)
+        return self.img.crop((topLeftX, topLeftY, topLeftX+self.size[0], topLeftY+self.size[1]))
+    
+    def renderFacingArray(self, dir: int, anim: int=0) -> numpy.ndarray:
+        """Get the pixels of a frame from a sprite group, given direction. This is a view of the sprite group's pixels, so don't modify it.
+
+        Args:
+            dir (int): direction (see DIRECTION8 in common.py)
+
+        Returns:
+            numpy.ndarray: RGBA pixels of shape (y, x, 4)
+        """
+        topLeftX, topLeftY = self._facingOffset(dir, anim)
+        frame = self.pixels[topLeftY:topLeftY+self.size[1], topLeftX:topLeftX+self.size[0]]
+        if frame.shape[:2] != (self.size[1], self.size[0]):
+            # sprite groups with fewer frames don't fill the sheet - pad with transparency like PIL's crop does
+            padded = numpy.zeros((self.size[1], self.size[0], 4), dtype=numpy.uint8)
+            padded[:frame.shape[0], :frame.shape[1]] = frame
+            return padded
+        return frame
+    
+    def renderFacingPixmap(self, dir: int, anim: int=0, sunk: int=0) -> QPixmap:
+        """Get a frame from a sprite group as a QPixmap, given direction. Frames are cached, so don't modify it.
+
+        Args:
+            dir (int): direction (see DIRECTION8 in common.py)
+            sunk (int, optional): rows to cut off the bottom, for standing in water. Defaults to 0.
+
+        Returns:
+            QPixmap: the frame
+        """
+        try:
+            return self._framePixmaps[dir, anim, sunk]
+        except KeyError:
+            if sunk:
+                pixmap = self.renderFacingPixmap(dir, anim).copy(0, 0, self.size[0], max(self.size[1]-sunk, 0))
+            else:
+                pixmap = arrayToQPixmap(self.renderFacingArray(dir, anim))
+            self._framePixmaps[dir, anim, sunk] = pixmap
+            return pixmap
+    
+    def _facingOffset(self, dir: int, anim: int) -> tuple[int, int]:
         if anim != 0 and anim != 1:
             raise ValueError("Animation value must be 0 or 1!")
 
@@ -64,7 +160,7 @@ class Sprite:
 
         # topLeftX = dir*self.size[0]*2 if dir < 2 else (dir-2)*self.size[0]*2
         # topLeftY = 0 if dir < 2 else self.size[1]
-        return self.img.crop((topLeftX, topLeftY, topLeftX+self.size[0], topLeftY+self.size[1]))
+        return topLeftX, topLeftY
     
     def getFacingCollision(self, dir: int) -> tuple[int, int]:
         if (dir == 0 or 2) or dir >= 4: # TODO test if this is so
@@ -86,6 +182,14 @@ class Sprite:
 
 class BattleSprite:
     """Battle sprite. mostly just the image tbh"""
-    def __init__(self, id: int, img: ImageQt.ImageQt):
+    def __init__(self, id: int, path: str):
+        """
+        Args:
+            path (str): path to the image. It's decoded when first needed (see BATTLE_SPRITES)
+        """
         self.id = id
-        self.img = img
\ No newline at end of file
+        self.path = path
+        
+    @property
+    def img(self) -> QImage:
+        return BATTLE_SPRITES.get(self.path)
\ No newline at end of file
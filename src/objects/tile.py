@@ -1,4 +1,4 @@
-from PIL import ImageQt
+import numpy
 from PySide6.QtCore import QRectF, Qt
 from PySide6.QtGui import QBrush, QPainterPath, QPixmap
 from PySide6.QtWidgets import (QGraphicsItem, QGraphicsPixmapItem,
@@ -7,18 +7,30 @@ from PySide6.QtWidgets import (QGraphicsItem, QGraphicsPixmapItem,
 import src.misc.common as common
 from src.coilsnake.fts_interpreter import FullTileset, Palette
 from src.misc.coords import EBCoords
+from src.misc.imaging import arrayToQPixmap
 
 WHITEBRUSH = QBrush(Qt.white)
 BLACKBRUSH = QBrush(Qt.black)
 
 class MapTile:
-    """Instance of a tile on the map. Contains coords, palette palette group and tileset IDs, and a tile ID for a Tile object. Created alongside the map editor itself. Use its data to reference and render a MapTileGraphic"""
-    def __init__(self, tile: int, coords: EBCoords, tileset: int, palettegroup: int, palette: int):
-        self.tile = tile
+    """Instance of a tile on the map. Contains coords, palette palette group and tileset IDs, and a tile ID for a Tile object. Created alongside the map editor itself. Use its data to reference and render a MapTileGraphic
+    
+    The tile ID is not stored here, but in the project-wide tile ID array (`ProjectData.tileIDs`). This object is a view of its own entry in that array, so bulk operations can work on the array directly."""
+    def __init__(self, tileIDs: numpy.ndarray, coords: EBCoords, tileset: int, palettegroup: int, palette: int):
+        self._tileIDs = tileIDs
+        self._index = coords.coordsTile()[::-1] # (y, x), like the array
         self.coords = coords
         self.palette = palette
         self.palettegroup = palettegroup
         self.tileset = tileset
+    
+    @property
+    def tile(self) -> int:
+        return self._tileIDs.item(self._index)
+    
+    @tile.setter
+    def tile(self, value: int):
+        self._tileIDs[self._index] = value
 
 class MapTileGraphic:
     """Graphics for a map tile. Contains a rendered image. All args are IDs"""
@@ -35,10 +47,10 @@ class MapTileGraphic:
     
     def render(self, tileset: FullTileset, palette: Palette): 
         """Create the image of this tile graphic and save it to this instance. Also sets `hasRendered` to True"""
-        self.rendered = QPixmap.fromImage(ImageQt.ImageQt(tileset.tiles[self.tile].toImage(palette, tileset)))
+        self.rendered = arrayToQPixmap(tileset.tiles[self.tile].toArray(palette, tileset))
         self.hasRendered = True
     
     def renderFg(self, tileset: FullTileset, palette: Palette):
         """Create the foreground image of this tile graphic and save it to this instance. Also sets `hasRenderedFg` to True"""
-        self.renderedFg = QPixmap.fromImage(ImageQt.ImageQt(tileset.tiles[self.tile].toImage(palette, tileset, fgOnly=True)))
+        self.renderedFg = arrayToQPixmap(tileset.tiles[self.tile].toArray(palette, tileset, fgOnly=True))
         self.hasRenderedFg = True
\ No newline at end of file
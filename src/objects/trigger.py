@@ -125,6 +125,7 @@ class Trigger:
 
 class MapEditorTrigger(QGraphicsPixmapItem):
     instances = []
+    shown = True
     def __init__(self, coords: EBCoords, uuid: uuid.UUID):
         QGraphicsPixmapItem.__init__(self)
         MapEditorTrigger.instances.append(self)
@@ -138,6 +139,7 @@ class MapEditorTrigger(QGraphicsPixmapItem):
         self.setFlag(QGraphicsItem.ItemIsMovable)
         
         self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setVisible(MapEditorTrigger.shown)
         
     def mousePressEvent(self, event: QGraphicsSceneMouseEvent):
         if self.scene().state.mode == common.MODEINDEX.TRIGGER:
@@ -180,7 +182,7 @@ class MapEditorTrigger(QGraphicsPixmapItem):
                         
                         i.setPos(coords.x, coords.y)
                         
-                        action = ActionMoveTrigger(trigger, coords)
+                        action = ActionMoveTrigger(self.scene().projectData, trigger, coords)
                         self.scene().undoStack.push(action)
                     
                 if isMovingTriggers:
@@ -217,9 +219,11 @@ class MapEditorTrigger(QGraphicsPixmapItem):
 
     @classmethod
     def hideTriggers(cls):
+        MapEditorTrigger.shown = False
         for i in cls.instances:
             i.hide()
     @classmethod
     def showTriggers(cls):
+        MapEditorTrigger.shown = True
         for i in cls.instances:
             i.show()
\ No newline at end of file
@@ -38,6 +38,7 @@ class Teleport():
         
 class MapEditorWarp(QGraphicsPixmapItem):
     warpIDsEnabled = False
+    shown = True
     instances = []
     def __init__(self, coords: EBCoords, id: int, pixmap: QPixmap, warpType: Literal["warp", "teleport"]):
         super().__init__(pixmap)
@@ -78,6 +79,7 @@ class MapEditorWarp(QGraphicsPixmapItem):
             self.num.hide()
             self.numShadow.hide()
         
+        self.setVisible(MapEditorWarp.shown)
         MapEditorWarp.instances.append(self)
     
     def setText(self, text: str):
@@ -132,9 +134,9 @@ class MapEditorWarp(QGraphicsPixmapItem):
                         i.setPos(coords.x, coords.y)
                         
                         if i.warpType == "warp":
-                            action = ActionMoveWarp(warp, coords)
+                            action = ActionMoveWarp(self.scene().projectData, warp, coords)
                         else:
-                            action = ActionMoveTeleport(warp, coords)
+                            action = ActionMoveTeleport(self.scene().projectData, warp, coords)
                         self.scene().undoStack.push(action)
                     
                 if isMovingWarps:
@@ -148,11 +150,13 @@ class MapEditorWarp(QGraphicsPixmapItem):
     
     @classmethod
     def showWarps(cls):
+        MapEditorWarp.shown = True
         for i in cls.instances:
             i.show()
     
     @classmethod
     def hideWarps(cls):
+        MapEditorWarp.shown = False
         for i in cls.instances:
             i.hide()
             
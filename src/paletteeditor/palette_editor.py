@@ -51,15 +51,6 @@ class PaletteEditor(QWidget):
         self.setupUI()
         self.paletteTree.setCurrentItem(self.paletteTree.topLevelItem(0), 0)
         
-    def clobberAllCachedMinitiles(self):
-        # for use on undo/redo. As with the gfx/tile editor,
-        # we don't know what tileset to clobber the cache of,
-        # so let's just do them all
-        # (even with 10k iterations, it doesn't have a performance hit like I expected...?)
-        for i in self.projectData.tilesets:
-            for j in i.minitiles:
-                j.BothToImage.cache_clear()
-    
     def onAction(self, command: QUndoCommand):
         
         if not command:
@@ -122,11 +113,9 @@ class PaletteEditor(QWidget):
                 self.refreshSubpaletteDisplay()
                 # see gfx editor for why we don't/can't specify what to clobber :(
                 self.projectData.clobberTileGraphicsCache()
-                self.clobberAllCachedMinitiles()
             case "palette":
                 self.refreshSubpaletteDisplay()
                 self.projectData.clobberTileGraphicsCache()
-                self.clobberAllCachedMinitiles()
             case "settings":
                 self.onPaletteSettingsListCurrentChanged(self.paletteSettingsList.currentItem())
                 self.paletteSettingsList.updateLabels()
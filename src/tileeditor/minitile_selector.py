@@ -1,6 +1,5 @@
 from typing import TYPE_CHECKING
 
-from PIL import ImageQt
 from PySide6.QtCore import QEvent, QPoint, QRectF, Qt
 from PySide6.QtGui import QColor, QMouseEvent, QPainter, QPixmap
 from PySide6.QtWidgets import (QGraphicsPixmapItem, QGraphicsRectItem,
@@ -10,7 +9,9 @@ from PySide6.QtWidgets import (QGraphicsPixmapItem, QGraphicsRectItem,
 
 import src.misc.common as common
 from src.actions.fts_actions import ActionSwapMinitiles
+from src.coilsnake.fts_interpreter import Minitile
 from src.coilsnake.project_data import ProjectData
+from src.misc.imaging import arrayToQImage, arrayToQPixmap
 
 if TYPE_CHECKING:
     from tile_editor import TileEditor
@@ -56,8 +57,6 @@ class MinitileScene(QGraphicsScene):
         
         self.setBackgroundBrush(Qt.GlobalColor.white)
         
-        self.minitiles: list[TileEditorMinitile] = []
-        
         self.lastMinitileHovered = -1
         self.hoverInfo = MinitileHoverDisplay()
         self.hoverInfo.hide()
@@ -83,28 +82,63 @@ class MinitileScene(QGraphicsScene):
         self.grid.setZValue(97)
         self.grid.hide()
         
+        self.usageOverlay = MinitileUsageOverlay(self.sceneRect(), self)
+        self.addItem(self.usageOverlay)
+        self.usageOverlay.setZValue(96)
+        self.usageOverlay.hide()
+        
         self._mouseDownPos = QPoint()
         
-        # populate
-        for i in range(common.MAXMINITILES):
-            minitile = TileEditorMinitile()
-            minitile.setPixmap(QPixmap.fromImage(ImageQt.ImageQt(
-                projectData.tilesets[0].minitiles[i].BothToImage(
-                self.projectData.tilesets[0].palettes[0].subpalettes[0]
-            ))))
-            minitile.setPos((i % self.MINITILE_WIDTH) * 8, (i // self.MINITILE_WIDTH) * 8)
-            self.addItem(minitile)
-            self.minitiles.append(minitile)
-            
+        # all minitiles are drawn from one atlas image
+        self.atlasPixmap = QPixmap()
+        self.atlas = QGraphicsPixmapItem()
+        self.addItem(self.atlas)
+        
+        # the minitile being dragged
+        self.dragPreview = QGraphicsPixmapItem()
+        self.dragPreview.setZValue(99)
+        self.dragPreview.hide()
+        self.addItem(self.dragPreview)
+        
+        self.renderTileset(0, 0, 0, 0)
+    
+    def currentSubpalette(self):
+        state = self.parent().state
+        return self.projectData.getTileset(state.currentTileset).getPalette(
+            state.currentPaletteGroup, state.currentPalette).subpalettes[state.currentSubpalette]
+    
     def renderTileset(self, tileset: int, paletteGroup: int, palette: int, subpalette: int):
-        for id, i in enumerate(self.minitiles):
-            i.setPixmap(QPixmap.fromImage(ImageQt.ImageQt(
-                self.projectData.getTileset(tileset).minitiles[id].BothToImage(
-                    self.projectData.getTileset(tileset).getPalette(
-                        paletteGroup, palette).subpalettes[subpalette]
-                ))))
+        tilesetObj = self.projectData.getTileset(tileset)
+        pixels = tilesetObj.renderMinitiles(tilesetObj.getPalette(paletteGroup, palette).subpalettes[subpalette])
+        # (minitile, y, x, RGBA) -> (row, y, column, x, RGBA) -> (row*y, column*x, RGBA)
+        rows = common.MAXMINITILES // self.MINITILE_WIDTH
+        atlas = pixels.reshape(rows, self.MINITILE_WIDTH, 8, 8, 4).transpose(0, 2, 1, 3, 4).reshape(rows*8, self.MINITILE_WIDTH*8, 4)
+        self.atlasPixmap = arrayToQPixmap(atlas)
+        self.atlas.setPixmap(self.atlasPixmap)
+        
+        self.usageOverlay.update()
         self.updateHoverPreview(self.lastMinitileHovered)
-                 
+    
+    def updateMinitile(self, minitile: Minitile|int):
+        """Redraw only one minitile of the atlas, if it belongs to the current tileset"""
+        tileset = self.projectData.getTileset(self.parent().state.currentTileset)
+        if isinstance(minitile, Minitile):
+            try:
+                minitile = next(id for id, i in enumerate(tileset.minitiles) if i is minitile)
+            except StopIteration:
+                return # it'll be drawn when its tileset is next rendered
+        
+        image = arrayToQImage(tileset.renderMinitiles(self.currentSubpalette(), [minitile])[0])
+        
+        painter = QPainter(self.atlasPixmap)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage((minitile % self.MINITILE_WIDTH) * 8, (minitile // self.MINITILE_WIDTH) * 8, image)
+        painter.end()
+        self.atlas.setPixmap(self.atlasPixmap)
+        
+        if minitile == self.lastMinitileHovered:
+            self.updateHoverPreview(minitile)
+
     def mouseMoveEvent(self, event: QGraphicsSceneMouseEvent) -> None:
         pos = event.scenePos()
         x = common.cap(pos.x() // 8, 0, self.MINITILE_WIDTH-1)
@@ -115,19 +149,17 @@ class MinitileScene(QGraphicsScene):
             return super().mouseMoveEvent(event)
 
         if Qt.MouseButton.LeftButton in event.buttons():
-            sourceIndex = int(self._mouseDownPos.y() // 8) * self.MINITILE_WIDTH + int(self._mouseDownPos.x() // 8)
-            source = self.minitiles[sourceIndex]     
-                    
-            if x != int(self._mouseDownPos.x() // 8) or y != int(self._mouseDownPos.y() // 8):                
-                source.setPos(QPoint(pos.x()-4, pos.y()-10))
-                source.setZValue(99)
+            if x != int(self._mouseDownPos.x() // 8) or y != int(self._mouseDownPos.y() // 8):
+                if not self.dragPreview.isVisible():
+                    self.dragPreview.setPixmap(self.atlasPixmap.copy(self._mouseDownPos.x(), self._mouseDownPos.y(), 8, 8))
+                    self.dragPreview.show()
+                self.dragPreview.setPos(QPoint(pos.x()-4, pos.y()-10))
                 self.selector.setPos(QPoint(pos.x()-4, pos.y()-10))
                 
                 self.destIndicator.show()
                 self.destIndicator.setPos(x*8, y*8)
             else:
-                source.setPos((self._mouseDownPos.x() // 8) * 8, (self._mouseDownPos.y() // 8) * 8)
-                source.setZValue(0)
+                self.dragPreview.hide()
                 self.selector.setPos((self._mouseDownPos.x() // 8) * 8, (self._mouseDownPos.y() // 8) * 8)
                 self.destIndicator.hide()
                 
@@ -165,8 +197,8 @@ class MinitileScene(QGraphicsScene):
         
         if event.button() == Qt.MouseButton.LeftButton:
             sourceIndex = int(self._mouseDownPos.y() // 8) * self.MINITILE_WIDTH + int(self._mouseDownPos.x() // 8)
-            source = self.minitiles[sourceIndex] 
-            
+            self.dragPreview.hide()
+
             if sourceIndex == index:
                 return super().mouseReleaseEvent(event)
             
@@ -174,9 +206,6 @@ class MinitileScene(QGraphicsScene):
                                         sourceIndex, index)
             self.parent().undoStack.push(action)        
             
-            source.setZValue(0)
-            source.setPos((self._mouseDownPos.x() // 8) * 8, (self._mouseDownPos.y() // 8) * 8)
-            
             self.destIndicator.hide()
         
         return super().mouseReleaseEvent(event)
@@ -190,25 +219,18 @@ class MinitileScene(QGraphicsScene):
         
     def updateHoverPreview(self, minitile: int):
         tileset = self.projectData.getTileset(self.parent().state.currentTileset)
-        subpalette = tileset.getPalette(self.parent().state.currentPaletteGroup,
-                                        self.parent().state.currentPalette).subpalettes[self.parent().state.currentSubpalette]
+        subpalette = self.currentSubpalette()
         
-        self.hoverInfo.setFgImage(QPixmap.fromImage(ImageQt.ImageQt(tileset.minitiles[minitile].ForegroundToImage(subpalette))).scaled(64, 64))
-        self.hoverInfo.setBgImage(QPixmap.fromImage(ImageQt.ImageQt(tileset.minitiles[minitile].BackgroundToImage(subpalette))).scaled(64, 64))
+        self.hoverInfo.setFgImage(arrayToQPixmap(tileset.renderMinitiles(subpalette, [minitile], fgOnly=True)[0]).scaled(64, 64))
+        self.hoverInfo.setBgImage(arrayToQPixmap(tileset.renderMinitiles(subpalette, [minitile], bgOnly=True)[0]).scaled(64, 64))
         self.hoverInfo.setId(minitile)
+        self.hoverInfo.setUses(int(tileset.minitileUses[minitile]))
         self.lastMinitileHovered = minitile
     
     def parent(self) -> "TileEditor": # for typing
         return super().parent()
 
 
-class TileEditorMinitile(QGraphicsPixmapItem):
-    def __init__(self):
-        super().__init__()
-
-    def boundingRect(self):
-        return QRectF(0, 0, 8, 8)
-
 class MinitileHoverDisplay(QWidget):
     def __init__(self):
         super().__init__()
@@ -221,12 +243,14 @@ class MinitileHoverDisplay(QWidget):
         self.fgLabel = QLabel()
         self.bgLabel = QLabel()
         self.IDLabel = QLabel("ID:")
+        self.usesLabel = QLabel("Uses:")
         self.warningLabel = QLabel(f"Minitiles at position {common.MINITILENOFOREGROUND} or greater don't display foreground graphics in-game.")
         self.warningLabel.setWordWrap(True)
         
         contentLayout.addWidget(self.fgLabel)
         contentLayout.addWidget(self.bgLabel)
         contentLayout.addWidget(self.IDLabel)
+        contentLayout.addWidget(self.usesLabel)
         
         layout.addLayout(contentLayout)
         layout.addWidget(self.warningLabel)
@@ -248,6 +272,9 @@ class MinitileHoverDisplay(QWidget):
             self.warningLabel.show()
         else:
             self.warningLabel.hide()
+    
+    def setUses(self, uses: int):
+        self.usesLabel.setText(f"Uses: {uses}")
             
 class MinitileSelectorGrid(QGraphicsRectItem):
     def paint(self, painter: QPainter, option, a):
@@ -259,4 +286,30 @@ class MinitileSelectorGrid(QGraphicsRectItem):
         for x in range((rect.width()//16)*2):
             painter.drawLine(x*16, 0, x*16, rect.height()*2)
             for y in range((rect.height()//16)*2):
-                painter.drawLine(0, y*16, rect.width()*2, y*16)
\ No newline at end of file
+                painter.drawLine(0, y*16, rect.width()*2, y*16)
+
+class MinitileUsageOverlay(QGraphicsRectItem):
+    """Shows how many tile placements use each minitile, and tints unused minitiles. Reads the tileset's live usage counts, so it only needs to be repainted."""
+    def __init__(self, rect: QRectF, scene: MinitileScene):
+        super().__init__(rect)
+        self._scene = scene
+        
+    def paint(self, painter: QPainter, option, a):
+        tileEditor = self._scene.parent()
+        uses = self._scene.projectData.getTileset(tileEditor.state.currentTileset).minitileUses
+        
+        painter.scale(0.5, 0.5)
+        font = painter.font()
+        font.setPixelSize(6)
+        painter.setFont(font)
+        
+        for id, count in enumerate(uses.tolist()):
+            x = (id % MinitileScene.MINITILE_WIDTH) * 16
+            y = (id // MinitileScene.MINITILE_WIDTH) * 16
+            if count == 0:
+                painter.fillRect(x, y, 16, 16, QColor(255, 0, 0, 128))
+            else:
+                text = str(count) if count < 1000 else "999+"
+                painter.fillRect(x, y, 3*len(text)+2, 7, QColor(0, 0, 0, 160))
+                painter.setPen(Qt.GlobalColor.white)
+                painter.drawText(x+1, y+6, text)
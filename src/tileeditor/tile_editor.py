@@ -19,14 +19,16 @@ from src.actions.fts_actions import (ActionAddPalette, ActionChangeArrangement,
                                      ActionChangeSubpaletteColour,
                                      ActionRemovePalette, ActionSwapMinitiles)
 from src.actions.misc_actions import ActionReplaceTileset, MultiActionWrapper
-from src.actions.tile_actions import ActionSwapTiles
+from src.actions.tile_actions import (ActionPermuteTiles, ActionRemapTiles,
+                                      ActionSwapTiles)
 from src.coilsnake.fts_interpreter import Minitile, Tile
 from src.coilsnake.project_data import ProjectData
 from src.misc.dialogues import (AboutDialog, AutoMinitileRearrangerDialog,
+                                DuplicateMinitilesDialog,
                                 FindUnusedMinitilesDialog,
                                 RenderMinitilesDialog, RenderTilesDialog,
                                 ReplaceSwapMinitileInstancesDialog,
-                                SettingsDialog)
+                                SettingsDialog, TileRemapDialog)
 from src.tileeditor.arrangement_editor import TileArrangementWidget
 from src.tileeditor.collision_editor import (TileEditorCollisionPresetList,
                                              TileEditorCollisionWidget)
@@ -129,8 +131,9 @@ class TileEditor(QWidget):
                 self.collisionScene.loadTileset(tileset)
                 self.collisionScene.loadPalette(palette)
                 self.collisionScene.update()
-            elif isinstance(c, ActionSwapTiles):
-                self.onTilesetSelect()
+            elif isinstance(c, ActionPermuteTiles) or isinstance(c, ActionRemapTiles):
+                self.tileScene.update()
+                self.onTileSelect(self.state.currentTile)
         
         match actionType:
             case "bitmap":
@@ -138,10 +141,6 @@ class TileEditor(QWidget):
                 self.tileScene.update()
                 self.arrangementScene.update()
                 self.collisionScene.update()
-                self.minitileScene.renderTileset(self.state.currentTileset,
-                                                self.state.currentPaletteGroup,
-                                                self.state.currentPalette,
-                                                self.state.currentSubpalette)
                 self.fgScene.copyToScratch()
                 self.bgScene.copyToScratch()
                 self.fgScene.update()
@@ -151,6 +150,8 @@ class TileEditor(QWidget):
                 self.tileScene.update()
                 self.arrangementScene.update()
                 self.collisionScene.update()
+                self.minitileScene.usageOverlay.update()
+                self.minitileScene.updateHoverPreview(self.minitileScene.lastMinitileHovered)
             case "colour":
                 self.fgScene.update()
                 self.bgScene.update()
@@ -232,11 +233,20 @@ class TileEditor(QWidget):
         action = ActionSwapTiles(self.projectData, before, after, self.state.currentTileset)
         self.undoStack.push(action)
     
+    def onTileMove(self, source: int, target: int):
+        # shift everything between the two over by one, rather than swapping
+        order = list(range(common.MAXTILES))
+        order.insert(target, order.pop(source))
+        permutation = [0] * common.MAXTILES
+        for new, old in enumerate(order):
+            permutation[old] = new
+        action = ActionPermuteTiles(self.projectData, permutation, self.state.currentTileset)
+        action.setText("Move tile")
+        self.undoStack.push(action)
+    
     def onColourEdit(self):
         self.projectData.clobberTileGraphicsCache()
-        for i in self.projectData.getTileset(self.state.currentTileset).minitiles:
-            i.BothToImage.cache_clear()
-
+        # minitile images are keyed by subpalette version, so they don't need clearing here
         self.minitileScene.renderTileset(self.state.currentTileset,
                                          self.state.currentPaletteGroup,
                                          self.state.currentPalette,
@@ -356,17 +366,32 @@ class TileEditor(QWidget):
     def onFindUnused(self):
         FindUnusedMinitilesDialog.findUnusedMinitiles(self, self.projectData, self.state.currentTileset)
     
+    def onFindDuplicates(self):
+        action = DuplicateMinitilesDialog.findDuplicateMinitiles(self, self.projectData, self.state.currentTileset)
+        
+        if action:
+            self.undoStack.push(action)
+    
     def onReplaceMinitiles(self):
         action = ReplaceSwapMinitileInstancesDialog.replaceOrSwapMinitiles(self, self.projectData, self.state.currentTileset)
         
         if action:
             self.undoStack.push(action)
         
+    def onRemapTiles(self):
+        action = TileRemapDialog.remapTiles(self, self.projectData, self.state.currentTileset)
+        
+        if action:
+            self.undoStack.push(action)
+        
     def updateMinitile(self, minitile: Minitile|int):
         if isinstance(minitile, int):
             minitile = self.projectData.getTileset(self.state.currentTileset).minitiles[minitile]
         
-        minitile.BothToImage.cache_clear() 
+        # we don't know which tileset this came from if it was undone elsewhere, so check them all
+        for i in self.projectData.tilesets:
+            i.invalidateMinitileImage(minitile)
+        self.minitileScene.updateMinitile(minitile)
         # TODO fix the following:
         # the instances of clearTileGraphicsCache() in this file should be more specific.
         # however, if the current tileset/palette group/palette/subpalette doesn't match the
@@ -396,6 +421,13 @@ class TileEditor(QWidget):
         else:
             self.minitileScene.grid.hide()
             
+    def toggleMinitileUsage(self):
+        QSettings().setValue("tileeditor/ShowMinitileUsage", self.minitileUsageAction.isChecked())
+        if self.minitileUsageAction.isChecked():
+            self.minitileScene.usageOverlay.show()
+        else:
+            self.minitileScene.usageOverlay.hide()
+            
     def onCopyMinitile(self):
         minitile = self.projectData.getTileset(self.state.currentTileset).minitiles[self.state.currentMinitile]
         fg = minitile.foreground
@@ -554,6 +586,7 @@ class TileEditor(QWidget):
         self.tileScene = TilesetDisplayGraphicsScene(self.projectData, True, 6, canDragRearrange=True)
         self.tileScene.tileSelected.connect(self.onTileSelect)
         self.tileScene.tileRearranged.connect(self.onTileRearrange)
+        self.tileScene.tileMoved.connect(self.onTileMove)
         self.tileView = HorizontalGraphicsView(self.tileScene)
         self.tileView.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
         self.tileView.setFixedHeight(32*self.tileScene.rowSize+1+self.tileView.horizontalScrollBar().sizeHint().height())
@@ -741,7 +774,13 @@ class TileEditor(QWidget):
         self.gridAction.triggered.connect(self.arrangementScene.update)
         if self.gridAction.isChecked():
             self.toggleGrid()
-        self.menuView.addActions([self.tileIDAction, self.gridAction])
+        self.minitileUsageAction = QAction("Show minitile &usage")
+        self.minitileUsageAction.setCheckable(True)
+        self.minitileUsageAction.setChecked(QSettings().value("tileeditor/ShowMinitileUsage", False, type=bool))
+        self.minitileUsageAction.triggered.connect(self.toggleMinitileUsage)
+        if self.minitileUsageAction.isChecked():
+            self.toggleMinitileUsage()
+        self.menuView.addActions([self.tileIDAction, self.gridAction, self.minitileUsageAction])
         
         self.menuTools = QMenu("&Tools")
         self.renderTilesAction = QAction(icons.ICON_RENDER_IMG, "Render image of &tiles...")
@@ -752,9 +791,13 @@ class TileEditor(QWidget):
         self.autoRearrangeAction.triggered.connect(self.onAutoRearrange)
         self.findUnusedAction = QAction(icons.ICON_UNUSED_OBJECT, "&Unused minitile finder...")
         self.findUnusedAction.triggered.connect(self.onFindUnused)
+        self.findDuplicatesAction = QAction(icons.ICON_COPY, "Find &duplicate minitiles...")
+        self.findDuplicatesAction.triggered.connect(self.onFindDuplicates)
         self.replaceMinitilesAction = QAction(icons.ICON_STACK, "&Replace/swap minitile instances...")
         self.replaceMinitilesAction.triggered.connect(self.onReplaceMinitiles)
-        self.menuTools.addActions([self.renderTilesAction, self.renderMinitilesAction, self.autoRearrangeAction, self.findUnusedAction, self.replaceMinitilesAction, self.parent().sharedActionTileSpace])
+        self.remapTilesAction = QAction(icons.ICON_SPLIT, "&Merge and compact tiles...")
+        self.remapTilesAction.triggered.connect(self.onRemapTiles)
+        self.menuTools.addActions([self.renderTilesAction, self.renderMinitilesAction, self.autoRearrangeAction, self.findUnusedAction, self.findDuplicatesAction, self.replaceMinitilesAction, self.remapTilesAction, self.parent().sharedActionTileSpace])
         self.parent().tileScratchSpace.scene.tileSelected.connect(self.tileScratchSpacePicked)
         
         self.menuHelp = QMenu("&Help")        
@@ -3,7 +3,6 @@ import logging
 import traceback
 from copy import copy
 
-from PIL import ImageQt
 from PySide6.QtCore import QPoint, QRect, QRectF, QSettings, QSize, Qt, Signal
 from PySide6.QtGui import (QBrush, QColor, QMouseEvent, QPainter, QPaintEvent,
                            QPixmap, QResizeEvent)
@@ -16,6 +15,7 @@ from src.coilsnake.fts_interpreter import (FullTileset, Minitile, Palette,
                                            Subpalette, Tile)
 from src.coilsnake.project_data import ProjectData
 from src.misc.coords import EBCoords
+from src.misc.imaging import arrayToQImage, arrayToQPixmap
 
 
 class MinitileGraphicsWidget(QWidget):    
@@ -197,7 +197,7 @@ class TileGraphicsWidget(QWidget):
         painter.drawRect(0, 0, 64, 64)
         painter.scale(2, 2)
         
-        painter.drawImage(0, 0, ImageQt.ImageQt(self.currentTile.toImage(self.currentPalette, self.currentTileset)))
+        painter.drawImage(0, 0, arrayToQImage(self.currentTile.toArray(self.currentPalette, self.currentTileset)))
         
         if QSettings().value("mapeditor/ShowGrid", type=bool):
             painter.scale(0.25, 0.25)
@@ -300,6 +300,7 @@ class TilesetDisplayGraphicsScene(QGraphicsScene):
     tileSelected = Signal(int)
     tilePicked = Signal(int)
     tileRearranged = Signal(int, int)
+    tileMoved = Signal(int, int)
         
     def __init__(self, projectData: ProjectData, horizontal: bool = False, rowSize: int = 6, forcedPalette: Palette|None=None, forcedTileIDs: bool = False, canDragRearrange: bool = False):
         super().__init__()
@@ -362,7 +363,7 @@ class TilesetDisplayGraphicsScene(QGraphicsScene):
         x, y = self.tileIndexToPos(tile)
         self.selectionIndicator.setPos(x*32, y*32)
     
-    def drop(self, pos: EBCoords):
+    def drop(self, pos: EBCoords, move: bool=False):
         self._dragging = False
         self.dropIndicator.hide()
         self.grabTile.hide()
@@ -376,7 +377,10 @@ class TilesetDisplayGraphicsScene(QGraphicsScene):
         startTile = self.posToTileIndex(startX//32, startY//32)
         endTile = self.posToTileIndex(endX//32, endY//32)
         if startTile == endTile: return
-        self.tileRearranged.emit(startTile, endTile)
+        if move:
+            self.tileMoved.emit(startTile, endTile)
+        else:
+            self.tileRearranged.emit(startTile, endTile)
         
     def mousePressEvent(self, event: QGraphicsSceneMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -417,7 +421,7 @@ class TilesetDisplayGraphicsScene(QGraphicsScene):
         if event.button() == Qt.MouseButton.LeftButton:
             pos = EBCoords(*event.scenePos().toTuple())
             if self._dragging:
-                self.drop(pos)
+                self.drop(pos, event.modifiers() == Qt.KeyboardModifier.ShiftModifier)
             else:
                 if event.modifiers() in (Qt.KeyboardModifier.ControlModifier, Qt.KeyboardModifier.ShiftModifier):
                     self.tilePicked.emit(self.posToTileIndex(*pos.coordsTile()))
@@ -458,9 +462,9 @@ class TilesetDisplayGraphicsScene(QGraphicsScene):
                         except KeyError:
                             tileset = self.projectData.getTileset(self.currentTileset)
                             tile = tileset.tiles[tileID]
-                            self.forcedPaletteCache[tileID] = QPixmap.fromImage(ImageQt.ImageQt(
-                                tile.toImage(self.forcedPalette, tileset)
-                            ))
+                            self.forcedPaletteCache[tileID] = arrayToQPixmap(
+                                tile.toArray(self.forcedPalette, tileset)
+                            )
                             pixmap = self.forcedPaletteCache[tileID]
                         
                         painter.drawPixmap(x*32, y*32, pixmap)